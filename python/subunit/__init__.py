@@ -140,6 +140,9 @@ from testtools import testresult, CopyStreamResult
 
 from subunit import chunked, details, iso8601, test_results
 from subunit.v2 import ByteStreamToStreamResult, StreamResultToBytes
+from subunit.columnar import RunTable
+from subunit.pool import IsolatedPool
+from subunit.ring import SharedRing, STORES_ORDERED
 
 # same format as sys.version_info: "A tuple containing the five components of
 # the version number: major, minor, micro, releaselevel, and serial. All
@@ -926,11 +929,16 @@ class IsolatedTestCase(unittest.TestCase):
     Each test gets its own process, which has a performance overhead but will
     provide excellent isolation from global state (such as django configs,
     zope utilities and so on).
+
+    Set ``transport`` to 'shm' to report results through shared memory
+    rather than a pipe; see ``run_isolated``.
     """
 
+    transport = 'pipe'
+
     def run(self, result=None):
         if result is None: result = self.defaultTestResult()
-        run_isolated(unittest.TestCase, self, result)
+        run_isolated(unittest.TestCase, self, result, self.transport)
 
 
 class IsolatedTestSuite(unittest.TestSuite):
@@ -940,33 +948,65 @@ class IsolatedTestSuite(unittest.TestSuite):
     results from the child process using a Subunit stream.  This is useful for
     handling tests that mutate global state, or are testing C extensions that
     could crash the VM.
+
+    Set ``transport`` to 'shm' to report results through shared memory
+    rather than a pipe; see ``run_isolated``.
+
+    Set ``concurrency`` above 1 to instead run each test in the suite in its
+    own process, that many at a time, with ``subunit.pool.IsolatedPool``.
     """
 
+    transport = 'pipe'
+    concurrency = 1
+
     def run(self, result=None):
         if result is None: result = testresult.TestResult()
-        run_isolated(unittest.TestSuite, self, result)
+        if self.concurrency > 1:
+            IsolatedPool(self.concurrency).run(self, result)
+        else:
+            run_isolated(unittest.TestSuite, self, result, self.transport)
 
 
-def run_isolated(klass, self, result):
+def run_isolated(klass, self, result, transport='pipe'):
     """Run a test suite or case in a subprocess, using the run method on klass.
+
+    :param transport: How the child reports its results: 'pipe' to write
+        them to a pipe on its stdout (so anything else it prints is passed
+        through too), or 'shm' to write them to a ``subunit.ring.SharedRing``.
+        The ring needs a system call only when the parent is waiting for
+        data, which is much cheaper for suites of many fast tests; output
+        the child prints goes straight to the parent's stdout. The ring
+        relies on the CPU keeping stores in order, so on machines where
+        ``subunit.ring.STORES_ORDERED`` is false, such as aarch64, 'shm'
+        uses the pipe instead.
     """
-    c2pread, c2pwrite = os.pipe()
+    if transport == 'shm' and not STORES_ORDERED:
+        transport = 'pipe'
+    if transport == 'shm':
+        ring = SharedRing()
+    elif transport == 'pipe':
+        c2pread, c2pwrite = os.pipe()
+    else:
+        raise ValueError('Unknown transport %r' % (transport,))
     # fixme - error -> result
     # now fork
     pid = os.fork()
     if pid == 0:
         # Child
-        # Close parent's pipe ends
-        os.close(c2pread)
-        # Dup fds for child
-        os.dup2(c2pwrite, 1)
-        # Close pipe fds.
-        os.close(c2pwrite)
-
-        # at this point, sys.stdin is redirected, now we want
-        # to filter it to escape ]'s.
-        ### XXX: test and write that bit.
-        stream = os.fdopen(1, 'wb')
+        if transport == 'shm':
+            stream = ring.writer()
+        else:
+            # Close parent's pipe ends
+            os.close(c2pread)
+            # Dup fds for child
+            os.dup2(c2pwrite, 1)
+            # Close pipe fds.
+            os.close(c2pwrite)
+
+            # at this point, sys.stdin is redirected, now we want
+            # to filter it to escape ]'s.
+            ### XXX: test and write that bit.
+            stream = os.fdopen(1, 'wb')
         result = TestProtocolClient(stream)
         klass.run(self, result)
         stream.flush()
@@ -975,12 +1015,16 @@ def run_isolated(klass, self, result):
         os._exit(0)
     else:
         # Parent
-        # Close child pipe ends
-        os.close(c2pwrite)
+        if transport == 'shm':
+            fileobj = ring.reader()
+        else:
+            # Close child pipe ends
+            os.close(c2pwrite)
+            fileobj = os.fdopen(c2pread, 'rb')
         # hookup a protocol engine
         protocol = TestProtocolServer(result)
-        fileobj = os.fdopen(c2pread, 'rb')
         protocol.readFrom(fileobj)
+        fileobj.close()
         os.waitpid(pid, 0)
         # TODO return code evaluation.
     return result
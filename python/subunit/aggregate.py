@@ -0,0 +1,209 @@
+#
+#  subunit: extensions to Python unittest to get test results from subprocesses.
+#  Copyright (C) 2026 Subunit Contributors
+#
+#  Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+#  license at the users choice. A copy of both licenses are available in the
+#  project source as Apache-2.0 and BSD. You may not use this file except in
+#  compliance with one of these two licences.
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+#  license you chose for the specific language governing permissions and
+#  limitations under that license.
+#
+
+"""Aggregate per-test results across many archived subunit v2 streams.
+
+Each stream is summarised into a small ``TestAggregate`` independently, so
+many streams can be summarised in parallel by a process pool and the
+partial aggregates merged as they arrive::
+
+  aggregate = aggregate_paths(find_streams(['runs/']), processes=8)
+"""
+
+import glob
+import io
+import multiprocessing
+import os
+
+from testtools import StreamResult
+
+from subunit.stats import FINAL_STATUSES, total_seconds
+from subunit.v2 import ByteStreamToStreamResult
+
+__all__ = [
+    'aggregate_paths',
+    'find_streams',
+    'summarise_stream',
+    'TestAggregate',
+    ]
+
+
+PASS_STATUSES = frozenset(['success', 'xfail'])
+FAIL_STATUSES = frozenset(['fail', 'uxsuccess'])
+
+# Indices into the per-test lists of TestAggregate.tests.
+RUNS, PASSES, FAILURES, SKIPS, TIMED, TOTAL_DURATION, MAX_DURATION = range(7)
+
+
+class TestAggregate(StreamResult):
+    """Per-test outcome counts and durations over one or more runs.
+
+    :ivar runs: The number of runs (streams) aggregated.
+    :ivar tests: A dict of test id to a list of [runs, passes, failures,
+        skips, timed runs, total duration, max duration]. 'success' and
+        'xfail' count as passes, 'fail' and 'uxsuccess' as failures.
+    """
+
+    def __init__(self):
+        super(TestAggregate, self).__init__()
+        self.runs = 0
+        self.tests = {}
+        self._active = {}
+
+    def startTestRun(self):
+        self.runs += 1
+        self._active = {}
+
+    def stopTestRun(self):
+        self._active = {}
+
+    def status(self, test_id=None, test_status=None, test_tags=None,
+        runnable=True, file_name=None, file_bytes=None, eof=False,
+        mime_type=None, route_code=None, timestamp=None):
+        if test_id is None:
+            return
+        key = (test_id, route_code)
+        if test_status not in FINAL_STATUSES:
+            if (test_status != 'exists' and timestamp is not None and
+                key not in self._active):
+                self._active[key] = timestamp
+            return
+        entry = self.tests.get(test_id)
+        if entry is None:
+            entry = self.tests[test_id] = [0, 0, 0, 0, 0, 0.0, 0.0]
+        entry[RUNS] += 1
+        if test_status in PASS_STATUSES:
+            entry[PASSES] += 1
+        elif test_status in FAIL_STATUSES:
+            entry[FAILURES] += 1
+        else:
+            entry[SKIPS] += 1
+        start = self._active.pop(key, None)
+        if start is not None and timestamp is not None:
+            duration = total_seconds(timestamp - start)
+            entry[TIMED] += 1
+            entry[TOTAL_DURATION] += duration
+            entry[MAX_DURATION] = max(entry[MAX_DURATION], duration)
+
+    def merge(self, other):
+        """Add the results aggregated by other to this aggregate."""
+        self.runs += other.runs
+        for test_id, other_entry in other.tests.items():
+            entry = self.tests.get(test_id)
+            if entry is None:
+                self.tests[test_id] = list(other_entry)
+                continue
+            for index in (RUNS, PASSES, FAILURES, SKIPS, TIMED,
+                TOTAL_DURATION):
+                entry[index] += other_entry[index]
+            entry[MAX_DURATION] = max(
+                entry[MAX_DURATION], other_entry[MAX_DURATION])
+
+    def flakiness(self, test_id):
+        """Return the flakiness rate of test_id.
+
+        This is the fraction of its passing and failing runs that disagree
+        with its most common outcome: 0 for a test that always passes or
+        always fails, up to 0.5 for one that fails half the time.
+        """
+        entry = self.tests[test_id]
+        decided = entry[PASSES] + entry[FAILURES]
+        if not decided:
+            return 0.0
+        return min(entry[PASSES], entry[FAILURES]) / float(decided)
+
+    def summary(self, test_id):
+        """Return a JSON compatible dict summarising test_id."""
+        entry = self.tests[test_id]
+        if entry[TIMED]:
+            mean = entry[TOTAL_DURATION] / entry[TIMED]
+            maximum = entry[MAX_DURATION]
+        else:
+            mean = maximum = None
+        return {
+            'id': test_id,
+            'runs': entry[RUNS],
+            'passes': entry[PASSES],
+            'failures': entry[FAILURES],
+            'skips': entry[SKIPS],
+            'mean_duration': mean,
+            'max_duration': maximum,
+            'flakiness': self.flakiness(test_id),
+            }
+
+    def as_dict(self):
+        """Summarise all tests as a JSON compatible dict."""
+        return {
+            'runs': self.runs,
+            'tests': [self.summary(test_id) for test_id in sorted(self.tests)],
+            }
+
+
+def summarise_stream(path):
+    """Aggregate the results in the v2 stream at path.
+
+    This is the unit of work done by each worker in ``aggregate_paths``.
+    Non-subunit content in the stream is ignored.
+    """
+    aggregate = TestAggregate()
+    with io.open(path, 'rb') as source:
+        parser = ByteStreamToStreamResult(source, non_subunit_name='stdout')
+        aggregate.startTestRun()
+        parser.run(aggregate)
+        aggregate.stopTestRun()
+    return aggregate
+
+
+def aggregate_paths(paths, processes=None):
+    """Aggregate the results of the v2 streams at paths.
+
+    :param paths: The stream paths to aggregate.
+    :param processes: The number of worker processes to parse streams in;
+        None uses one per CPU. With 1 the streams are parsed in this process.
+    :return: A TestAggregate with one run per path.
+    """
+    aggregate = TestAggregate()
+    paths = list(paths)
+    if processes == 1 or len(paths) < 2:
+        for path in paths:
+            aggregate.merge(summarise_stream(path))
+        return aggregate
+    pool = multiprocessing.Pool(processes)
+    try:
+        for partial in pool.imap_unordered(summarise_stream, paths):
+            aggregate.merge(partial)
+    finally:
+        pool.close()
+        pool.join()
+    return aggregate
+
+
+def find_streams(patterns):
+    """Expand directories and glob patterns to a sorted list of file paths.
+
+    Directories are searched recursively. Patterns that match nothing are
+    ignored.
+    """
+    paths = set()
+    for pattern in patterns:
+        for match in glob.glob(pattern):
+            if os.path.isdir(match):
+                for dirpath, dirnames, filenames in os.walk(match):
+                    for filename in filenames:
+                        paths.add(os.path.join(dirpath, filename))
+            else:
+                paths.add(match)
+    return sorted(paths)
@@ -0,0 +1,307 @@
+#
+#  subunit: extensions to Python unittest to get test results from subprocesses.
+#  Copyright (C) 2026 Subunit Contributors
+#
+#  Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+#  license at the users choice. A copy of both licenses are available in the
+#  project source as Apache-2.0 and BSD. You may not use this file except in
+#  compliance with one of these two licences.
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+#  license you chose for the specific language governing permissions and
+#  limitations under that license.
+#
+
+"""Duration and outcome analytics across several runs.
+
+Runs are loaded as ``RunTable`` objects and aligned by test id into one
+column per run, so comparisons are made a column at a time. When NumPy is
+installed the alignment, duration deltas, rolling medians, regressions and
+transitions are computed with NumPy over whole columns; otherwise the same
+results are computed with the array columns in pure Python::
+
+  aligned = AlignedRuns([RunTable.from_stream(f) for f in files])
+  report = analyse(aligned, window=5, threshold=2.0)
+"""
+
+from array import array
+import json
+import warnings
+
+from subunit.columnar import FINAL_CODES, INT64, MISSING, numpy
+from subunit.v2 import ByteStreamToStreamResult
+
+__all__ = [
+    'AlignedRuns',
+    'analyse',
+    'write_report_stream',
+    ]
+
+
+STATUS_NAMES = ByteStreamToStreamResult.status_lookup
+
+
+def _to_array(typecode, values):
+    """Copy the NumPy array values into an array of typecode.
+
+    The bytes are copied as they are, rather than boxing each element.
+    """
+    return array(typecode, values.astype(typecode, copy=False).tobytes())
+
+
+def _median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) // 2
+
+
+class AlignedRuns(object):
+    """Several RunTables aligned by test id.
+
+    :ivar ids: The test ids in any of the runs. Column positions below are
+        indices into this list.
+    :ivar durations: A list with an array('q') per run of the nanosecond
+        duration of each test in that run, or MISSING if it was not run or
+        not timed.
+    :ivar statuses: A list with an array('b') per run of the final v2
+        status code of each test in that run, or 0 if it did not finish.
+
+    Where a test ran more than once in a run the last execution is used.
+    """
+
+    def __init__(self, tables):
+        self.ids = []
+        lookup = {}
+        mappings = []
+        for table in tables:
+            mapping = array('l')
+            for test_id in table.ids:
+                index = lookup.get(test_id)
+                if index is None:
+                    index = lookup[test_id] = len(self.ids)
+                    self.ids.append(test_id)
+                mapping.append(index)
+            mappings.append(mapping)
+        self.durations = []
+        self.statuses = []
+        count = len(self.ids)
+        for table, mapping in zip(tables, mappings):
+            if numpy is not None:
+                durations, statuses = self._align_numpy(table, mapping, count)
+                self.durations.append(durations)
+                self.statuses.append(statuses)
+                continue
+            durations = array(INT64, [MISSING]) * count
+            statuses = array('b', [0]) * count
+            for test_index, code, start, stop in zip(table.test_index,
+                table.status_code, table.start_ns, table.stop_ns):
+                if code not in FINAL_CODES:
+                    continue
+                index = mapping[test_index]
+                statuses[index] = code
+                if start == MISSING or stop == MISSING:
+                    durations[index] = MISSING
+                else:
+                    durations[index] = stop - start
+            self.durations.append(durations)
+            self.statuses.append(statuses)
+
+    def _align_numpy(self, table, mapping, count):
+        codes = numpy.frombuffer(table.status_code, dtype='b')
+        rows = numpy.nonzero(numpy.isin(codes, sorted(FINAL_CODES)))[0]
+        # Keep the last execution of each test: unique() returns the first
+        # occurrence, so look at the rows in reverse.
+        rows = rows[::-1]
+        indices = numpy.frombuffer(mapping, dtype='l')[
+            numpy.frombuffer(table.test_index, dtype='l')[rows]]
+        indices, first = numpy.unique(indices, return_index=True)
+        rows = rows[first]
+        statuses = numpy.zeros(count, dtype='b')
+        statuses[indices] = codes[rows]
+        start = numpy.frombuffer(table.start_ns, dtype=INT64)[rows]
+        stop = numpy.frombuffer(table.stop_ns, dtype=INT64)[rows]
+        durations = numpy.full(count, MISSING, dtype=INT64)
+        durations[indices] = numpy.where(
+            (start == MISSING) | (stop == MISSING), MISSING, stop - start)
+        return _to_array(INT64, durations), _to_array('b', statuses)
+
+    def __len__(self):
+        return len(self.durations)
+
+    def duration_deltas(self, run, baseline):
+        """Return array('q') of the change in each test's duration.
+
+        :param run: The index of the run to compare.
+        :param baseline: The index of the run to compare against, or an
+            array of baseline durations such as from ``rolling_medians``.
+        :return: run's duration minus the baseline's, or MISSING where
+            either is missing.
+        """
+        if isinstance(baseline, int):
+            baseline = self.durations[baseline]
+        if numpy is not None:
+            values = numpy.frombuffer(self.durations[run], dtype=INT64)
+            base = numpy.frombuffer(baseline, dtype=INT64)
+            return _to_array(INT64, numpy.where(
+                (values == MISSING) | (base == MISSING), MISSING,
+                values - base))
+        return array(INT64, [
+            MISSING if value == MISSING or base == MISSING else value - base
+            for value, base in zip(self.durations[run], baseline)])
+
+    def baseline_medians(self, run, window):
+        """Return the median durations of the window runs before run.
+
+        :return: array('q') holding for each test the median of its
+            durations in up to window runs before run, or MISSING when it
+            was not timed in any of them.
+        """
+        previous = self.durations[max(0, run - window):run]
+        if not previous:
+            return array(INT64, [MISSING]) * len(self.ids)
+        if numpy is not None:
+            matrix = numpy.array(
+                [numpy.frombuffer(column, dtype=INT64) for column in
+                    previous], dtype=float)
+            matrix[matrix == MISSING] = numpy.nan
+            with warnings.catch_warnings():
+                # All-NaN slices are expected for untimed tests.
+                warnings.simplefilter('ignore', RuntimeWarning)
+                median = numpy.nanmedian(matrix, axis=0)
+            column = numpy.full(len(self.ids), MISSING, dtype=INT64)
+            timed = ~numpy.isnan(median)
+            column[timed] = numpy.floor(median[timed])
+            return _to_array(INT64, column)
+        column = array(INT64)
+        for values in zip(*previous):
+            values = [value for value in values if value != MISSING]
+            column.append(_median(values) if values else MISSING)
+        return column
+
+    def rolling_medians(self, window):
+        """Return baseline_medians(run, window) for every run."""
+        return [self.baseline_medians(run, window)
+            for run in range(len(self))]
+
+    def regressions(self, run, window=5, threshold=2.0, min_duration=0):
+        """Find the tests that were much slower in run than usual.
+
+        :param threshold: Flag tests that took more than threshold times
+            the median of their durations in the window previous runs.
+        :param min_duration: Ignore tests whose median is below this many
+            nanoseconds, as tiny durations are mostly noise.
+        :return: A list of (index, duration, median) tuples.
+        """
+        medians = self.baseline_medians(run, window)
+        if numpy is not None:
+            durations = numpy.frombuffer(self.durations[run], dtype=INT64)
+            baseline = numpy.frombuffer(medians, dtype=INT64)
+            flagged = numpy.nonzero(
+                (durations != MISSING) & (baseline != MISSING) &
+                (baseline >= min_duration) &
+                (durations > threshold * baseline))[0]
+            return [(int(index), int(durations[index]), int(baseline[index]))
+                for index in flagged]
+        found = []
+        for index, (value, median) in enumerate(
+            zip(self.durations[run], medians)):
+            if (value != MISSING and median != MISSING and
+                median >= min_duration and value > threshold * median):
+                found.append((index, value, median))
+        return found
+
+    def transitions(self, previous, run):
+        """Return (index, from_code, to_code) for tests whose outcome changed.
+
+        Only tests that finished in both runs are compared.
+        """
+        if numpy is not None:
+            before = numpy.frombuffer(self.statuses[previous], dtype='b')
+            after = numpy.frombuffer(self.statuses[run], dtype='b')
+            changed = numpy.nonzero(
+                (before != after) & (before != 0) & (after != 0))[0]
+            return [(int(index), int(before[index]), int(after[index]))
+                for index in changed]
+        return [(index, before, after) for index, (before, after) in
+            enumerate(zip(self.statuses[previous], self.statuses[run]))
+            if before != after and before and after]
+
+
+def _seconds(nanoseconds):
+    return nanoseconds / 1e9
+
+
+def analyse(aligned, window=5, threshold=2.0, min_duration=0):
+    """Compare the last run in aligned with the runs before it.
+
+    :return: A JSON compatible dict with:
+      * 'regressions': tests more than threshold times slower in the last
+        run than the median of the window runs before it.
+      * 'transitions': tests whose outcome changed in the last run.
+      * 'transition_counts': counts of each kind of outcome change between
+        all consecutive runs, as 'from->to'.
+      * 'total_durations': the summed test durations of each run.
+    """
+    report = {
+        'runs': len(aligned),
+        'tests': len(aligned.ids),
+        'regressions': [],
+        'transitions': [],
+        'transition_counts': {},
+        'total_durations': [
+            _seconds(sum(value for value in durations if value != MISSING))
+            for durations in aligned.durations],
+        }
+    if len(aligned) < 2:
+        return report
+    last = len(aligned) - 1
+    for index, value, median in aligned.regressions(
+        last, window, threshold, min_duration):
+        report['regressions'].append({
+            'id': aligned.ids[index],
+            'duration': _seconds(value),
+            'median': _seconds(median),
+            'ratio': float(value) / median if median else None,
+            })
+    counts = report['transition_counts']
+    for run in range(1, len(aligned)):
+        for index, before, after in aligned.transitions(run - 1, run):
+            kind = '%s->%s' % (STATUS_NAMES[before], STATUS_NAMES[after])
+            counts[kind] = counts.get(kind, 0) + 1
+            if run == last:
+                report['transitions'].append({
+                    'id': aligned.ids[index],
+                    'from': STATUS_NAMES[before],
+                    'to': STATUS_NAMES[after],
+                    })
+    report['regressions'].sort(key=lambda test: test['id'])
+    report['transitions'].sort(key=lambda test: test['id'])
+    return report
+
+
+def write_report_stream(report, result):
+    """Emit report as StreamResult events, one failing test per finding.
+
+    Each regressed test, and each test that newly failed or unexpectedly
+    succeeded, is reported as failed with the details attached as a JSON
+    file called 'analysis', so a report can be fed to any subunit consumer
+    to gate on.
+    """
+    findings = {}
+    for regression in report['regressions']:
+        findings.setdefault(regression['id'], {})['regression'] = regression
+    for transition in report['transitions']:
+        if transition['to'] in ('fail', 'uxsuccess'):
+            findings.setdefault(transition['id'], {})['transition'] = (
+                transition)
+    for test_id in sorted(findings):
+        result.status(test_id=test_id, test_status='inprogress')
+        result.status(test_id=test_id, file_name='analysis',
+            file_bytes=json.dumps(findings[test_id], sort_keys=True).encode(
+                'utf8'),
+            mime_type='application/json', eof=True)
+        result.status(test_id=test_id, test_status='fail')
@@ -0,0 +1,350 @@
+#
+#  subunit: extensions to Python unittest to get test results from subprocesses.
+#  Copyright (C) 2026 Subunit Contributors
+#
+#  Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+#  license at the users choice. A copy of both licenses are available in the
+#  project source as Apache-2.0 and BSD. You may not use this file except in
+#  compliance with one of these two licences.
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+#  license you chose for the specific language governing permissions and
+#  limitations under that license.
+#
+
+"""Collect subunit v2 streams from many socket connections into one.
+
+``Collector`` accepts connections on Unix or TCP sockets and services them
+all from one thread with a selector. Each connection's bytes go through a
+``PacketDecoder``, which splits them into whole packets without blocking or
+decoding them; the packets are written to the output with their route codes
+prefixed by a label for the connection, and can also be decoded into a
+StreamResult such as ``subunit.stats.StreamStats`` for live aggregates::
+
+  collector = Collector(sys.stdout.buffer)
+  collector.listen_unix('/tmp/subunit.sock')
+  collector.run()
+"""
+
+import errno
+import os
+import socket
+import struct
+import zlib
+
+from extras import try_imports
+from testtools.compat import BytesIO
+
+from subunit.merge import relabel_route_code
+from subunit.v2 import (
+    _decode_number,
+    _parse_error_packet,
+    ByteStreamToStreamResult,
+    FMT_32,
+    ParseError,
+    set_packet_route_code,
+    SIGNATURE,
+    StreamResultToBytes,
+    )
+
+selectors = try_imports(['selectors', 'selectors34', 'selectors2'])
+
+__all__ = [
+    'Collector',
+    'PacketDecoder',
+    ]
+
+
+_SIGNATURE_BYTE = bytearray(SIGNATURE)[0]
+
+
+def _packet_length(buf, pos):
+    """Return the length of the packet at pos, or None if it is incomplete.
+
+    :raises ParseError: If the packet is corrupt.
+    """
+    # Signature, two bytes of flags, then the length.
+    if len(buf) - pos < 4:
+        return None
+    length_size = (buf[pos + 3] >> 6) + 1
+    if length_size == 4:
+        raise ParseError('3 byte maximum given but 4 byte value found.')
+    if len(buf) - pos < 3 + length_size:
+        return None
+    length, _ = _decode_number(buf, pos + 3)
+    if length < 3 + length_size + 4:
+        raise ParseError('Packet length %d is too short.' % length)
+    if len(buf) - pos < length:
+        return None
+    packet = bytes(buf[pos:pos + length])
+    crc = zlib.crc32(packet[:-4]) & 0xffffffff
+    packet_crc = struct.unpack(FMT_32, packet[-4:])[0]
+    if crc != packet_crc:
+        raise ParseError(
+            'Bad checksum - calculated (0x%x), stored (0x%x)' % (
+                crc, packet_crc))
+    return length
+
+
+class PacketDecoder(object):
+    """Incrementally split v2 stream bytes into raw packets.
+
+    Bytes are fed in as they arrive and every complete packet (or run of
+    non-subunit content) is returned; incomplete packets are kept until the
+    rest of them is fed. Only the packet lengths and checksums are examined.
+    """
+
+    def __init__(self, errors='strict'):
+        """Create a PacketDecoder.
+
+        :param errors: What to do with a corrupt packet: 'strict' to raise
+            ParseError, 'ignore' to skip it, or 'report' to return in its
+            place a packet failing the test 'subunit.parser' with the error
+            attached, as ``iter_packets`` does. Unless strict, decoding
+            carries on from the next packet signature, as
+            ``ByteStreamToStreamResult`` does.
+        """
+        if errors not in ('strict', 'ignore', 'report'):
+            raise ValueError('Unknown errors mode %r.' % (errors,))
+        self.errors = errors
+        self._buffer = bytearray()
+
+    @property
+    def pending(self):
+        """The number of bytes held for an incomplete packet."""
+        return len(self._buffer)
+
+    def feed(self, data):
+        """Add data and return a list of the complete chunks now available.
+
+        Chunks starting with the packet signature are packets; any other
+        chunk is non-subunit content.
+
+        :raises ParseError: If a packet is corrupt and errors is 'strict'.
+            The decoder should not be used after this.
+        """
+        buf = self._buffer
+        buf.extend(data)
+        chunks = []
+        pos = 0
+        while pos < len(buf):
+            if buf[pos] != _SIGNATURE_BYTE:
+                end = buf.find(SIGNATURE, pos)
+                if end == -1:
+                    end = len(buf)
+                chunks.append(bytes(buf[pos:end]))
+                pos = end
+                continue
+            try:
+                length = _packet_length(buf, pos)
+            except ParseError as error:
+                if self.errors == 'strict':
+                    raise
+                if self.errors == 'report':
+                    chunks.append(_parse_error_packet(error.args[0]))
+                # Skip the bad bytes up to the next signature.
+                end = buf.find(SIGNATURE, pos + 1)
+                pos = len(buf) if end == -1 else end
+                continue
+            if length is None:
+                break
+            chunks.append(bytes(buf[pos:pos + length]))
+            pos += length
+        del buf[:pos]
+        return chunks
+
+
+class _Connection(object):
+
+    def __init__(self, sock, label):
+        self.sock = sock
+        self.label = label
+        self.decoder = PacketDecoder(errors='report')
+
+
+class Collector(object):
+    """Merge the v2 streams sent to listening sockets into one output.
+
+    Each connection is labelled with a number, in the order they are
+    accepted, and the route codes of its packets are prefixed with that
+    label (so worker 3's route code '0' becomes '3/0', and packets without
+    one get '3'). Non-subunit content is wrapped in 'stdout' file packets.
+    A corrupt packet is reported as a failure of the test 'subunit.parser'
+    and skipped, and the rest of the connection's stream is still read.
+
+    Every connection is read at most read_size bytes at a time and the
+    packets from one read are written before reading again, so a slow
+    output or a busy connection holds senders back through their socket
+    buffers instead of growing the collector's memory.
+    """
+
+    def __init__(self, output, result=None, read_size=65536):
+        """Create a Collector.
+
+        :param output: A binary file-like object to write the merged stream
+            to.
+        :param result: An optional StreamResult to also send the decoded
+            events to.
+        :param read_size: The most bytes to read from a connection at once.
+        """
+        self.output = output
+        self.result = result
+        self.read_size = read_size
+        self.selector = selectors.DefaultSelector()
+        self.accepted = 0
+        self.closed = 0
+        self._listeners = []
+        self._connections = {}
+        self._stopping = False
+        self._wakeup, self._waker = socket.socketpair()
+        self._wakeup.setblocking(False)
+        self.selector.register(self._wakeup, selectors.EVENT_READ, None)
+        self._events = StreamResultToBytes(output)
+
+    def add_listener(self, sock):
+        """Accept connections on the listening socket sock."""
+        sock.setblocking(False)
+        self._listeners.append(sock)
+        self.selector.register(sock, selectors.EVENT_READ, self._accept)
+
+    def listen_unix(self, path, backlog=128):
+        """Listen on the Unix socket path, replacing any stale socket."""
+        try:
+            os.unlink(path)
+        except OSError as error:
+            if error.errno != errno.ENOENT:
+                raise
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(path)
+        sock.listen(backlog)
+        self.add_listener(sock)
+        return sock
+
+    def listen_tcp(self, host, port, backlog=128):
+        """Listen on TCP host and port (0 picks a free port)."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+        sock.listen(backlog)
+        self.add_listener(sock)
+        return sock
+
+    def stop(self):
+        """Make run() return. Safe to call from other threads."""
+        self._stopping = True
+        self._waker.send(b'x')
+
+    def run(self, max_connections=None):
+        """Collect streams until stop() is called.
+
+        :param max_connections: If given, also return once this many
+            connections have been accepted and closed.
+        """
+        if self.result is not None:
+            self.result.startTestRun()
+        try:
+            while not self._stopping:
+                if (max_connections is not None and
+                    self.closed >= max_connections):
+                    break
+                for key, _ in self.selector.select():
+                    if key.data is None:
+                        try:
+                            self._wakeup.recv(4096)
+                        except socket.error:
+                            pass
+                    else:
+                        key.data(key.fileobj)
+                self.output.flush()
+        finally:
+            for connection in list(self._connections.values()):
+                self._close(connection)
+            self.output.flush()
+            if self.result is not None:
+                self.result.stopTestRun()
+
+    def close(self):
+        """Close the listening sockets."""
+        for sock in self._listeners:
+            self.selector.unregister(sock)
+            sock.close()
+        self._listeners = []
+        self.selector.unregister(self._wakeup)
+        self._wakeup.close()
+        self._waker.close()
+        self.selector.close()
+
+    def add_connection(self, sock):
+        """Collect the stream sent over the connected socket sock.
+
+        :return: The label of the connection.
+        """
+        sock.setblocking(False)
+        connection = _Connection(sock, str(self.accepted))
+        self.accepted += 1
+        self._connections[sock] = connection
+        self.selector.register(
+            sock, selectors.EVENT_READ,
+            lambda sock: self._read(self._connections[sock]))
+        return connection.label
+
+    def _accept(self, listener):
+        try:
+            sock, _ = listener.accept()
+        except socket.error as error:
+            if error.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                return
+            raise
+        self.add_connection(sock)
+
+    def _read(self, connection):
+        try:
+            data = connection.sock.recv(self.read_size)
+        except socket.error as error:
+            if error.errno in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR):
+                return
+            data = b''
+        if not data:
+            if connection.decoder.pending:
+                self._parse_error(connection, 'Short read - connection '
+                    'closed with %d bytes of a packet pending' % (
+                        connection.decoder.pending,))
+            self._close(connection)
+            return
+        for chunk in connection.decoder.feed(data):
+            self._emit(connection, chunk)
+
+    def _emit(self, connection, chunk):
+        label = connection.label
+        if chunk[:1] != SIGNATURE:
+            self._events.status(
+                file_name='stdout', file_bytes=chunk, route_code=label)
+            if self.result is not None:
+                self.result.status(
+                    file_name='stdout', file_bytes=chunk, route_code=label)
+            return
+        packet = set_packet_route_code(
+            chunk, lambda route_code: relabel_route_code(
+                route_code, label, 'prefix'))
+        self.output.write(packet)
+        if self.result is not None:
+            ByteStreamToStreamResult(BytesIO(packet)).run(self.result)
+
+    def _parse_error(self, connection, message):
+        # The same events ByteStreamToStreamResult reports for bad packets.
+        for result in [self._events, self.result]:
+            if result is None:
+                continue
+            result.status(test_id="subunit.parser", test_status='fail',
+                eof=True, file_name="Parser Error",
+                file_bytes=message.encode('utf8'),
+                mime_type="text/plain;charset=utf8",
+                route_code=connection.label)
+
+    def _close(self, connection):
+        self.selector.unregister(connection.sock)
+        connection.sock.close()
+        del self._connections[connection.sock]
+        self.closed += 1
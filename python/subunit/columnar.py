@@ -0,0 +1,263 @@
+#
+#  subunit: extensions to Python unittest to get test results from subprocesses.
+#  Copyright (C) 2026 Subunit Contributors
+#
+#  Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+#  license at the users choice. A copy of both licenses are available in the
+#  project source as Apache-2.0 and BSD. You may not use this file except in
+#  compliance with one of these two licences.
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+#  license you chose for the specific language governing permissions and
+#  limitations under that license.
+#
+
+"""A columnar, in-memory representation of a parsed test run.
+
+``RunTable`` stores one row per test execution in typed arrays rather than a
+dict and ``Content`` objects per test, so large runs take tens of bytes per
+test (plus the interned test ids) and the columns can be handed to NumPy
+without copying::
+
+  with open('run.subunit', 'rb') as source:
+      table = RunTable.from_stream(source)
+  table.status_counts()
+  columns = table.to_numpy()  # Requires NumPy.
+"""
+
+from array import array
+
+from extras import try_import
+from testtools import StreamResult
+
+import subunit
+from subunit.v2 import ByteStreamToStreamResult, EPOCH
+
+numpy = try_import('numpy')
+
+__all__ = [
+    'RunTable',
+    ]
+
+
+# The v2 status codes, used in the status column.
+STATUS_CODES = dict((status, code)
+    for code, status in ByteStreamToStreamResult.status_lookup.items())
+FINAL_CODES = frozenset(STATUS_CODES[status] for status in
+    ['success', 'fail', 'skip', 'xfail', 'uxsuccess'])
+# Marks a missing timestamp or route code.
+MISSING = -1
+# array only supports 'q' from Python 3.3; 'l' is 64 bits on 64 bit Unix.
+try:
+    INT64 = array('q').typecode
+except ValueError:
+    INT64 = 'l'
+
+
+def timestamp_ns(timestamp):
+    """Convert an aware datetime to integer nanoseconds since the epoch."""
+    delta = timestamp - EPOCH
+    return ((delta.days * 86400 + delta.seconds) * 1000000 +
+        delta.microseconds) * 1000
+
+
+def _varint_size(value):
+    if value < 0x40:
+        return 1
+    elif value < 0x4000:
+        return 2
+    elif value < 0x400000:
+        return 3
+    return 4
+
+
+class _CountingReader(object):
+    """Wrap a binary stream, counting the bytes read from it."""
+
+    def __init__(self, source):
+        self.source = source
+        self.position = 0
+
+    def read(self, size=-1):
+        data = self.source.read(size)
+        self.position += len(data)
+        return data
+
+
+class RunTable(StreamResult):
+    """Test executions from a run, stored by column.
+
+    Each row is one execution of a test: the events for a test id on a
+    route code from its first event to its final status. Listing a test
+    with the 'exists' status is a row of its own. Build a table by
+    passing its events to it as a StreamResult, or with ``from_stream``.
+
+    :ivar ids: The interned test ids.
+    :ivar routes: The interned route codes.
+    :ivar test_index: array('l') of the index into ids of each row.
+    :ivar status_code: array('b') of the v2 status code of each row; see
+        STATUS_CODES.
+    :ivar start_ns: array('q') of the nanosecond timestamp of the first
+        event of each row, or MISSING.
+    :ivar stop_ns: array('q') of the nanosecond timestamp of the final
+        event of each row, or MISSING.
+    :ivar route_index: array('l') of the index into routes of each row, or
+        MISSING.
+    :ivar attachments: None, or when recording attachments a dict of
+        columns with a row per file content event: 'row', 'name' (an index
+        into attachment_names), 'offset' (of the content in the source
+        stream) and 'length'.
+    """
+
+    def __init__(self, record_attachments=False):
+        super(RunTable, self).__init__()
+        self.ids = []
+        self._id_lookup = {}
+        self.routes = []
+        self._route_lookup = {}
+        self.test_index = array('l')
+        self.status_code = array('b')
+        self.start_ns = array(INT64)
+        self.stop_ns = array(INT64)
+        self.route_index = array('l')
+        if record_attachments:
+            self.attachment_names = []
+            self._name_lookup = {}
+            self.attachments = {
+                'row': array('l'),
+                'name': array('l'),
+                'offset': array(INT64),
+                'length': array(INT64),
+                }
+        else:
+            self.attachments = None
+        # (test_id, route_code) -> row of executions not yet finished.
+        self._active = {}
+        # Set by from_stream to locate attachment content.
+        self._reader = None
+
+    @classmethod
+    def from_stream(cls, source, record_attachments=False):
+        """Build a RunTable from the v2 stream read from source.
+
+        :param record_attachments: If True, record where the content of
+            each attachment is in the stream (as offsets from where source
+            was positioned) instead of discarding it.
+        """
+        table = cls(record_attachments=record_attachments)
+        reader = _CountingReader(subunit.make_stream_binary(source))
+        if record_attachments:
+            table._reader = reader
+        parser = ByteStreamToStreamResult(reader, non_subunit_name='stdout')
+        table.startTestRun()
+        parser.run(table)
+        table.stopTestRun()
+        table._reader = None
+        return table
+
+    def __len__(self):
+        return len(self.test_index)
+
+    def _intern(self, values, index, value):
+        position = index.get(value)
+        if position is None:
+            position = index[value] = len(values)
+            values.append(value)
+        return position
+
+    def status(self, test_id=None, test_status=None, test_tags=None,
+        runnable=True, file_name=None, file_bytes=None, eof=False,
+        mime_type=None, route_code=None, timestamp=None):
+        if test_id is None:
+            return
+        key = (test_id, route_code)
+        row = self._active.get(key)
+        if row is None:
+            row = len(self.test_index)
+            self.test_index.append(
+                self._intern(self.ids, self._id_lookup, test_id))
+            self.status_code.append(0)
+            self.start_ns.append(MISSING)
+            self.stop_ns.append(MISSING)
+            if route_code is None:
+                self.route_index.append(MISSING)
+            else:
+                self.route_index.append(
+                    self._intern(self.routes, self._route_lookup, route_code))
+            self._active[key] = row
+        if timestamp is not None and self.start_ns[row] == MISSING:
+            self.start_ns[row] = timestamp_ns(timestamp)
+        if file_name is not None and self.attachments is not None:
+            self._record_attachment(row, file_name, file_bytes, route_code)
+        if test_status is None:
+            return
+        code = STATUS_CODES[test_status]
+        self.status_code[row] = code
+        if code in FINAL_CODES:
+            if timestamp is not None:
+                self.stop_ns[row] = timestamp_ns(timestamp)
+            del self._active[key]
+        elif test_status == 'exists':
+            # A listing rather than an execution, so running the test later
+            # in the stream starts a new row.
+            del self._active[key]
+
+    def _record_attachment(self, row, file_name, file_bytes, route_code):
+        attachments = self.attachments
+        attachments['row'].append(row)
+        attachments['name'].append(
+            self._intern(self.attachment_names, self._name_lookup, file_name))
+        attachments['length'].append(len(file_bytes))
+        if self._reader is None:
+            attachments['offset'].append(MISSING)
+            return
+        # Events are emitted once their whole packet has been read. The file
+        # content is followed only by the optional route code and the CRC.
+        end = self._reader.position - 4
+        if route_code is not None:
+            route_length = len(route_code.encode('utf8'))
+            end -= route_length + _varint_size(route_length)
+        attachments['offset'].append(end - len(file_bytes))
+
+    def stopTestRun(self):
+        self._active = {}
+
+    def durations(self):
+        """Return array('q') of the nanosecond durations of each row.
+
+        Rows without both a start and stop timestamp have MISSING.
+        """
+        return array(INT64, [
+            MISSING if start == MISSING or stop == MISSING else stop - start
+            for start, stop in zip(self.start_ns, self.stop_ns)])
+
+    def status_counts(self):
+        """Return a dict of status to the number of rows with that status."""
+        counts = [0] * 8
+        for code in self.status_code:
+            counts[code] += 1
+        return dict((ByteStreamToStreamResult.status_lookup[code], count)
+            for code, count in enumerate(counts) if count)
+
+    def to_numpy(self):
+        """Return the columns as a dict of NumPy arrays.
+
+        The arrays share memory with the table's columns, so they are only
+        valid until more rows are added. Requires NumPy.
+        """
+        if numpy is None:
+            raise ImportError('NumPy is required for RunTable.to_numpy().')
+        columns = {
+            'test_index': self.test_index,
+            'status_code': self.status_code,
+            'start_ns': self.start_ns,
+            'stop_ns': self.stop_ns,
+            'route_index': self.route_index,
+            }
+        if self.attachments is not None:
+            for name, column in self.attachments.items():
+                columns['attachment_' + name] = column
+        return dict((name, numpy.frombuffer(column, dtype=column.typecode))
+            for name, column in columns.items())
@@ -0,0 +1,137 @@
+#
+#  subunit: extensions to Python unittest to get test results from subprocesses.
+#  Copyright (C) 2026 Subunit Contributors
+#
+#  Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+#  license at the users choice. A copy of both licenses are available in the
+#  project source as Apache-2.0 and BSD. You may not use this file except in
+#  compliance with one of these two licences.
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+#  license you chose for the specific language governing permissions and
+#  limitations under that license.
+#
+
+"""Cache the results of loading a test suite.
+
+Loading a large suite imports every test module, which can take far longer
+than listing the tests. ``DiscoveryCache`` saves the ordered test ids, the
+module each test is defined in and any import errors, along with the
+modification times and sizes of the files and directories the suite was
+loaded from. The cache is only used while none of those have changed::
+
+  cache = DiscoveryCache('.subunit-discovery')
+  cached = cache.load(key)
+  if cached is None:
+      suite = loader.discover('.')
+      cache.save(key, suite, loader.errors, watch_directories=['.'])
+"""
+
+import json
+import os
+import sys
+
+from testtools import iterate_tests
+
+__all__ = [
+    'DiscoveryCache',
+    ]
+
+
+# Bump when the format of the cache file changes.
+CACHE_VERSION = 1
+
+
+def _stat(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime, stat.st_size]
+
+
+def _module_path(name):
+    """Return the file of the loaded module name, or None."""
+    module = sys.modules.get(name)
+    path = getattr(module, '__file__', None)
+    if path is None:
+        return None
+    return os.path.abspath(path)
+
+
+class DiscoveryCache(object):
+    """A file caching the test ids found by loading a suite."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self, key):
+        """Return the cached (tests, errors) for key, or None.
+
+        :param key: A JSON compatible value identifying how the suite was
+            loaded, such as the test names or discovery arguments.
+        :return: None if nothing is cached for key or any watched file has
+            changed, else a list of (test id, module name) tuples in the
+            order the tests were loaded, and a list of the import errors.
+            The module name is None for tests that loading their module
+            does not reproduce.
+        """
+        try:
+            with open(self.path, 'r') as source:
+                cached = json.load(source)
+        except (IOError, OSError, ValueError):
+            return None
+        if (not isinstance(cached, dict) or
+            cached.get('version') != CACHE_VERSION or
+            cached.get('key') != json.loads(json.dumps(key))):
+            return None
+        for path, stat in cached['watch']:
+            if _stat(path) != stat:
+                return None
+        return ([tuple(test) for test in cached['tests']],
+            list(cached['errors']))
+
+    def save(self, key, suite, errors, watch_modules=(),
+        watch_directories=(), by_module=True):
+        """Cache the tests of the freshly loaded suite under key.
+
+        The files of the modules the tests are defined in are watched for
+        changes, as are the files of watch_modules (such as packages whose
+        test_suite() functions choose the tests), and every directory under
+        watch_directories (where adding or removing a test module changes
+        the directory). A module that failed to import is not in
+        sys.modules, so its file is not watched: fixing it does not
+        invalidate a cache saved with its import error.
+
+        :param by_module: False if loading the modules of the tests does not
+            reproduce them, such as when a package's load_tests generates
+            them, so the module names are not cached.
+        """
+        tests = []
+        paths = set()
+        for test in iterate_tests(suite):
+            module = type(test).__module__
+            tests.append((test.id(), module if by_module else None))
+            paths.add(_module_path(module))
+        for name in watch_modules:
+            paths.add(_module_path(name))
+        for top in watch_directories:
+            for directory, dirnames, _ in os.walk(top):
+                dirnames[:] = [name for name in dirnames
+                    if not name.startswith('.') and name != '__pycache__']
+                paths.add(os.path.abspath(directory))
+        paths.discard(None)
+        watch = [(path, _stat(path)) for path in sorted(paths)]
+        cached = {
+            'version': CACHE_VERSION,
+            'key': key,
+            'watch': watch,
+            'tests': tests,
+            'errors': list(errors),
+            }
+        temporary = self.path + '.tmp'
+        with open(temporary, 'w') as output:
+            json.dump(cached, output)
+        os.rename(temporary, self.path)
@@ -0,0 +1,226 @@
+#
+#  subunit: extensions to Python unittest to get test results from subprocesses.
+#  Copyright (C) 2026 Subunit Contributors
+#
+#  Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+#  license at the users choice. A copy of both licenses are available in the
+#  project source as Apache-2.0 and BSD. You may not use this file except in
+#  compliance with one of these two licences.
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+#  license you chose for the specific language governing permissions and
+#  limitations under that license.
+#
+
+"""A compact, incrementally updated on-disk history of test outcomes.
+
+A history store is a directory of three append-only files:
+
+ * ``ids.txt`` interns test ids: one JSON string per line, the line number
+   being the test's index.
+ * ``outcomes.bin`` holds one record per run: two bit planes (passed and
+   failed) of one bit per test index, so each outcome takes two bits. A test
+   that was skipped has both bits set, one that was not run neither.
+ * ``runs.txt`` describes the runs, one JSON object per line, in the order
+   they were added: the run key, the revision of the code it ran (if
+   known), the number of tests indexed when it was added and the offset of
+   its record in ``outcomes.bin``.
+
+Adding a run only appends to these files, and runs are identified by key so
+archived streams already in the store are not parsed again. Queries load
+each run as a pair of integers used as bit sets, so finding the tests that
+flip between passing and failing takes a few big integer operations per
+run rather than a pass over every test in every run.
+"""
+
+import io
+import json
+import os
+
+from subunit.aggregate import FAILURES, PASSES, RUNS, TestAggregate
+from subunit.v2 import ByteStreamToStreamResult
+
+__all__ = [
+    'HistoryStore',
+    ]
+
+
+if getattr(int, 'from_bytes', None) is not None:
+    def _bytes_to_int(data):
+        return int.from_bytes(data, 'little')
+
+    def _int_to_bytes(value, length):
+        return value.to_bytes(length, 'little')
+else:
+    import binascii
+
+    def _bytes_to_int(data):
+        if not data:
+            return 0
+        return int(binascii.hexlify(data[::-1]), 16)
+
+    def _int_to_bytes(value, length):
+        data = binascii.unhexlify('%0*x' % (length * 2, value))
+        return data[::-1]
+
+
+def _iter_bits(value):
+    """Yield the indices of the bits set in value, lowest first."""
+    while value:
+        low = value & -value
+        yield low.bit_length() - 1
+        value ^= low
+
+
+class HistoryStore(object):
+    """Per-test outcomes across many runs, stored in the directory path.
+
+    :ivar ids: The interned test ids; a test's index is its position.
+    :ivar runs: A list of dicts describing each run, oldest first.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        self._ids_path = os.path.join(path, 'ids.txt')
+        self._runs_path = os.path.join(path, 'runs.txt')
+        self._outcomes_path = os.path.join(path, 'outcomes.bin')
+        self.ids = self._read_lines(self._ids_path)
+        self._index = dict((test_id, index)
+            for index, test_id in enumerate(self.ids))
+        self.runs = self._read_lines(self._runs_path)
+        self._keys = set(run['key'] for run in self.runs)
+
+    def _read_lines(self, path):
+        if not os.path.exists(path):
+            return []
+        with io.open(path, 'rb') as source:
+            return [json.loads(line.decode('utf8')) for line in source
+                if line.strip()]
+
+    def _append_lines(self, path, values):
+        with io.open(path, 'ab') as target:
+            for value in values:
+                target.write(json.dumps(value).encode('utf8') + b'\n')
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def add_run(self, key, source, revision=None):
+        """Add the outcomes in the v2 stream source as the run key.
+
+        :param key: A unique name for the run, such as the path of its
+            archived stream.
+        :param source: A binary file-like object to read the stream from.
+        :param revision: The revision of the code that was tested, if known.
+        :return: False if key was already in the store, True otherwise.
+        """
+        if key in self._keys:
+            return False
+        aggregate = TestAggregate()
+        parser = ByteStreamToStreamResult(source, non_subunit_name='stdout')
+        aggregate.startTestRun()
+        parser.run(aggregate)
+        aggregate.stopTestRun()
+        new_ids = []
+        passed = failed = 0
+        for test_id, entry in aggregate.tests.items():
+            index = self._index.get(test_id)
+            if index is None:
+                index = self._index[test_id] = len(self.ids)
+                self.ids.append(test_id)
+                new_ids.append(test_id)
+            bit = 1 << index
+            # A test reported more than once in a run failed if any of its
+            # reports did.
+            if entry[FAILURES]:
+                failed |= bit
+            elif entry[PASSES]:
+                passed |= bit
+            elif entry[RUNS]:
+                passed |= bit
+                failed |= bit
+        self._append_lines(self._ids_path, new_ids)
+        length = (len(self.ids) + 7) // 8
+        with io.open(self._outcomes_path, 'ab') as target:
+            target.seek(0, os.SEEK_END)
+            offset = target.tell()
+            target.write(_int_to_bytes(passed, length))
+            target.write(_int_to_bytes(failed, length))
+        run = {'key': key, 'revision': revision, 'tests': len(self.ids),
+            'offset': offset}
+        self._append_lines(self._runs_path, [run])
+        self.runs.append(run)
+        self._keys.add(key)
+        return True
+
+    def add_path(self, path, revision=None):
+        """Add the stream at path as a run keyed by its absolute path."""
+        key = os.path.abspath(path)
+        if key in self._keys:
+            return False
+        with io.open(path, 'rb') as source:
+            return self.add_run(key, source, revision)
+
+    def iter_outcomes(self):
+        """Yield (run, passed, failed) for each run, oldest first.
+
+        passed and failed are integers with bit n set when the test with
+        index n passed or failed respectively; skipped tests have both set.
+        """
+        if not self.runs:
+            return
+        with io.open(self._outcomes_path, 'rb') as source:
+            for run in self.runs:
+                length = (run['tests'] + 7) // 8
+                source.seek(run['offset'])
+                data = source.read(length * 2)
+                yield (run, _bytes_to_int(data[:length]),
+                    _bytes_to_int(data[length:]))
+
+    def flaky(self, min_flips=1):
+        """Find tests whose outcome flipped without a code change.
+
+        A flip is a test passing in one run and failing in the next run that
+        decided it (or vice versa), where both runs tested the same
+        revision. Runs without a revision are treated as testing the same
+        code.
+
+        :return: A list of dicts with the test id, its number of flips and
+            how many runs it passed and failed in, most flips first.
+        """
+        flips = {}
+        last_passed = last_failed = 0
+        revision = None
+        for run, passed, failed in self.iter_outcomes():
+            if run['revision'] != revision:
+                revision = run['revision']
+                last_passed = last_failed = 0
+            skipped = passed & failed
+            passed ^= skipped
+            failed ^= skipped
+            decided = passed | failed
+            for index in _iter_bits(
+                (last_passed & failed) | (last_failed & passed)):
+                flips[index] = flips.get(index, 0) + 1
+            last_passed = (last_passed & ~decided) | passed
+            last_failed = (last_failed & ~decided) | failed
+        flaky = [index for index, count in flips.items()
+            if count >= min_flips]
+        passes = dict.fromkeys(flaky, 0)
+        failures = dict.fromkeys(flaky, 0)
+        for run, passed, failed in self.iter_outcomes():
+            for index in flaky:
+                bit = 1 << index
+                if passed & bit and not failed & bit:
+                    passes[index] += 1
+                elif failed & bit and not passed & bit:
+                    failures[index] += 1
+        report = [{'id': self.ids[index], 'flips': flips[index],
+            'passes': passes[index], 'failures': failures[index]}
+            for index in flaky]
+        report.sort(key=lambda test: (-test['flips'], test['id']))
+        return report
@@ -0,0 +1,177 @@
+#
+#  subunit: extensions to Python unittest to get test results from subprocesses.
+#  Copyright (C) 2026 Subunit Contributors
+#
+#  Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+#  license at the users choice. A copy of both licenses are available in the
+#  project source as Apache-2.0 and BSD. You may not use this file except in
+#  compliance with one of these two licences.
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+#  license you chose for the specific language governing permissions and
+#  limitations under that license.
+#
+
+"""Find the tests that allocate memory and keep it.
+
+``AllocationMeasurement`` traces each test's allocations with ``tracemalloc``
+and attaches an 'allocations' JSON report to its outcome: the bytes the
+test allocated that were still alive once it finished, the peak traced
+memory during the test, and the source lines responsible for most of the
+retained bytes::
+
+  {"net_bytes": 1048576, "peak_bytes": 2097152, "blocks": 12,
+   "top": [{"site": "mylib/cache.py:42", "bytes": 1048000, "blocks": 1}]}
+
+``AllocationRanking`` reads those reports back out of a stream and ranks
+the tests by the bytes they retained, to find the tests behind memory
+creep in long-lived workers.
+"""
+
+import gc
+import json
+import sys
+
+from testtools import StreamResult
+from testtools.content import Content
+from testtools.content_type import ContentType
+
+from subunit.test_results import DetailsAddingDecorator, Measurement
+
+try:
+    import tracemalloc
+except ImportError:
+    # New in Python 3.4.
+    tracemalloc = None
+
+__all__ = [
+    'AllocationDecorator',
+    'AllocationMeasurement',
+    'AllocationRanking',
+    ]
+
+
+class AllocationMeasurement(Measurement):
+    """Measure the memory each test allocated and kept.
+
+    Tracing is started with the first test (unless it was already running)
+    and stopped at the end of the run. The traces are cleared as each test
+    starts, so only allocations made by the test are reported, and garbage
+    is collected before its outcome so that unreachable cycles are not
+    counted. Allocations made in the modules of the result's measurements
+    are left out. Clearing the traces affects anything else using
+    tracemalloc in the process. Where tracemalloc is unavailable nothing is
+    added.
+    """
+
+    def __init__(self, limit=10):
+        """Create an AllocationMeasurement.
+
+        :param limit: The number of allocation sites to report per test.
+        """
+        self.limit = limit
+        self._started_tracing = False
+        self._snapshot = None
+        self._peak = None
+        self._excluded = [tracemalloc.__file__] if tracemalloc else []
+
+    def start(self, result, test):
+        self._snapshot = None
+        if tracemalloc is not None:
+            self._excluded = sorted(set([tracemalloc.__file__] + [
+                sys.modules[type(measurement).__module__].__file__
+                for measurement in result.measurements]))
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            tracemalloc.clear_traces()
+
+    def stop(self, test):
+        if tracemalloc is None or not tracemalloc.is_tracing():
+            return
+        gc.collect()
+        self._peak = tracemalloc.get_traced_memory()[1]
+        self._snapshot = tracemalloc.take_snapshot()
+
+    def stop_run(self):
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def details(self, test):
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        self._snapshot = None
+        stats = snapshot.filter_traces([
+            tracemalloc.Filter(False, filename)
+            for filename in self._excluded]).statistics('lineno')
+        report = json.dumps({
+            'net_bytes': sum(stat.size for stat in stats),
+            'peak_bytes': self._peak,
+            'blocks': sum(stat.count for stat in stats),
+            'top': [{
+                'site': '%s:%d' % (stat.traceback[0].filename,
+                    stat.traceback[0].lineno),
+                'bytes': stat.size,
+                'blocks': stat.count,
+                } for stat in stats[:self.limit]],
+            }, sort_keys=True, separators=(',', ':')).encode('utf8')
+        return {'allocations': Content(
+            ContentType('application', 'json'), lambda: [report])}
+
+
+class AllocationDecorator(DetailsAddingDecorator):
+    """Attach the memory each test allocated and kept to its outcome.
+
+    See ``AllocationMeasurement``.
+    """
+
+    def __init__(self, decorated, limit=10):
+        super(AllocationDecorator, self).__init__(
+            decorated, [AllocationMeasurement(limit)])
+
+
+class AllocationRanking(StreamResult):
+    """Total the 'allocations' reports in a stream by test.
+
+    :ivar tests: A dict of test id to a dict of the test's 'runs' (reports
+        seen), total 'net_bytes', largest 'peak_bytes' and 'sites' (a dict
+        of allocation site to total bytes).
+    """
+
+    def __init__(self):
+        super(AllocationRanking, self).__init__()
+        self.tests = {}
+        # (route code, test id) -> the chunks read so far.
+        self._pending = {}
+
+    def status(self, test_id=None, test_status=None, test_tags=None,
+        runnable=True, file_name=None, file_bytes=None, eof=False,
+        mime_type=None, route_code=None, timestamp=None):
+        if file_name != 'allocations' or test_id is None:
+            return
+        key = (route_code, test_id)
+        self._pending.setdefault(key, []).append(file_bytes)
+        if not eof:
+            return
+        try:
+            report = json.loads(
+                b''.join(self._pending.pop(key)).decode('utf8'))
+        except ValueError:
+            return
+        test = self.tests.setdefault(test_id,
+            {'runs': 0, 'net_bytes': 0, 'peak_bytes': 0, 'sites': {}})
+        test['runs'] += 1
+        test['net_bytes'] += report['net_bytes']
+        test['peak_bytes'] = max(test['peak_bytes'], report['peak_bytes'])
+        for site in report['top']:
+            test['sites'][site['site']] = (
+                test['sites'].get(site['site'], 0) + site['bytes'])
+
+    def ranking(self):
+        """Return (test id, totals) tuples, most net bytes first."""
+        return sorted(self.tests.items(),
+            key=lambda item: (-item[1]['net_bytes'], item[0]))
@@ -0,0 +1,153 @@
+#
+#  subunit: extensions to Python unittest to get test results from subprocesses.
+#  Copyright (C) 2026 Subunit Contributors
+#
+#  Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+#  license at the users choice. A copy of both licenses are available in the
+#  project source as Apache-2.0 and BSD. You may not use this file except in
+#  compliance with one of these two licences.
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+#  license you chose for the specific language governing permissions and
+#  limitations under that license.
+#
+
+"""Merge several subunit v2 streams into one, ordered by timestamp.
+
+Each input is parsed by its own thread into a bounded queue, and the
+events are merged with a heap holding the next event of each input, so
+memory use is bounded by the queue sizes rather than the size of the run::
+
+  merge_streams([open(path, 'rb') for path in paths], result)
+"""
+
+import heapq
+import itertools
+import sys
+import threading
+
+from extras import try_imports
+from testtools import StreamResult
+
+from subunit.columnar import timestamp_ns
+from subunit.v2 import ByteStreamToStreamResult
+
+queue = try_imports(['queue', 'Queue'])
+
+__all__ = [
+    'merge_streams',
+    'relabel_route_code',
+    ]
+
+
+# Events are passed between threads in batches of this many.
+BATCH_SIZE = 256
+# Marks the end of an input in its queue.
+_END = object()
+
+
+class _EventQueue(StreamResult):
+    """Put the events passed to it on a queue in batches."""
+
+    def __init__(self, events):
+        super(_EventQueue, self).__init__()
+        self.events = events
+        self.batch = []
+
+    def status(self, **kwargs):
+        self.batch.append(kwargs)
+        if len(self.batch) >= BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self.batch:
+            self.events.put(self.batch)
+            self.batch = []
+
+
+def _read_input(source, events):
+    try:
+        result = _EventQueue(events)
+        ByteStreamToStreamResult(source, non_subunit_name='stdout').run(
+            result)
+        result.flush()
+    except Exception:
+        events.put(sys.exc_info())
+    events.put(_END)
+
+
+def _iter_input(events):
+    """Yield the events from an input's queue, re-raising its errors."""
+    while True:
+        batch = events.get()
+        if batch is _END:
+            return
+        if isinstance(batch, tuple):
+            raise batch[1]
+        for kwargs in batch:
+            yield kwargs
+
+
+def relabel_route_code(route_code, label, mode):
+    """Return route_code prefixed with (mode 'prefix') or replaced by label."""
+    if mode == 'assign' or route_code is None:
+        return label
+    return label + '/' + route_code
+
+
+def merge_streams(sources, result, route_mode=None, labels=None,
+    queue_size=64):
+    """Merge the v2 streams read from sources into result.
+
+    Events are emitted in timestamp order. Events without a timestamp are
+    ordered as if they had the timestamp of the previous event from the same
+    input, and the events from any one input are always emitted in their
+    original order. Events with equal timestamps are emitted in input order.
+
+    :param sources: Binary file-like objects to read streams from.
+    :param result: The StreamResult to emit the merged events to.
+    :param route_mode: None to leave route codes alone, 'prefix' to prefix
+        the route codes of each input with its label (so '0' from the input
+        labelled '2' becomes '2/0'), or 'assign' to replace them with it.
+    :param labels: The labels for each input; defaults to their indices.
+    :param queue_size: How many batches of events to buffer per input.
+    """
+    if labels is None:
+        labels = [str(index) for index in range(len(sources))]
+    threads = []
+    inputs = []
+    for source in sources:
+        events = queue.Queue(queue_size)
+        thread = threading.Thread(target=_read_input, args=(source, events))
+        thread.daemon = True
+        thread.start()
+        threads.append(thread)
+        inputs.append(_iter_input(events))
+    # Heap entries are (timestamp, input index, sequence, event); the
+    # sequence keeps entries unique so events are never compared.
+    heap = []
+    last_timestamps = [-1] * len(inputs)
+    sequence = itertools.count()
+
+    def push(index):
+        for kwargs in inputs[index]:
+            timestamp = kwargs.get('timestamp')
+            if timestamp is not None:
+                last_timestamps[index] = timestamp_ns(timestamp)
+            heapq.heappush(
+                heap, (last_timestamps[index], index, next(sequence), kwargs))
+            return
+
+    for index in range(len(inputs)):
+        push(index)
+    while heap:
+        _, index, _, kwargs = heapq.heappop(heap)
+        if route_mode is not None:
+            kwargs['route_code'] = relabel_route_code(
+                kwargs.get('route_code'), labels[index], route_mode)
+        result.status(**kwargs)
+        push(index)
+    for thread in threads:
+        thread.join()
@@ -0,0 +1,153 @@
+#
+#  subunit: extensions to Python unittest to get test results from subprocesses.
+#  Copyright (C) 2026 Subunit Contributors
+#
+#  Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+#  license at the users choice. A copy of both licenses are available in the
+#  project source as Apache-2.0 and BSD. You may not use this file except in
+#  compliance with one of these two licences.
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+#  license you chose for the specific language governing permissions and
+#  limitations under that license.
+#
+
+"""Run isolated tests in several forked processes at once.
+
+``run_isolated`` forks a child per test and waits for it before starting
+the next. ``IsolatedPool`` keeps several children running: the parent,
+which has already imported and loaded the tests, is the template every
+child is forked from, and the children's subunit streams are read
+concurrently and replayed into the parent's result::
+
+  IsolatedPool(concurrency=8).run(suite, result)
+"""
+
+import errno
+import os
+import select
+import sys
+import traceback
+import unittest
+
+from testtools.compat import BytesIO
+
+import subunit
+
+__all__ = [
+    'IsolatedPool',
+    ]
+
+
+def _cpu_count():
+    try:
+        import multiprocessing
+        return multiprocessing.cpu_count()
+    except (ImportError, NotImplementedError):
+        return 1
+
+
+def _run_test(test, result):
+    """Run test in this process, even if it would normally fork."""
+    if isinstance(test, subunit.IsolatedTestCase):
+        unittest.TestCase.run(test, result)
+    elif isinstance(test, subunit.IsolatedTestSuite):
+        unittest.TestSuite.run(test, result)
+    else:
+        test.run(result)
+
+
+class IsolatedPool(object):
+    """Run each of some tests in its own forked process, several at a time.
+
+    Each test's results are buffered until its process exits and are then
+    reported to the result in the order the tests were given, so results
+    are never interleaved. Like ``run_isolated``, the children report over a
+    pipe on their stdout, so anything else they print is passed through.
+    """
+
+    def __init__(self, concurrency=None):
+        """Create an IsolatedPool.
+
+        :param concurrency: The most processes to run at once; defaults to
+            the number of CPUs.
+        """
+        if concurrency is None:
+            concurrency = _cpu_count()
+        self.concurrency = max(1, concurrency)
+
+    def run(self, tests, result):
+        """Run each of tests (such as the members of a suite) in a child.
+
+        No more tests are started once result.shouldStop is set (as with
+        --failfast), but the tests already running are still reported.
+
+        :return: result.
+        """
+        tests = iter(tests)
+        # Pipe read fd -> (pid, position, chunks read so far).
+        running = {}
+        finished = {}
+        started = 0
+        reported = 0
+        exhausted = False
+        while True:
+            while not exhausted and len(running) < self.concurrency:
+                if getattr(result, 'shouldStop', False):
+                    exhausted = True
+                    break
+                try:
+                    test = next(tests)
+                except StopIteration:
+                    exhausted = True
+                    break
+                fd, pid = self._start(test, running)
+                running[fd] = (pid, started, [])
+                started += 1
+            if not running:
+                break
+            try:
+                readable = select.select(list(running), [], [])[0]
+            except select.error as error:
+                if error.args[0] == errno.EINTR:
+                    continue
+                raise
+            for fd in readable:
+                data = os.read(fd, 65536)
+                if data:
+                    running[fd][2].append(data)
+                    continue
+                pid, position, chunks = running.pop(fd)
+                os.close(fd)
+                os.waitpid(pid, 0)
+                finished[position] = b''.join(chunks)
+            while reported in finished:
+                protocol = subunit.TestProtocolServer(result)
+                protocol.readFrom(BytesIO(finished.pop(reported)))
+                reported += 1
+        return result
+
+    def _start(self, test, running):
+        c2pread, c2pwrite = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                # Don't hold the other children's pipes open.
+                for fd in list(running) + [c2pread]:
+                    os.close(fd)
+                os.dup2(c2pwrite, 1)
+                os.close(c2pwrite)
+                stream = os.fdopen(1, 'wb')
+                _run_test(test, subunit.TestProtocolClient(stream))
+                stream.flush()
+                code = 0
+            except BaseException:
+                traceback.print_exc()
+            finally:
+                sys.stderr.flush()
+                os._exit(code)
+        os.close(c2pwrite)
+        return c2pread, pid
@@ -0,0 +1,168 @@
+#
+#  subunit: extensions to Python unittest to get test results from subprocesses.
+#  Copyright (C) 2026 Subunit Contributors
+#
+#  Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+#  license at the users choice. A copy of both licenses are available in the
+#  project source as Apache-2.0 and BSD. You may not use this file except in
+#  compliance with one of these two licences.
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+#  license you chose for the specific language governing permissions and
+#  limitations under that license.
+#
+
+"""Profile tests and merge their profiles.
+
+``ProfilingMeasurement`` runs chosen tests under ``cProfile`` and attaches
+the marshalled ``pstats`` data, as ``pstats.Stats.dump_stats`` would write
+it, to each test's outcome. ``ProfileCollector`` gathers those attachments
+back out of a v2 stream into one merged profile::
+
+  collector = ProfileCollector()
+  ByteStreamToStreamResult(source).run(collector)
+  collector.dump('merged.pstats')
+  collector.pstats(sys.stdout).sort_stats('cumulative').print_stats(20)
+"""
+
+import cProfile
+import fnmatch
+import marshal
+import pstats
+
+from testtools import StreamResult
+from testtools.content import Content
+from testtools.content_type import ContentType
+
+from subunit.test_results import DetailsAddingDecorator, Measurement
+
+__all__ = [
+    'merge_stats',
+    'ProfileCollector',
+    'ProfilingDecorator',
+    'ProfilingMeasurement',
+    'PSTATS_MIME_TYPE',
+    ]
+
+
+PSTATS_MIME_TYPE = 'application/x-python-pstats'
+
+# Attachments are split into chunks, as v2 packets are limited to 4MiB.
+CHUNK_SIZE = 65536
+
+
+def merge_stats(target, stats):
+    """Add the pstats dict stats into the pstats dict target."""
+    for func, stat in stats.items():
+        if func in target:
+            target[func] = pstats.add_func_stats(target[func], stat)
+        else:
+            target[func] = stat
+
+
+class _Loaded(object):
+    """Give pstats.Stats an already collected stats dict."""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+class ProfilingMeasurement(Measurement):
+    """Run tests under cProfile, attaching each test's profile to it.
+
+    The profile covers the test's setUp, body and tearDown, and is attached
+    as a 'profile' detail of type application/x-python-pstats.
+    """
+
+    def __init__(self, patterns=None):
+        """Create a ProfilingMeasurement.
+
+        :param patterns: fnmatch globs of the ids of the tests to profile,
+            such as 'mylib.tests.test_slow.*'; None profiles every test.
+        """
+        self.patterns = patterns
+        self._profile = None
+
+    def _wanted(self, test):
+        if not self.patterns:
+            return True
+        test_id = test.id()
+        for pattern in self.patterns:
+            if fnmatch.fnmatchcase(test_id, pattern):
+                return True
+        return False
+
+    def start(self, result, test):
+        self._profile = None
+        if self._wanted(test):
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def stop(self, test):
+        if self._profile is not None:
+            self._profile.disable()
+
+    def details(self, test):
+        profile = self._profile
+        if profile is None:
+            return None
+        self._profile = None
+        profile.create_stats()
+        data = marshal.dumps(profile.stats)
+        chunks = [data[offset:offset + CHUNK_SIZE]
+            for offset in range(0, len(data), CHUNK_SIZE)]
+        return {'profile': Content(
+            ContentType('application', 'x-python-pstats'), lambda: chunks)}
+
+
+class ProfilingDecorator(DetailsAddingDecorator):
+    """Attach a profile of each test to its outcome.
+
+    See ``ProfilingMeasurement``.
+    """
+
+    def __init__(self, decorated, patterns=None):
+        super(ProfilingDecorator, self).__init__(
+            decorated, [ProfilingMeasurement(patterns)])
+
+
+class ProfileCollector(StreamResult):
+    """Merge the pstats attachments in a stream into one profile.
+
+    :ivar stats: The merged pstats dict.
+    :ivar profiles: The number of attachments merged.
+    """
+
+    def __init__(self):
+        super(ProfileCollector, self).__init__()
+        self.stats = {}
+        self.profiles = 0
+        # (route code, test id, file name) -> the chunks read so far.
+        self._pending = {}
+
+    def status(self, test_id=None, test_status=None, test_tags=None,
+        runnable=True, file_name=None, file_bytes=None, eof=False,
+        mime_type=None, route_code=None, timestamp=None):
+        if (file_name is None or not mime_type or
+            mime_type.split(';')[0].strip() != PSTATS_MIME_TYPE):
+            return
+        key = (route_code, test_id, file_name)
+        self._pending.setdefault(key, []).append(file_bytes)
+        if eof:
+            merge_stats(self.stats,
+                marshal.loads(b''.join(self._pending.pop(key))))
+            self.profiles += 1
+
+    def pstats(self, stream=None):
+        """Return a pstats.Stats of the merged profile, printing to stream."""
+        return pstats.Stats(_Loaded(self.stats), stream=stream)
+
+    def dump(self, path):
+        """Write the merged profile to path, for loading with pstats."""
+        with open(path, 'wb') as output:
+            marshal.dump(self.stats, output)
@@ -0,0 +1,274 @@
+#
+#  subunit: extensions to Python unittest to get test results from subprocesses.
+#  Copyright (C) 2026 Subunit Contributors
+#
+#  Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+#  license at the users choice. A copy of both licenses are available in the
+#  project source as Apache-2.0 and BSD. You may not use this file except in
+#  compliance with one of these two licences.
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+#  license you chose for the specific language governing permissions and
+#  limitations under that license.
+#
+
+"""A shared memory ring buffer for streams from forked children.
+
+``SharedRing`` carries a byte stream from one forked child to its parent
+through shared memory instead of a pipe. Writes are copied into the ring
+without a system call unless the parent is asleep waiting for data, and
+the parent drains everything written so far on each wakeup, so a child
+writing many small packets costs far fewer context switches::
+
+  ring = SharedRing()
+  pid = os.fork()
+  if pid == 0:
+      stream = ring.writer()
+      ...
+      os._exit(0)
+  stream = ring.reader()
+  for line in stream:
+      ...
+
+The ring has no memory barriers: the writer copies data into the ring and
+then stores the new head counter, and the reader relies on seeing those
+stores in that order. Python cannot issue a fence, so this only holds on
+CPUs that keep stores in program order, as x86 does. ``STORES_ORDERED``
+says whether this machine is one of them; ``run_isolated`` only uses the
+ring when it is.
+"""
+
+import errno
+import io
+import mmap
+import os
+import platform
+import select
+import struct
+
+__all__ = [
+    'SharedRing',
+    'STORES_ORDERED',
+    ]
+
+
+DEFAULT_SIZE = 1024 * 1024
+# Whether other processes see this CPU's stores to the ring in the order
+# they were made (x86's total store order). Weakly ordered CPUs such as
+# aarch64 or POWER may make the head counter visible before the data it
+# covers.
+STORES_ORDERED = platform.machine().lower() in (
+    'x86_64', 'amd64', 'x86', 'i386', 'i486', 'i586', 'i686')
+# Both sides recheck the ring this often while waiting, in case a wakeup
+# raced with them going to sleep.
+POLL_INTERVAL = 0.05
+
+# The header holds the total bytes ever written (only stored by the
+# writer), the total bytes ever read (only stored by the reader), and a
+# flag for each side saying it is waiting to be woken.
+_COUNTER = struct.Struct('Q')
+_FLAG = struct.Struct('i')
+_HEAD = 0
+_TAIL = 8
+_READER_WAITING = 16
+_WRITER_WAITING = 20
+_HEADER_SIZE = 64
+
+
+def _wait(fd, timeout):
+    """Wait for a wakeup on fd. Return False if its writer has gone."""
+    try:
+        readable = select.select([fd], [], [], timeout)[0]
+    except select.error as error:
+        if error.args[0] == errno.EINTR:
+            return True
+        raise
+    if not readable:
+        return True
+    return bool(os.read(fd, 4096))
+
+
+class SharedRing(object):
+    """A single producer, single consumer byte ring shared across fork().
+
+    Create the ring before forking, then call ``writer`` in one process and
+    ``reader`` in the other. The memory is an anonymous shared mapping, so
+    nothing outlives the two processes. A pair of pipes is used only to
+    wake a side that found the ring empty (or full); their closing also
+    tells the reader that the writer has exited, even if it crashed.
+
+    The ring is only safe where ``STORES_ORDERED`` is true.
+    """
+
+    def __init__(self, size=DEFAULT_SIZE):
+        """Create a SharedRing holding up to size bytes in flight."""
+        self.size = size
+        self._map = mmap.mmap(-1, _HEADER_SIZE + size)
+        self._data_r, self._data_w = os.pipe()
+        self._space_r, self._space_w = os.pipe()
+
+    def writer(self):
+        """Return the writing end. Call this in one process only."""
+        os.close(self._data_r)
+        os.close(self._space_w)
+        return _RingWriter(self._map, self.size, self._data_w, self._space_r)
+
+    def reader(self):
+        """Return the reading end. Call this in one process only."""
+        os.close(self._data_w)
+        os.close(self._space_r)
+        return _RingReader(self._map, self.size, self._space_w, self._data_r)
+
+
+class _RingEnd(object):
+
+    def __init__(self, ring_map, size, wake_fd, wait_fd):
+        self._map = ring_map
+        self._size = size
+        self._wake_fd = wake_fd
+        self._wait_fd = wait_fd
+        self.closed = False
+
+    def _load(self, offset):
+        return _COUNTER.unpack_from(self._map, offset)[0]
+
+    def _store(self, offset, value):
+        _COUNTER.pack_into(self._map, offset, value)
+
+    def _set_flag(self, offset, value):
+        _FLAG.pack_into(self._map, offset, value)
+
+    def _wake(self, flag):
+        """Wake the other side if it is waiting on us."""
+        if _FLAG.unpack_from(self._map, flag)[0]:
+            self._set_flag(flag, 0)
+            try:
+                os.write(self._wake_fd, b'x')
+            except OSError as error:
+                if error.errno != errno.EPIPE:
+                    raise
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        os.close(self._wake_fd)
+        os.close(self._wait_fd)
+        self._map.close()
+
+
+class _RingWriter(_RingEnd):
+    """The file-like writing end of a SharedRing."""
+
+    def read(self, size=-1):
+        raise io.UnsupportedOperation('ring writer is not readable')
+
+    def write(self, data):
+        view = memoryview(data).tobytes()
+        length = len(view)
+        size = self._size
+        head = self._load(_HEAD)
+        pos = 0
+        while pos < length:
+            free = size - (head - self._load(_TAIL))
+            if not free:
+                self._wait_for_space(head)
+                continue
+            count = min(free, length - pos)
+            offset = head % size
+            first = min(count, size - offset)
+            start = _HEADER_SIZE + offset
+            self._map[start:start + first] = view[pos:pos + first]
+            if count > first:
+                self._map[_HEADER_SIZE:_HEADER_SIZE + count - first] = (
+                    view[pos + first:pos + count])
+            head += count
+            pos += count
+            self._store(_HEAD, head)
+            self._wake(_READER_WAITING)
+        return length
+
+    def _wait_for_space(self, head):
+        self._set_flag(_WRITER_WAITING, 1)
+        if head - self._load(_TAIL) == self._size:
+            if not _wait(self._wait_fd, POLL_INTERVAL):
+                raise IOError(errno.EPIPE, 'ring reader has gone away')
+        self._set_flag(_WRITER_WAITING, 0)
+
+    def flush(self):
+        pass
+
+
+class _RingReader(_RingEnd):
+    """The file-like reading end of a SharedRing.
+
+    Reads block until data is available or the writer has exited.
+    """
+
+    def __init__(self, ring_map, size, wake_fd, wait_fd):
+        super(_RingReader, self).__init__(ring_map, size, wake_fd, wait_fd)
+        self._buffer = bytearray()
+        self._eof = False
+
+    def _fill(self):
+        """Move everything written so far into the buffer.
+
+        :return: False if the writer has exited and nothing was left.
+        """
+        size = self._size
+        tail = self._load(_TAIL)
+        while True:
+            head = self._load(_HEAD)
+            if head != tail:
+                break
+            if self._eof:
+                return False
+            self._set_flag(_READER_WAITING, 1)
+            if self._load(_HEAD) == tail:
+                if not _wait(self._wait_fd, POLL_INTERVAL):
+                    self._eof = True
+            self._set_flag(_READER_WAITING, 0)
+        count = head - tail
+        offset = tail % size
+        first = min(count, size - offset)
+        start = _HEADER_SIZE + offset
+        self._buffer.extend(self._map[start:start + first])
+        if count > first:
+            self._buffer.extend(
+                self._map[_HEADER_SIZE:_HEADER_SIZE + count - first])
+        self._store(_TAIL, head)
+        self._wake(_WRITER_WAITING)
+        return True
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            if not self._fill():
+                break
+        if size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def readline(self):
+        start = 0
+        while True:
+            end = self._buffer.find(b'\n', start)
+            if end != -1:
+                return self.read(end + 1)
+            start = len(self._buffer)
+            if not self._fill():
+                return self.read()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+    next = __next__
@@ -18,16 +18,70 @@
 """Run a unittest testcase reporting results as Subunit.
 
   $ python -m subunit.run mylib.tests.test_suite
+
+With ``--parallel N`` the tests are split between N forked worker processes
+and their streams merged, with each worker's route codes prefixed by its
+number. ``--schedule-from PREVIOUS`` uses the test durations in an earlier
+v2 stream to balance the workers.
+
+With ``--shard INDEX/COUNT`` only the tests in that shard of the suite are
+listed and run, so that machines running different shards produce streams
+which can be concatenated.
+
+``--failing-from PREVIOUS`` runs only the tests that failed in an earlier v2
+stream, or with ``--failed-first`` runs them before the other tests.
+
+``--discovery-cache FILE`` caches the loaded test ids, so that ``--list``
+need not import the tests at all and ``--load-list`` imports only the
+modules of the listed tests, until a test module changes.
+
+``--resource-usage`` attaches the CPU time, peak memory growth and context
+switches of each test to its outcome; see
+``subunit.test_results.ResourceUsageMeasurement``.
+
+``--profile-tests`` runs each test under cProfile and attaches its pstats
+data; ``--profile-filter GLOB`` (which can be repeated) profiles only the
+tests whose ids match. ``subunit-profile`` merges the attached profiles.
+
+``--trace-allocations`` traces each test's allocations with tracemalloc,
+attaching the bytes it kept and where they were allocated; see
+``subunit.memory``. ``subunit-allocations`` ranks the tests by them.
+
+``--test-timeout SECONDS`` fails tests that run for longer, attaching the
+stacks of all threads; a test that cannot be interrupted ends the run with
+a complete stream. See ``subunit.timeout``.
 """
 
+import argparse
+
 import io
 import os
+import socket
 import sys
+import traceback
+import unittest
 
-from testtools import ExtendedToStreamDecorator
+from testtools import ExtendedToStreamDecorator, iterate_tests, PlaceHolder
+from testtools.testsuite import filter_by_ids
 
 from subunit import StreamResultToBytes
-from subunit.test_results import AutoTimingTestResultDecorator
+from subunit.collector import Collector
+from subunit.discovery import DiscoveryCache
+from subunit.memory import AllocationMeasurement
+from subunit.profiling import ProfilingMeasurement
+from subunit.schedule import (
+    load_durations,
+    load_failing,
+    partition_ids,
+    SHARD_STRATEGIES,
+    shard_ids,
+    )
+from subunit.test_results import (
+    AutoTimingTestResultDecorator,
+    DetailsAddingDecorator,
+    ResourceUsageMeasurement,
+    )
+from subunit.timeout import TimeoutMeasurement
 from testtools.run import (
     BUFFEROUTPUT,
     CATCHBREAK,
@@ -38,17 +92,70 @@ from testtools.run import (
     )
 
 
+def parse_shard(value):
+    """Parse an INDEX/COUNT shard argument into an (index, count) tuple."""
+    try:
+        index, count = [int(part) for part in value.split('/')]
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            'Shard %r is not of the form INDEX/COUNT.' % (value,))
+    if not 0 <= index < count:
+        raise argparse.ArgumentTypeError(
+            'Shard index %d is not in 0..%d.' % (index, count - 1))
+    return index, count
+
+
+def _flush_streams():
+    """Flush sys.stdout, the original stdout and sys.stderr."""
+    for stream in (sys.stdout, sys.__stdout__, sys.stderr):
+        try:
+            stream.flush()
+        except (AttributeError, ValueError, EnvironmentError):
+            # Replaced by something unflushable, or closed.
+            pass
+
+
+
 class SubunitTestRunner(object):
     def __init__(self, verbosity=None, failfast=None, buffer=None, stream=None,
-        stdout=None, tb_locals=False):
+        stdout=None, tb_locals=False, parallel=None, schedule_from=None,
+        shard=None, shard_by='hash', failing_from=None, failed_first=False,
+        resource_usage=False, profile_tests=False, profile_filter=None,
+        trace_allocations=False, test_timeout=None):
         """Create a TestToolsTestRunner.
 
         :param verbosity: Ignored.
-        :param failfast: Stop running tests at the first failure.
+        :param failfast: Stop running tests at the first failure (in each
+            worker, when running in parallel).
         :param buffer: Ignored.
         :param stream: Upstream unittest stream parameter.
         :param stdout: Testtools stream parameter.
         :param tb_locals: Testtools traceback in locals parameter.
+        :param parallel: The number of worker processes to run the tests
+            in. None or 1 runs them in this process.
+        :param schedule_from: The path of a v2 stream from an earlier run,
+            whose test durations are used to split the tests between the
+            workers (and shards, with shard_by 'duration'); see
+            ``subunit.schedule.partition_ids``.
+        :param shard: None to run every test, or an (index, count) tuple to
+            list and run only shard index of count.
+        :param shard_by: How to split the tests into shards; see
+            ``subunit.schedule.shard_ids``.
+        :param failing_from: The path of a v2 stream from an earlier run,
+            to run only the tests that failed in it.
+        :param failed_first: Run every test, but those that failed in
+            failing_from first.
+        :param resource_usage: Attach the resources each test used to its
+            outcome, as a 'resource-usage' attachment.
+        :param profile_tests: Run the tests under cProfile, attaching each
+            test's profile to its outcome.
+        :param profile_filter: A list of fnmatch globs of the ids of the
+            tests to profile; implies profile_tests.
+        :param trace_allocations: Attach the memory each test allocated and
+            kept to its outcome, as an 'allocations' attachment.
+        :param test_timeout: None, or the seconds after which a test is
+            failed, with the stacks of all threads attached; see
+            ``subunit.timeout.TimeoutDecorator``.
 
         Either stream or stdout can be supplied, and stream will take
         precedence.
@@ -56,12 +163,44 @@ class SubunitTestRunner(object):
         self.failfast = failfast
         self.stream = stream or stdout or sys.stdout
         self.tb_locals = tb_locals
+        self.parallel = parallel
+        self.schedule_from = schedule_from
+        self.shard = shard
+        self.shard_by = shard_by
+        self.failing_from = failing_from
+        self.failed_first = failed_first
+        self.resource_usage = resource_usage
+        self.profile_tests = profile_tests
+        self.profile_filter = profile_filter
+        self.trace_allocations = trace_allocations
+        self.test_timeout = test_timeout
 
     def run(self, test):
         "Run the given test case or test suite."
+        test = self._select(test)
         result, _ = self._list(test)
+        if (self.parallel is not None and self.parallel > 1 and
+            getattr(os, 'fork', None) is not None):
+            return self._run_parallel(test, result)
+        return self._run(test, result)
+
+    def _run(self, test, result):
         result = ExtendedToStreamDecorator(result)
         result = AutoTimingTestResultDecorator(result)
+        # Stopped in reverse order: the alarm first, then the profile, so
+        # that neither covers the others' work, and allocations last, after
+        # the resources used are sampled.
+        measurements = []
+        if self.trace_allocations:
+            measurements.append(AllocationMeasurement())
+        if self.resource_usage:
+            measurements.append(ResourceUsageMeasurement())
+        if self.profile_tests or self.profile_filter:
+            measurements.append(ProfilingMeasurement(self.profile_filter))
+        if self.test_timeout is not None:
+            measurements.append(TimeoutMeasurement(self.test_timeout))
+        if measurements:
+            result = DetailsAddingDecorator(result, measurements)
         if self.failfast is not None:
             result.failfast = self.failfast
             result.tb_locals = self.tb_locals
@@ -72,8 +211,85 @@ class SubunitTestRunner(object):
             result.stopTestRun()
         return result
 
+    def _run_parallel(self, test, result):
+        """Run test in forked workers, merging their streams into result's.
+
+        The workers are forked once the tests are loaded, so they share the
+        imports. Each worker reports over a socket on its stdout, so output
+        from its tests is merged as well.
+        """
+        test_ids, _ = list_test(test)
+        partitions = [ids for ids in
+            partition_ids(test_ids, self.parallel, self._durations()) if ids]
+        pairs = [socket.socketpair() for _ in partitions]
+        # Do not let the workers inherit, and so repeat, pending output.
+        _flush_streams()
+        pids = []
+        for index, ids in enumerate(partitions):
+            pid = os.fork()
+            if pid == 0:
+                code = 1
+                try:
+                    for parent_end, child_end in pairs:
+                        parent_end.close()
+                        if child_end is not pairs[index][1]:
+                            child_end.close()
+                    os.dup2(pairs[index][1].fileno(), 1)
+                    stream = os.fdopen(1, 'wb', 0)
+                    self._run(filter_by_ids(test, set(ids)),
+                        StreamResultToBytes(stream))
+                    code = 0
+                except BaseException:
+                    traceback.print_exc()
+                finally:
+                    # os._exit skips interpreter cleanup, so flush what the
+                    # tests printed to the (possibly buffered) text streams.
+                    _flush_streams()
+                    os._exit(code)
+            pids.append(pid)
+        collector = Collector(result.output_stream)
+        try:
+            for parent_end, child_end in pairs:
+                child_end.close()
+                collector.add_connection(parent_end)
+            collector.run(max_connections=len(pairs))
+        finally:
+            collector.close()
+            for pid in pids:
+                os.waitpid(pid, 0)
+        return result
+
+    def _durations(self):
+        if self.schedule_from is None:
+            return None
+        with open(self.schedule_from, 'rb') as source:
+            return load_durations(source)
+
+    def _select(self, test):
+        """Return the tests to run from test, in the order to run them."""
+        if self.failing_from is not None:
+            with open(self.failing_from, 'rb') as source:
+                failing = load_failing(source)
+            if self.failed_first:
+                tests = list(iterate_tests(test))
+                test = unittest.TestSuite(
+                    [case for case in tests if case.id() in failing] +
+                    [case for case in tests if case.id() not in failing])
+            else:
+                test = filter_by_ids(test, failing)
+        if self.shard is None:
+            return test
+        test_ids, _ = list_test(test)
+        index, count = self.shard
+        durations = None
+        if self.shard_by == 'duration':
+            durations = self._durations()
+        return filter_by_ids(test, set(
+            shard_ids(test_ids, index, count, self.shard_by, durations)))
+
     def list(self, test, loader=None):
         "List the test."
+        test = self._select(test)
         result, errors = self._list(test)
         if loader is not None:
             # We were called with the updated API by testtools.run, so look for
@@ -96,15 +312,206 @@ class SubunitTestRunner(object):
         else:
             stream = self.stream
         result = StreamResultToBytes(stream)
-        for test_id in test_ids:
-            result.status(test_id=test_id, test_status='exists')
+        result.write_exists(test_ids)
         return result, errors
 
 
+class _CachingLoader(object):
+    """Wrap a TestLoader to load tests through a DiscoveryCache.
+
+    The cache is only used when the program was given --discovery-cache and
+    is listing the tests or running those in a --load-list file.
+    """
+
+    def __init__(self, program, loader):
+        self.__dict__['_program'] = program
+        self.__dict__['_loader'] = loader
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._loader, name, value)
+
+    def discover(self, start_dir, pattern='test*.py', top_level_dir=None):
+        top = os.path.abspath(top_level_dir or start_dir)
+        key = {'discover': [os.path.abspath(start_dir), pattern, top]}
+        return self._load(key,
+            lambda: self._loader.discover(start_dir, pattern, top_level_dir),
+            watch_directories=[start_dir], path=top)
+
+    def loadTestsFromNames(self, names, module=None):
+        full_names = list(names)
+        if module is not None:
+            full_names = [module.__name__ + '.' + name for name in names]
+        watch_modules = set()
+        for name in full_names:
+            parts = name.split('.')
+            for length in range(1, len(parts) + 1):
+                watch_modules.add('.'.join(parts[:length]))
+        return self._load({'names': full_names},
+            lambda: self._loader.loadTestsFromNames(names, module),
+            watch_modules=watch_modules)
+
+    def loadTestsFromModule(self, module, *args, **kwargs):
+        return self._load({'names': [module.__name__]},
+            lambda: self._loader.loadTestsFromModule(module, *args, **kwargs),
+            watch_modules=[module.__name__])
+
+    def _load(self, key, load, watch_modules=(), watch_directories=(),
+        path=None):
+        program = self._program
+        if program.discovery_cache is None or not (
+            program.listtests or program.load_list):
+            return load()
+        key['patterns'] = list(
+            getattr(self._loader, 'testNamePatterns', None) or [])
+        key['cwd'] = os.getcwd()
+        cache = DiscoveryCache(program.discovery_cache)
+        cached = cache.load(key)
+        if cached is not None:
+            tests, errors = cached
+            if program.listtests:
+                self._loader.errors.extend(errors)
+                return unittest.TestSuite(
+                    [PlaceHolder(test_id) for test_id, _ in tests])
+            if not errors:
+                suite = self._load_listed(tests, path)
+                if suite is not None:
+                    return suite
+                # Package hooks such as load_tests or test_suite() build some
+                # tests, so only a full load finds them.
+                suite = load()
+                self._save(cache, key, suite, watch_modules=watch_modules,
+                    watch_directories=watch_directories, by_module=False)
+                return suite
+        suite = load()
+        self._save(cache, key, suite, watch_modules=watch_modules,
+            watch_directories=watch_directories)
+        return suite
+
+    def _save(self, cache, key, suite, **kwargs):
+        # A module that failed to import is reported by a test of
+        # unittest.loader and is missing from sys.modules, so its file
+        # would not be watched and fixing it would not invalidate the
+        # cache. Only save loads without import errors.
+        if not self._loader.errors:
+            cache.save(key, suite, [], **kwargs)
+
+    def _load_listed(self, tests, path):
+        """Load only the modules of the tests in the --load-list file.
+
+        :return: The loaded suite, or None if loading the modules did not
+            reproduce every listed test that was cached.
+        """
+        with open(self._program.load_list, 'rb') as source:
+            test_ids = set(line.strip().decode('utf-8') for line in source)
+        listed = [(test_id, module) for test_id, module in tests
+            if test_id in test_ids]
+        if any(module is None for _, module in listed):
+            return None
+        if path is not None and path not in sys.path:
+            # As discover() does, so the modules can be imported.
+            sys.path.insert(0, path)
+        suite = self._loader.loadTestsFromNames(
+            sorted(set(module for _, module in listed)))
+        loaded = set(test.id() for test in iterate_tests(suite))
+        if not loaded.issuperset(test_id for test_id, _ in listed):
+            return None
+        return suite
+
+
 class SubunitTestProgram(TestProgram):
 
     USAGE = USAGE_AS_MAIN
 
+    # The options passed on to SubunitTestRunner.
+    runner_options = ('parallel', 'schedule_from', 'shard', 'shard_by',
+        'failing_from', 'failed_first', 'resource_usage', 'profile_tests',
+        'profile_filter', 'trace_allocations', 'test_timeout')
+    parallel = None
+    schedule_from = None
+    shard = None
+    shard_by = 'hash'
+    failing_from = None
+    failed_first = False
+    discovery_cache = None
+    resource_usage = False
+    profile_tests = False
+    profile_filter = None
+    trace_allocations = False
+    test_timeout = None
+
+    def _getParentArgParser(self):
+        parser = super(SubunitTestProgram, self)._getParentArgParser()
+        parser.add_argument('--parallel', dest='parallel', type=int,
+            default=None, metavar='N',
+            help='Run the tests in N worker processes')
+        parser.add_argument('--schedule-from', dest='schedule_from',
+            default=None, metavar='PREVIOUS',
+            help='Balance --parallel workers using the test durations in '
+                'the v2 stream PREVIOUS')
+        parser.add_argument('--shard', dest='shard', type=parse_shard,
+            default=None, metavar='INDEX/COUNT',
+            help='Only list and run shard INDEX (from 0) of COUNT')
+        parser.add_argument('--shard-by', dest='shard_by',
+            choices=SHARD_STRATEGIES, default='hash',
+            help='Shard by a hash of the test id (the default), contiguous '
+                'ranges of tests, or durations from --schedule-from')
+        parser.add_argument('--failing-from', dest='failing_from',
+            default=None, metavar='PREVIOUS',
+            help='Only run the tests that failed in the v2 stream PREVIOUS')
+        parser.add_argument('--failed-first', dest='failed_first',
+            default=False, action='store_true',
+            help='With --failing-from, run all tests but the failed ones '
+                'first')
+        parser.add_argument('--discovery-cache', dest='discovery_cache',
+            default=None, metavar='FILE',
+            help='Cache the loaded test ids in FILE to speed up --list and '
+                '--load-list')
+        parser.add_argument('--resource-usage', dest='resource_usage',
+            default=False, action='store_true',
+            help='Attach the CPU time, memory growth and context switches '
+                'of each test to its outcome')
+        parser.add_argument('--profile-tests', dest='profile_tests',
+            default=False, action='store_true',
+            help='Attach a cProfile profile of each test to its outcome')
+        parser.add_argument('--profile-filter', dest='profile_filter',
+            action='append', default=None, metavar='GLOB',
+            help='Only profile the tests whose ids match GLOB (implies '
+                '--profile-tests)')
+        parser.add_argument('--trace-allocations', dest='trace_allocations',
+            default=False, action='store_true',
+            help='Attach the memory each test allocated and kept, and where '
+                'it was allocated, to its outcome')
+        parser.add_argument('--test-timeout', dest='test_timeout',
+            type=float, default=None, metavar='SECONDS',
+            help='Fail tests that run for longer than SECONDS, attaching the '
+                'stacks of all threads')
+        return parser
+
+    def parseArgs(self, argv):
+        # Loading happens during parsing, once the options are known.
+        loader = self.testLoader
+        self.testLoader = _CachingLoader(self, loader)
+        try:
+            super(SubunitTestProgram, self).parseArgs(argv)
+        finally:
+            self.testLoader = loader
+        if self.failed_first and self.failing_from is None:
+            self.usageExit('--failed-first requires --failing-from')
+        if self.shard_by == 'duration' and self.schedule_from is None:
+            self.usageExit('--shard-by duration requires --schedule-from')
+
+    def _get_runner(self):
+        if (isinstance(self.testRunner, type) and
+            issubclass(self.testRunner, SubunitTestRunner)):
+            options = dict((name, getattr(self, name))
+                for name in self.runner_options)
+            return self.testRunner(failfast=self.failfast,
+                stdout=self.stdout, tb_locals=self.tb_locals, **options)
+        return super(SubunitTestProgram, self)._get_runner()
+
     def usageExit(self, msg=None):
         if msg:
             print (msg)
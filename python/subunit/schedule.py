@@ -0,0 +1,174 @@
+#
+#  subunit: extensions to Python unittest to get test results from subprocesses.
+#  Copyright (C) 2026 Subunit Contributors
+#
+#  Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+#  license at the users choice. A copy of both licenses are available in the
+#  project source as Apache-2.0 and BSD. You may not use this file except in
+#  compliance with one of these two licences.
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+#  license you chose for the specific language governing permissions and
+#  limitations under that license.
+#
+
+"""Choose and split tests to run, using previous runs.
+
+Tests can be split between workers or machines using the durations of a
+previous run, so that each part takes about as long to run, and the tests
+that failed in a previous run can be found to rerun them::
+
+  durations = load_durations(open('previous.subunit', 'rb'))
+  partitions = partition_ids(test_ids, 4, durations)
+  mine = shard_ids(test_ids, 0, 4, 'duration', durations)
+  failing = load_failing(open('previous.subunit', 'rb'))
+"""
+
+import heapq
+import zlib
+
+from subunit.columnar import MISSING, RunTable
+from subunit.v2 import iter_packets, packet_status, packet_test_id, SIGNATURE
+
+__all__ = [
+    'estimate_durations',
+    'load_durations',
+    'load_failing',
+    'partition_ids',
+    'shard_ids',
+    'SHARD_STRATEGIES',
+    ]
+
+
+SHARD_STRATEGIES = ('hash', 'range', 'duration')
+
+
+def load_durations(source):
+    """Read the duration of each test from the v2 stream source.
+
+    :return: A dict of test id to its duration in seconds, from its last
+        timed execution in the stream.
+    """
+    table = RunTable.from_stream(source)
+    durations = {}
+    for test_index, duration in zip(table.test_index, table.durations()):
+        if duration != MISSING:
+            durations[table.ids[test_index]] = duration / 1e9
+    return durations
+
+
+def load_failing(source):
+    """Return the set of ids of the tests that failed in the stream source.
+
+    A test failed if its last final status was 'fail' or 'uxsuccess'. Only
+    the packet headers and test ids are decoded, so attachments cost
+    nothing to skip. A truncated or corrupt packet, as a crashed run leaves,
+    is skipped.
+    """
+    failed = {}
+    for packet in iter_packets(source, errors='ignore'):
+        if packet[:1] != SIGNATURE:
+            continue
+        status = packet_status(packet)
+        if status in ('fail', 'uxsuccess'):
+            failing = True
+        elif status in ('success', 'skip', 'xfail'):
+            failing = False
+        else:
+            continue
+        test_id = packet_test_id(packet)
+        if test_id is not None:
+            failed[test_id] = failing
+    return set(test_id for test_id, failing in failed.items() if failing)
+
+
+def estimate_durations(test_ids, durations):
+    """Return the expected duration of each of test_ids.
+
+    Tests in durations get their recorded duration. Other tests get the
+    mean duration of the known tests that share the longest dotted prefix
+    with them (their class, else their module, and so on), or of all known
+    tests when none do.
+
+    :return: A list of durations, one per test id.
+    """
+    # Dotted prefix -> [total, count] of the known tests under it.
+    totals = {}
+    for test_id, duration in durations.items():
+        parts = test_id.split('.')
+        for length in range(len(parts)):
+            total = totals.setdefault('.'.join(parts[:length]), [0.0, 0])
+            total[0] += duration
+            total[1] += 1
+    default = totals.get('', [1.0, 1])
+    estimates = []
+    for test_id in test_ids:
+        if test_id in durations:
+            estimates.append(durations[test_id])
+            continue
+        parts = test_id.split('.')
+        for length in range(len(parts) - 1, -1, -1):
+            total = totals.get('.'.join(parts[:length]))
+            if total is not None:
+                break
+        else:
+            total = default
+        estimates.append(total[0] / total[1])
+    return estimates
+
+
+def partition_ids(test_ids, count, durations=None):
+    """Split test_ids into count lists.
+
+    Without durations the tests are dealt out in turn. With durations (a
+    dict of test id to seconds, see ``load_durations``) they are packed
+    longest first, each onto the partition with the least total estimated
+    duration so far, so the partitions should finish at about the same
+    time. Each partition keeps the tests in their original order.
+    """
+    partitions = [[] for _ in range(count)]
+    if durations is None:
+        for index, test_id in enumerate(test_ids):
+            partitions[index % count].append(test_id)
+        return partitions
+    estimates = estimate_durations(test_ids, durations)
+    order = sorted(range(len(test_ids)), key=lambda index: -estimates[index])
+    loads = [(0.0, partition) for partition in range(count)]
+    assigned = [[] for _ in range(count)]
+    for index in order:
+        load, partition = heapq.heappop(loads)
+        assigned[partition].append(index)
+        heapq.heappush(loads, (load + estimates[index], partition))
+    for partition, indices in enumerate(assigned):
+        partitions[partition] = [test_ids[index] for index in sorted(indices)]
+    return partitions
+
+
+def shard_ids(test_ids, index, count, strategy='hash', durations=None):
+    """Return the test ids in shard index of count, in their given order.
+
+    Every machine that runs the same tests with the same arguments gets the
+    same shards, and each test is in exactly one of them.
+
+    :param strategy: 'hash' to shard by a stable hash (CRC32) of the test
+        id, so a test stays in its shard as other tests come and go;
+        'range' to give each shard a contiguous run of the test ids; or
+        'duration' to balance the shards using durations, as
+        ``partition_ids`` does.
+    :param durations: For 'duration', a dict of test id to seconds, such as
+        from ``load_durations``.
+    """
+    if not 0 <= index < count:
+        raise ValueError('Shard %d is not in 0..%d.' % (index, count - 1))
+    if strategy == 'hash':
+        # Mask as crc32 is signed on Python 2.
+        return [test_id for test_id in test_ids if
+            (zlib.crc32(test_id.encode('utf8')) & 0xffffffff) % count == index]
+    elif strategy == 'range':
+        return list(test_ids[len(test_ids) * index // count:
+            len(test_ids) * (index + 1) // count])
+    elif strategy == 'duration':
+        return partition_ids(test_ids, count, durations or {})[index]
+    raise ValueError('Unknown shard strategy %r.' % (strategy,))
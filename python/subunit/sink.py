@@ -0,0 +1,278 @@
+#
+#  subunit: extensions to Python unittest to get test results from subprocesses.
+#  Copyright (C) 2026 Subunit Contributors
+#
+#  Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+#  license at the users choice. A copy of both licenses are available in the
+#  project source as Apache-2.0 and BSD. You may not use this file except in
+#  compliance with one of these two licences.
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+#  license you chose for the specific language governing permissions and
+#  limitations under that license.
+#
+
+"""Send a subunit stream to a remote collector without blocking the tests.
+
+``SocketSink`` is a file-like object for ``StreamResultToBytes`` which
+hands the packets written to it to a sender thread. The thread sends them
+in large batches over TCP or a Unix socket (for instance to
+``subunit-collector``) and reconnects when the connection fails::
+
+  sink = SocketSink(('collector.example.com', 7000))
+  result = StreamResultToBytes(sink)
+  ...
+  sink.close()
+"""
+
+from collections import deque
+import io
+import socket
+import struct
+import tempfile
+import threading
+import time
+
+__all__ = [
+    'SocketSink',
+    ]
+
+# Each write is spooled as a record: its length, then the bytes written.
+_RECORD_HEADER = struct.Struct('>I')
+
+
+class SocketSink(object):
+    """A file-like object sending what is written to it to a socket.
+
+    Writes never wait for the network. Packets are buffered in memory up to
+    max_memory bytes and beyond that (or while earlier packets are still
+    spooled) in a temporary spool file of up to max_spool bytes; packets
+    that would exceed that are dropped and counted in ``dropped``.
+
+    A sender thread sends batches of up to batch_size bytes, whenever that
+    much is buffered or flush_interval seconds have passed. When sending
+    fails it reconnects, backing off from reconnect_delay up to
+    max_reconnect_delay seconds, and resends the failed batch on the new
+    connection, so packets may be delivered twice but are only lost if
+    dropped or still buffered when ``close`` gives up. Batches are only cut
+    between writes, so each connection starts on a packet boundary as long
+    as each write is a whole packet, as it is from ``StreamResultToBytes``.
+
+    :ivar dropped: The number of writes discarded because the spool was
+        full.
+    :ivar connections: The number of connections made.
+    """
+
+    def __init__(self, address, batch_size=65536, flush_interval=0.05,
+        max_memory=1024 * 1024, max_spool=64 * 1024 * 1024,
+        reconnect_delay=0.1, max_reconnect_delay=5.0, timeout=30.0):
+        """Create a SocketSink.
+
+        :param address: A (host, port) tuple for TCP, or the path of a Unix
+            socket.
+        :param timeout: The socket timeout for connecting and sending.
+        """
+        self.address = address
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_memory = max_memory
+        self.max_spool = max_spool
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.timeout = timeout
+        self.dropped = 0
+        self.connections = 0
+        self._lock = threading.Condition()
+        self._pending = deque()
+        self._pending_bytes = 0
+        self._spool = None
+        self._spool_read = 0
+        self._spool_write = 0
+        self._spool_bytes = 0
+        self._closing = False
+        self._deadline = None
+        self._socket = None
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    @property
+    def buffered(self):
+        """The number of bytes waiting to be sent."""
+        with self._lock:
+            return self._pending_bytes + self._spool_bytes
+
+    @property
+    def spooled(self):
+        """The number of bytes waiting in the spool file."""
+        with self._lock:
+            return self._spool_bytes
+
+    def read(self, size=-1):
+        raise io.UnsupportedOperation('SocketSink is not readable')
+
+    def write(self, data):
+        data = bytes(data)
+        with self._lock:
+            if self._closing:
+                raise ValueError('write to closed SocketSink')
+            if not data:
+                # make_stream_binary probes its stream with an empty write.
+                return 0
+            if (self._spool_write == self._spool_read and
+                self._pending_bytes + len(data) <= self.max_memory):
+                self._pending.append(data)
+                self._pending_bytes += len(data)
+                # Wake the sender to start timing a batch, or to send one.
+                if (self._pending_bytes == len(data) or
+                    self._pending_bytes >= self.batch_size):
+                    self._lock.notify()
+            elif self._spool_bytes + len(data) <= self.max_spool:
+                if self._spool is None:
+                    self._spool = tempfile.TemporaryFile()
+                self._spool.seek(self._spool_write)
+                self._spool.write(_RECORD_HEADER.pack(len(data)))
+                self._spool.write(data)
+                self._spool_write += _RECORD_HEADER.size + len(data)
+                self._spool_bytes += len(data)
+            else:
+                self.dropped += 1
+        return len(data)
+
+    def flush(self):
+        # StreamResultToBytes flushes after every packet; batching is up to
+        # the sender thread.
+        pass
+
+    def close(self, timeout=10.0):
+        """Send everything buffered and close the connection.
+
+        :param timeout: How many seconds to keep trying to send the
+            buffered packets.
+        :return: True if everything written was sent.
+        """
+        with self._lock:
+            self._closing = True
+            self._deadline = time.time() + timeout
+            self._lock.notify()
+        self._thread.join()
+        if self._spool is not None:
+            self._spool.close()
+        return not (self._pending_bytes or self._spool_bytes)
+
+    def _connect(self):
+        if isinstance(self.address, tuple):
+            sock = socket.create_connection(self.address, self.timeout)
+        else:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.address)
+            except Exception:
+                sock.close()
+                raise
+        self.connections += 1
+        return sock
+
+    def _next_batch(self):
+        """Return the oldest buffered writes, about batch_size bytes of them.
+
+        Writes held in memory are taken out of the buffer, and put back by
+        the caller if sending them fails. Spooled writes stay in the spool
+        until ``_spool_sent`` is called with the returned spool offset.
+
+        :return: A (batch, spool_end) tuple. spool_end is None when the
+            batch came from memory.
+        """
+        batch = []
+        size = 0
+        if self._pending:
+            while self._pending and size < self.batch_size:
+                data = self._pending.popleft()
+                batch.append(data)
+                size += len(data)
+            self._pending_bytes -= size
+            return b''.join(batch), None
+        offset = self._spool_read
+        self._spool.seek(offset)
+        while offset < self._spool_write and size < self.batch_size:
+            length, = _RECORD_HEADER.unpack(
+                self._spool.read(_RECORD_HEADER.size))
+            batch.append(self._spool.read(length))
+            size += length
+            offset += _RECORD_HEADER.size + length
+        return b''.join(batch), offset
+
+    def _spool_sent(self, spool_end, size):
+        """Drop the spooled records up to spool_end once they are sent."""
+        self._spool_read = spool_end
+        self._spool_bytes -= size
+        if self._spool_read == self._spool_write:
+            self._spool.seek(0)
+            self._spool.truncate()
+            self._spool_read = self._spool_write = 0
+
+    def _wait_for_batch(self):
+        """Wait until a batch is due; return _next_batch(), or None."""
+        with self._lock:
+            first_seen = None
+            while True:
+                buffered = self._pending_bytes + self._spool_bytes
+                if not buffered:
+                    if self._closing:
+                        return None
+                    self._lock.wait()
+                    continue
+                now = time.time()
+                if first_seen is None:
+                    first_seen = now
+                waited = now - first_seen
+                if (buffered >= self.batch_size or self._closing or
+                    waited >= self.flush_interval):
+                    return self._next_batch()
+                self._lock.wait(self.flush_interval - waited)
+
+    def _send(self, batch):
+        """Send batch, reconnecting as needed. Return False to give up."""
+        delay = self.reconnect_delay
+        while True:
+            try:
+                if self._socket is None:
+                    self._socket = self._connect()
+                self._socket.sendall(batch)
+                return True
+            except (socket.error, socket.timeout, OSError):
+                if self._socket is not None:
+                    self._socket.close()
+                    self._socket = None
+            with self._lock:
+                if self._closing and time.time() >= self._deadline:
+                    return False
+                self._lock.wait(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def _run(self):
+        try:
+            while True:
+                next_batch = self._wait_for_batch()
+                if next_batch is None:
+                    return
+                batch, spool_end = next_batch
+                sent = self._send(batch)
+                with self._lock:
+                    if spool_end is not None:
+                        if sent:
+                            self._spool_sent(spool_end, len(batch))
+                    elif not sent:
+                        # Put the batch back so close() reports it as
+                        # unsent.
+                        self._pending.appendleft(batch)
+                        self._pending_bytes += len(batch)
+                if not sent:
+                    return
+        finally:
+            if self._socket is not None:
+                self._socket.close()
+                self._socket = None
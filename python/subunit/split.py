@@ -0,0 +1,188 @@
+#
+#  subunit: extensions to Python unittest to get test results from subprocesses.
+#  Copyright (C) 2026 Subunit Contributors
+#
+#  Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+#  license at the users choice. A copy of both licenses are available in the
+#  project source as Apache-2.0 and BSD. You may not use this file except in
+#  compliance with one of these two licences.
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+#  license you chose for the specific language governing permissions and
+#  limitations under that license.
+#
+
+"""Split a subunit v2 stream into several streams in one pass.
+
+Packets are read raw (see ``subunit.v2.iter_packets``) and a shard key
+function picks the output for each one. Each output is written by its own
+thread from a bounded queue of buffered chunks, so slow outputs overlap
+with reading the input::
+
+  split_stream(source, route_code_key, lambda key: open(name(key), 'wb'))
+"""
+
+import sys
+import threading
+
+from extras import try_imports
+
+from subunit.stats import FINAL_STATUSES
+from subunit.test_results import test_id_prefix
+from subunit.v2 import (
+    iter_packets,
+    packet_route_code,
+    packet_status,
+    packet_test_id,
+    SIGNATURE,
+    )
+
+queue = try_imports(['queue', 'Queue'])
+
+__all__ = [
+    'route_code_key',
+    'SizeShardKey',
+    'split_stream',
+    'TestIdPrefixKey',
+    ]
+
+
+def route_code_key(packet):
+    """Shard packets by their route code."""
+    return packet_route_code(packet)
+
+
+class TestIdPrefixKey(object):
+    """Shard packets by the class or module of their test id."""
+
+    def __init__(self, group_by):
+        self.group_by = group_by
+
+    def __call__(self, packet):
+        test_id = packet_test_id(packet)
+        if test_id is None:
+            return None
+        return test_id_prefix(test_id, self.group_by)
+
+
+class SizeShardKey(object):
+    """Shard packets into numbered shards of about max_bytes each.
+
+    All the packets for a test go to the shard that was current when its
+    first packet was seen, so shards can be analysed independently; a new
+    shard is started once the current one has max_bytes in it.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.shard = 0
+        self.size = 0
+        # test id -> shard, for tests that have not finished yet.
+        self._active = {}
+
+    def __call__(self, packet):
+        test_id = packet_test_id(packet)
+        if test_id is None:
+            shard = self._current(packet)
+        else:
+            shard = self._active.get(test_id)
+            if shard is None:
+                shard = self._active[test_id] = self._current(packet)
+            if packet_status(packet) in FINAL_STATUSES:
+                del self._active[test_id]
+        return shard
+
+    def _current(self, packet):
+        if self.size >= self.max_bytes:
+            self.shard += 1
+            self.size = 0
+        self.size += len(packet)
+        return self.shard
+
+
+class _ShardWriter(object):
+    """Write to an output from a thread, in buffered chunks."""
+
+    def __init__(self, output, buffer_size, queue_size):
+        self.output = output
+        self.buffer_size = buffer_size
+        self._buffer = []
+        self._buffered = 0
+        self._queue = queue.Queue(queue_size)
+        self._error = None
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                return
+            if self._error is not None:
+                continue
+            try:
+                self.output.write(chunk)
+            except Exception:
+                self._error = sys.exc_info()
+
+    def _check(self):
+        if self._error is not None:
+            raise self._error[1]
+
+    def write(self, data):
+        self._buffer.append(data)
+        self._buffered += len(data)
+        if self._buffered >= self.buffer_size:
+            self._check()
+            self._queue.put(b''.join(self._buffer))
+            self._buffer = []
+            self._buffered = 0
+
+    def close(self):
+        if self._buffer:
+            self._queue.put(b''.join(self._buffer))
+            self._buffer = []
+        self._queue.put(None)
+        self._thread.join()
+        self.output.close()
+        self._check()
+
+
+def split_stream(source, shard_key, open_shard, buffer_size=65536,
+    queue_size=16, errors='report'):
+    """Split the v2 stream read from source into several outputs.
+
+    :param shard_key: A callable given each raw packet which returns the
+        key of the shard to write it to. Non-subunit content goes to the
+        same shard as the packet before it (or the None shard at the start).
+    :param open_shard: A callable given a shard key which returns a binary
+        file-like object to write that shard to. It is closed when the
+        input is exhausted.
+    :param buffer_size: How many bytes to buffer for a shard before handing
+        them to its writer thread.
+    :param queue_size: How many buffers each writer thread may have queued.
+    :param errors: How to handle truncated or corrupt packets; see
+        ``subunit.v2.iter_packets``. By default each is replaced by a
+        failure of the test 'subunit.parser', as subunit-ls would show it.
+    :return: The keys of the shards written, in order of first use.
+    """
+    writers = {}
+    keys = []
+    key = None
+    try:
+        for packet in iter_packets(source, errors=errors):
+            if packet[:1] == SIGNATURE:
+                key = shard_key(packet)
+            writer = writers.get(key)
+            if writer is None:
+                writer = writers[key] = _ShardWriter(
+                    open_shard(key), buffer_size, queue_size)
+                keys.append(key)
+            writer.write(packet)
+    finally:
+        for key in keys:
+            writers[key].close()
+    return keys
@@ -0,0 +1,368 @@
+#
+#  subunit: extensions to Python unittest to get test results from subprocesses.
+#  Copyright (C) 2026 Subunit Contributors
+#
+#  Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+#  license at the users choice. A copy of both licenses are available in the
+#  project source as Apache-2.0 and BSD. You may not use this file except in
+#  compliance with one of these two licences.
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+#  license you chose for the specific language governing permissions and
+#  limitations under that license.
+#
+
+"""Streaming statistics over test runs.
+
+Everything in this module uses memory proportional to the number of tests
+running concurrently (and the size of the reports asked for), not to the
+number of tests in the run, so it can be used on arbitrarily large streams.
+"""
+
+import heapq
+import json
+import math
+import tempfile
+
+from testtools import StreamResult
+
+__all__ = [
+    'DurationSketch',
+    'ExternalSorter',
+    'StreamStats',
+    'TopN',
+    ]
+
+
+# The statuses that end a test.
+FINAL_STATUSES = frozenset(['success', 'fail', 'skip', 'xfail', 'uxsuccess'])
+
+
+def total_seconds(delta):
+    """Convert a timedelta to float seconds."""
+    return delta.days * 86400 + delta.seconds + delta.microseconds / 1000000.0
+
+
+class DurationSketch(object):
+    """A mergeable sketch of a distribution of durations.
+
+    Values are counted in logarithmically sized buckets, so any quantile can
+    be answered to within ``relative_accuracy`` of the true value. The number
+    of buckets depends only on the range of the values (about 1300 buckets
+    cover a microsecond to a day at 1% accuracy), not on how many were added.
+    Sketches built with the same accuracy can be merged, for instance to
+    combine statistics from several workers or runs.
+    """
+
+    def __init__(self, relative_accuracy=0.01, min_value=1e-6):
+        """Create a DurationSketch.
+
+        :param relative_accuracy: The relative error permitted in quantiles.
+        :param min_value: Values at or below this are counted as zero.
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError(
+                'relative_accuracy must be between 0 and 1, not %r' % (
+                    relative_accuracy,))
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        """Add value (in seconds) to the sketch."""
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        if value <= self.min_value:
+            self.zero_count += 1
+        else:
+            key = int(math.ceil(math.log(value) / self._log_gamma))
+            self.buckets[key] = self.buckets.get(key, 0) + 1
+
+    def merge(self, other):
+        """Add all the values counted by other to this sketch."""
+        if (other.relative_accuracy != self.relative_accuracy or
+            other.min_value != self.min_value):
+            raise ValueError('Cannot merge sketches with different accuracy.')
+        if not other.count:
+            return
+        self.count += other.count
+        self.total += other.total
+        self.zero_count += other.zero_count
+        if self.min is None or other.min < self.min:
+            self.min = other.min
+        if self.max is None or other.max > self.max:
+            self.max = other.max
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+
+    @property
+    def mean(self):
+        if not self.count:
+            return None
+        return self.total / self.count
+
+    def quantile(self, q):
+        """Estimate the q'th quantile (0 <= q <= 1), or None when empty."""
+        if not self.count:
+            return None
+        # Nearest rank: the smallest value with at least q of all values at
+        # or below it.
+        rank = max(0, int(math.ceil(q * self.count)) - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return self.min
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                # The midpoint of the bucket in relative terms.
+                value = 2 * self._gamma ** key / (self._gamma + 1)
+                return max(self.min, min(self.max, value))
+        return self.max
+
+    def as_dict(self):
+        """Summarise the sketch as a JSON compatible dict."""
+        return {
+            'count': self.count,
+            'total': self.total,
+            'min': self.min,
+            'max': self.max,
+            'mean': self.mean,
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99),
+            }
+
+
+class TopN(object):
+    """Keep the n items with the largest keys, using a bounded heap."""
+
+    def __init__(self, n):
+        self.n = n
+        self._heap = []
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, key, item):
+        if self.n <= 0:
+            return
+        entry = (key, item)
+        if len(self._heap) < self.n:
+            heapq.heappush(self._heap, entry)
+        elif entry > self._heap[0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def merge(self, other):
+        for key, item in other._heap:
+            self.push(key, item)
+
+    def items(self):
+        """Return the (key, item) pairs kept, largest key first."""
+        return sorted(self._heap, reverse=True)
+
+
+def _read_run(run):
+    run.seek(0)
+    for line in run:
+        yield tuple(json.loads(line.decode('utf8')))
+
+
+class ExternalSorter(object):
+    """Sort more (key, item) pairs than should be held in memory.
+
+    Pairs are buffered until there are buffer_size of them, at which point
+    they are sorted and written to a temporary file as a sorted run. The
+    sorted output is a merge of all the runs. Keys and items must be JSON
+    serialisable.
+    """
+
+    def __init__(self, buffer_size=100000):
+        self.buffer_size = buffer_size
+        self._buffer = []
+        self._runs = []
+
+    def add(self, key, item):
+        self._buffer.append((key, item))
+        if len(self._buffer) >= self.buffer_size:
+            self._spill()
+
+    def _spill(self):
+        self._buffer.sort()
+        run = tempfile.TemporaryFile()
+        for entry in self._buffer:
+            run.write(json.dumps(entry).encode('utf8') + b'\n')
+        self._runs.append(run)
+        self._buffer = []
+
+    def sorted(self):
+        """Return an iterator over all the pairs added, in sorted order."""
+        self._buffer.sort()
+        return heapq.merge(
+            iter(self._buffer), *[_read_run(run) for run in self._runs])
+
+    def close(self):
+        """Discard the pairs added, releasing any temporary files."""
+        for run in self._runs:
+            run.close()
+        self._runs = []
+        self._buffer = []
+
+
+class StreamStats(StreamResult):
+    """Aggregate statistics from the StreamResult events of a test run.
+
+    :ivar status_counts: A dict of test status to the number of events with
+        that status. 'exists' is counted as well as the final statuses.
+    :ivar durations: A DurationSketch of test durations in seconds. Only
+        tests with a timestamp on both their first and final events can be
+        timed.
+    :ivar slowest: A TopN of (duration, test_id).
+    :ivar routes: A dict of route code to [tests, busy_seconds]; tests run
+        without a route code are accounted under ''.
+    :ivar first_timestamp: The earliest timestamp seen.
+    :ivar last_timestamp: The latest timestamp seen.
+    """
+
+    def __init__(self, slowest=10):
+        """Create a StreamStats.
+
+        :param slowest: How many of the slowest tests to remember.
+        """
+        super(StreamStats, self).__init__()
+        self.status_counts = {}
+        self.durations = DurationSketch()
+        self.slowest = TopN(slowest)
+        self.routes = {}
+        self.first_timestamp = None
+        self.last_timestamp = None
+        # (test_id, route_code) -> timestamp of the first event for tests
+        # that have not finished yet.
+        self._active = {}
+
+    def status(self, test_id=None, test_status=None, test_tags=None,
+        runnable=True, file_name=None, file_bytes=None, eof=False,
+        mime_type=None, route_code=None, timestamp=None):
+        if timestamp is not None:
+            if (self.first_timestamp is None or
+                timestamp < self.first_timestamp):
+                self.first_timestamp = timestamp
+            if (self.last_timestamp is None or
+                timestamp > self.last_timestamp):
+                self.last_timestamp = timestamp
+        if test_id is None:
+            return
+        key = (test_id, route_code)
+        if test_status in FINAL_STATUSES:
+            self.status_counts[test_status] = (
+                self.status_counts.get(test_status, 0) + 1)
+            start = self._active.pop(key, None)
+            route = self.routes.setdefault(route_code or '', [0, 0.0])
+            route[0] += 1
+            if start is None or timestamp is None:
+                return
+            duration = total_seconds(timestamp - start)
+            self.durations.add(duration)
+            self.slowest.push(duration, test_id)
+            route[1] += duration
+        elif test_status == 'exists':
+            self.status_counts['exists'] = (
+                self.status_counts.get('exists', 0) + 1)
+        elif timestamp is not None and key not in self._active:
+            self._active[key] = timestamp
+
+    def merge(self, other):
+        """Add the statistics gathered by other StreamStats to this one."""
+        for status, count in other.status_counts.items():
+            self.status_counts[status] = (
+                self.status_counts.get(status, 0) + count)
+        self.durations.merge(other.durations)
+        self.slowest.merge(other.slowest)
+        for route_code, (tests, busy) in other.routes.items():
+            route = self.routes.setdefault(route_code, [0, 0.0])
+            route[0] += tests
+            route[1] += busy
+        if other.first_timestamp is not None:
+            if (self.first_timestamp is None or
+                other.first_timestamp < self.first_timestamp):
+                self.first_timestamp = other.first_timestamp
+            if (self.last_timestamp is None or
+                other.last_timestamp > self.last_timestamp):
+                self.last_timestamp = other.last_timestamp
+
+    @property
+    def total_tests(self):
+        """The number of tests that finished."""
+        return sum(count for status, count in self.status_counts.items()
+            if status in FINAL_STATUSES)
+
+    @property
+    def wall_clock(self):
+        """Seconds between the first and last timestamps, or None."""
+        if self.first_timestamp is None:
+            return None
+        return total_seconds(self.last_timestamp - self.first_timestamp)
+
+    def as_dict(self):
+        """Summarise the run as a JSON compatible dict."""
+        wall_clock = self.wall_clock
+        routes = {}
+        for route_code, (tests, busy) in self.routes.items():
+            if wall_clock:
+                utilisation = busy / wall_clock
+            else:
+                utilisation = None
+            routes[route_code] = {
+                'tests': tests, 'busy': busy, 'utilisation': utilisation}
+        return {
+            'status_counts': dict(self.status_counts),
+            'total_tests': self.total_tests,
+            'wall_clock': wall_clock,
+            'run_time': self.durations.total,
+            'durations': self.durations.as_dict(),
+            'slowest': [{'id': test_id, 'duration': duration}
+                for duration, test_id in self.slowest.items()],
+            'routes': routes,
+            }
+
+    def format_text(self, stream):
+        """Write a human readable report to stream."""
+        summary = self.as_dict()
+        if summary['wall_clock'] is not None:
+            stream.write("Wall clock:    %9.3fs\n" % summary['wall_clock'])
+        stream.write("Run time:      %9.3fs\n" % summary['run_time'])
+        durations = summary['durations']
+        if durations['count']:
+            stream.write(
+                "Durations:     p50 %.3fs  p90 %.3fs  p99 %.3fs  "
+                "max %.3fs\n" % (durations['p50'], durations['p90'],
+                durations['p99'], durations['max']))
+        if summary['slowest']:
+            stream.write("Slowest tests:\n")
+            for entry in summary['slowest']:
+                stream.write(
+                    "  %9.3fs %s\n" % (entry['duration'], entry['id']))
+        if summary['routes'] and list(summary['routes']) != ['']:
+            stream.write("Workers:\n")
+            for route_code in sorted(summary['routes']):
+                route = summary['routes'][route_code]
+                if route['utilisation'] is None:
+                    utilisation = ''
+                else:
+                    utilisation = ' %5.1f%% busy' % (
+                        route['utilisation'] * 100)
+                stream.write("  %-8s %5d tests %9.3fs%s\n" % (
+                    route_code or '-', route['tests'], route['busy'],
+                    utilisation))
@@ -18,17 +18,32 @@
 
 import csv
 import datetime
+import json
+import re
+import sys
+import tempfile
+import threading
+import weakref
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows.
+    resource = None
 
 import testtools
 from testtools.content import (
+    Content,
     text_content,
     TracebackContent,
     )
-from testtools import StreamResult
+from testtools.content_type import ContentType
+from testtools import CopyStreamResult, StreamResult
 from testtools.testcase import PlaceHolder
 
 from subunit import iso8601
 import subunit
+import subunit.stats
 
 
 # NOT a TestResult, because we are implementing the interface, not inheriting
@@ -218,6 +233,258 @@ class AutoTimingTestResultDecorator(HookedTestResultDecorator):
         return self.decorated.time(a_datetime)
 
 
+class Measurement(object):
+    """Something measured while each test runs, such as its CPU time.
+
+    ``DetailsAddingDecorator`` calls start() as each test starts and stop()
+    as soon as its outcome arrives, then details() for the attachments to
+    add to the outcome.
+    """
+
+    def start_run(self):
+        """Called when the test run starts."""
+
+    def stop_run(self):
+        """Called when the test run stops."""
+
+    def start(self, result, test):
+        """Start measuring test.
+
+        :param result: The ``DetailsAddingDecorator`` test is reported to.
+        """
+
+    def stop(self, test):
+        """Stop measuring test. This should do as little as it can."""
+
+    def details(self, test):
+        """Return a dict of the details to add to test's outcome, or None."""
+
+
+class DetailsAddingDecorator(TestResultDecorator):
+    """Add the details of some measurements to the outcome of every test.
+
+    The measurements are started in order as each test starts and stopped
+    in reverse order as soon as its outcome arrives, all before any details
+    are computed or anything is passed on, so no measurement includes the
+    cost of another's reporting. Outcomes reported with an exc_info or a
+    skip reason are converted to details first, as the details API is all
+    or nothing.
+    """
+
+    def __init__(self, decorated, measurements=()):
+        super(DetailsAddingDecorator, self).__init__(decorated)
+        self.measurements = list(measurements)
+        self._test = None
+        self._aborted = False
+        # Serialises reporting with abort(), which is called from other
+        # threads.
+        self._lock = threading.RLock()
+
+    def startTestRun(self):
+        with self._lock:
+            if self._aborted:
+                return
+            result = super(DetailsAddingDecorator, self).startTestRun()
+        for measurement in self.measurements:
+            measurement.start_run()
+        return result
+
+    def stopTestRun(self):
+        with self._lock:
+            self._stop()
+        # Not under the lock, as a measurement's thread may be waiting on it.
+        for measurement in reversed(self.measurements):
+            measurement.stop_run()
+        with self._lock:
+            if self._aborted:
+                return
+            return super(DetailsAddingDecorator, self).stopTestRun()
+
+    def startTest(self, test):
+        with self._lock:
+            if self._aborted:
+                return
+            result = super(DetailsAddingDecorator, self).startTest(test)
+            for measurement in self.measurements:
+                measurement.start(self, test)
+            self._test = test
+            return result
+
+    def stopTest(self, test):
+        with self._lock:
+            self._stop()
+            if self._aborted:
+                return
+            return super(DetailsAddingDecorator, self).stopTest(test)
+
+    def _stop(self):
+        """Stop the measurements, returning the test that was measured."""
+        test = self._test
+        if test is None:
+            return None
+        self._test = None
+        for measurement in reversed(self.measurements):
+            measurement.stop(test)
+        return test
+
+    def abort(self, test, details, then):
+        """Fail test and end the run, from another thread.
+
+        For a measurement to use when test is stuck: test fails with
+        details, the run is stopped and then() (which might exit the
+        process) is called, all before anything else can be reported.
+        Nothing is reported after an abort. If test has already finished
+        nothing is done.
+        """
+        with self._lock:
+            if self._test is not test or self._aborted:
+                return
+            self._aborted = True
+            self.decorated.addError(test, details=details)
+            self.decorated.stopTest(test)
+            self.decorated.stopTestRun()
+            then()
+
+    def _report(self, measured, method, test, details):
+        if self._aborted:
+            return
+        if measured is not None:
+            for measurement in self.measurements:
+                extra = measurement.details(measured)
+                if extra:
+                    details = dict(details or {})
+                    details.update(extra)
+        return method(test, details=details)
+
+    def _err_details(self, test, err, details):
+        if details is None and err is not None:
+            details = {'traceback': TracebackContent(err, test)}
+        return details
+
+    def addError(self, test, err=None, details=None):
+        with self._lock:
+            measured = self._stop()
+            return self._report(measured,
+                super(DetailsAddingDecorator, self).addError,
+                test, self._err_details(test, err, details))
+
+    def addFailure(self, test, err=None, details=None):
+        with self._lock:
+            measured = self._stop()
+            return self._report(measured,
+                super(DetailsAddingDecorator, self).addFailure,
+                test, self._err_details(test, err, details))
+
+    def addSuccess(self, test, details=None):
+        with self._lock:
+            measured = self._stop()
+            return self._report(measured,
+                super(DetailsAddingDecorator, self).addSuccess,
+                test, details)
+
+    def addSkip(self, test, reason=None, details=None):
+        with self._lock:
+            measured = self._stop()
+            if details is None and reason is not None:
+                details = {'reason': text_content(reason)}
+            return self._report(measured,
+                super(DetailsAddingDecorator, self).addSkip,
+                test, details)
+
+    def addExpectedFailure(self, test, err=None, details=None):
+        with self._lock:
+            measured = self._stop()
+            return self._report(measured,
+                super(DetailsAddingDecorator, self).addExpectedFailure,
+                test, self._err_details(test, err, details))
+
+    def addUnexpectedSuccess(self, test, details=None):
+        with self._lock:
+            measured = self._stop()
+            return self._report(measured,
+                super(DetailsAddingDecorator, self).addUnexpectedSuccess,
+                test, details)
+
+    def tags(self, new_tags, gone_tags):
+        with self._lock:
+            if self._aborted:
+                return
+            return super(DetailsAddingDecorator, self).tags(
+                new_tags, gone_tags)
+
+    def time(self, a_datetime):
+        with self._lock:
+            if self._aborted:
+                return
+            return super(DetailsAddingDecorator, self).time(a_datetime)
+
+
+class ResourceUsageMeasurement(Measurement):
+    """Measure the resources each test uses.
+
+    ``resource.getrusage`` is sampled when each test starts and when its
+    outcome is reported, and the difference is added to the outcome's
+    details as a ``resource-usage`` JSON attachment::
+
+      {"user": 0.25, "system": 0.01, "max_rss_kb": 2048,
+       "voluntary_switches": 3, "involuntary_switches": 12}
+
+    user and system are CPU seconds, so a test that sleeps or waits on I/O
+    shows little of either however long it takes. max_rss_kb is how much
+    the process's peak resident size grew during the test: it only grows
+    when a test needs more memory than any before it, so a test that
+    leaks shows up as repeated growth across a run. Only this process is
+    measured, not any it forks. Where the resource module is unavailable
+    nothing is added.
+    """
+
+    def __init__(self):
+        self._start_usage = None
+        self._end_usage = None
+
+    def _usage(self):
+        return resource.getrusage(resource.RUSAGE_SELF)
+
+    def start(self, result, test):
+        self._end_usage = None
+        if resource is not None:
+            self._start_usage = self._usage()
+
+    def stop(self, test):
+        if self._start_usage is not None:
+            self._end_usage = self._usage()
+
+    def details(self, test):
+        start, end = self._start_usage, self._end_usage
+        self._start_usage = self._end_usage = None
+        if start is None or end is None:
+            return None
+        max_rss = end.ru_maxrss - start.ru_maxrss
+        if sys.platform == 'darwin':
+            # Reported in bytes rather than kilobytes.
+            max_rss //= 1024
+        usage = json.dumps({
+            'user': round(end.ru_utime - start.ru_utime, 6),
+            'system': round(end.ru_stime - start.ru_stime, 6),
+            'max_rss_kb': max_rss,
+            'voluntary_switches': end.ru_nvcsw - start.ru_nvcsw,
+            'involuntary_switches': end.ru_nivcsw - start.ru_nivcsw,
+            }, sort_keys=True, separators=(',', ':')).encode('utf8')
+        return {'resource-usage': Content(
+            ContentType('application', 'json'), lambda: [usage])}
+
+
+class ResourceUsageDecorator(DetailsAddingDecorator):
+    """Attach the resources each test used to its outcome.
+
+    See ``ResourceUsageMeasurement``.
+    """
+
+    def __init__(self, decorated):
+        super(ResourceUsageDecorator, self).__init__(
+            decorated, [ResourceUsageMeasurement()])
+
+
 class TagsMixin(object):
 
     def __init__(self):
@@ -334,9 +601,167 @@ def make_tag_filter(with_tags, without_tags):
     return check_tags
 
 
+def make_rename(patterns, cache_size=10000):
+    """Make a callback that renames test ids using regex substitutions.
+
+    :param patterns: A sequence of (from_pattern, to_pattern) pairs, applied
+        in order as per ``re.sub``.
+    :param cache_size: The number of renamed ids to remember. Streams repeat
+        the same test id on many events, so each distinct id is only run
+        through the substitutions once while it is in the cache. When the
+        cache is full it is emptied, keeping memory bounded.
+    """
+    compiled = [(re.compile(from_pattern), to_pattern)
+        for from_pattern, to_pattern in patterns]
+    cache = {}
+
+    def rename(name):
+        try:
+            return cache[name]
+        except KeyError:
+            pass
+        new_name = name
+        for from_re, to_pattern in compiled:
+            new_name = from_re.sub(to_pattern, new_name)
+        if len(cache) >= cache_size:
+            cache.clear()
+        cache[name] = new_name
+        return new_name
+
+    return rename
+
+
+class StreamRenamer(CopyStreamResult):
+    """Rename the test ids of StreamResult events before forwarding them.
+
+    Unlike the ``rename`` parameter to ``TestResultFilter`` this works on the
+    v2 events directly, so every event for a test - including its
+    attachments - is renamed, and no test objects are altered.
+    """
+
+    def __init__(self, targets, rename):
+        """Create a StreamRenamer.
+
+        :param targets: A list of targets to forward events onto.
+        :param rename: A callable taking a test id and returning the new id,
+            such as one made by ``make_rename``.
+        """
+        super(StreamRenamer, self).__init__(targets)
+        self._rename = rename
+
+    def status(self, test_id=None, test_status=None, test_tags=None,
+        runnable=True, file_name=None, file_bytes=None, eof=False,
+        mime_type=None, route_code=None, timestamp=None):
+        if test_id is not None:
+            test_id = self._rename(test_id)
+        super(StreamRenamer, self).status(test_id=test_id,
+            test_status=test_status, test_tags=test_tags, runnable=runnable,
+            file_name=file_name, file_bytes=file_bytes, eof=eof,
+            mime_type=mime_type, route_code=route_code, timestamp=timestamp)
+
+
+# The default number of attachment bytes _PredicateFilter keeps in memory for
+# the test it is holding back.
+DEFAULT_MAX_BUFFERED_BYTES = 1024 * 1024
+
+
+def _read_spool(spool, offset, length, chunk_size=65536):
+    """Yield length bytes from offset in spool, a chunk at a time."""
+    while length:
+        # Seek every time, as other readers may share the spool.
+        spool.seek(offset)
+        chunk = spool.read(min(chunk_size, length))
+        if not chunk:
+            return
+        offset += len(chunk)
+        length -= len(chunk)
+        yield chunk
+
+
+class _CallBuffer(object):
+    """Buffer calls to a TestResult, spilling large attachments to disk.
+
+    Calls are stored as (method, args, kwargs) tuples. Attachment content in
+    a 'details' keyword argument is held in memory until max_bytes have been
+    buffered; after that attachment bodies are written to a temporary file
+    and replaced by Content objects that read them back on demand.
+
+    One spool file is used for all the tests buffered. It is only ever
+    appended to while any Content read from it is still alive (for
+    instance kept by a result downstream), and is emptied by the next spill
+    once none are.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BUFFERED_BYTES):
+        self._max_bytes = max_bytes
+        self._calls = []
+        self._held_bytes = 0
+        self._spool = None
+        # Weak references to the Content objects read from the spool.
+        self._spooled = []
+
+    def append(self, call):
+        method, args, kwargs = call
+        if kwargs.get('details'):
+            kwargs = dict(kwargs)
+            kwargs['details'] = dict(
+                (name, self._buffer_content(content))
+                for name, content in kwargs['details'].items())
+        self._calls.append((method, args, kwargs))
+
+    def clear(self):
+        """Forget all buffered calls."""
+        self._calls = []
+        self._held_bytes = 0
+
+    def __iter__(self):
+        return iter(self._calls)
+
+    def __len__(self):
+        return len(self._calls)
+
+    def _buffer_content(self, content):
+        chunks = []
+        size = 0
+        source = iter(content.iter_bytes())
+        for chunk in source:
+            chunks.append(chunk)
+            size += len(chunk)
+            if self._held_bytes + size > self._max_bytes:
+                return self._spill(content.content_type, chunks, source)
+        self._held_bytes += size
+        return Content(content.content_type, lambda: chunks)
+
+    def _spill(self, content_type, chunks, source):
+        if self._spool is None:
+            self._spool = tempfile.TemporaryFile()
+        spool = self._spool
+        self._spooled = [ref for ref in self._spooled if ref() is not None]
+        if not self._spooled:
+            # Nothing can read what is in the spool any more.
+            spool.seek(0)
+            spool.truncate()
+        spool.seek(0, 2)
+        offset = spool.tell()
+        length = 0
+        for chunk in chunks:
+            spool.write(chunk)
+            length += len(chunk)
+        del chunks[:]
+        for chunk in source:
+            spool.write(chunk)
+            length += len(chunk)
+        spool.flush()
+        content = Content(
+            content_type, lambda: _read_spool(spool, offset, length))
+        self._spooled.append(weakref.ref(content))
+        return content
+
+
 class _PredicateFilter(TestResultDecorator, TagsMixin):
 
-    def __init__(self, result, predicate):
+    def __init__(self, result, predicate,
+        max_buffered_bytes=DEFAULT_MAX_BUFFERED_BYTES):
         super(_PredicateFilter, self).__init__(result)
         self._clear_tags()
         self.decorated = TimeCollapsingDecorator(
@@ -347,7 +772,8 @@ class _PredicateFilter(TestResultDecorator, TagsMixin):
         # Has the current test been filtered (for outputting test tags)
         self._current_test_filtered = None
         # Calls to this result that we don't know whether to forward on yet.
-        self._buffered_calls = []
+        # Large attachments are spilled to disk to bound what this holds.
+        self._buffered_calls = _CallBuffer(max_buffered_bytes)
 
     def filter_predicate(self, test, outcome, error, details):
         return self._predicate(
@@ -418,7 +844,7 @@ class _PredicateFilter(TestResultDecorator, TagsMixin):
             self.decorated.stopTest(test)
         self._current_test = None
         self._current_test_filtered = None
-        self._buffered_calls = []
+        self._buffered_calls.clear()
         TagsMixin.stopTest(self, test)
 
     def tags(self, new_tags, gone_tags):
@@ -452,7 +878,7 @@ class TestResultFilter(TestResultDecorator):
     def __init__(self, result, filter_error=False, filter_failure=False,
         filter_success=True, filter_skip=False, filter_xfail=False,
         filter_predicate=None, fixup_expected_failures=None,
-        rename=None):
+        rename=None, max_buffered_bytes=DEFAULT_MAX_BUFFERED_BYTES):
         """Create a FilterResult object filtering to result.
 
         :param filter_error: Filter out errors.
@@ -470,6 +896,13 @@ class TestResultFilter(TestResultDecorator):
         :param fixup_expected_failures: Set of test ids to consider known
             failing.
         :param rename: Optional function to rename test ids
+        :param max_buffered_bytes: How many bytes of attachment content to
+            hold in memory for a test while deciding whether to forward it.
+            Content beyond this is spooled to a temporary file. This only
+            bounds the filter's own buffer, not the memory of a pipeline
+            using it: a ``StreamToExtendedDecorator`` reading a v2 stream,
+            as subunit-filter does, holds each test's attachments in memory
+            until the test completes.
         """
         predicates = []
         if filter_error:
@@ -498,7 +931,7 @@ class TestResultFilter(TestResultDecorator):
             predicates.append(compat)
         predicate = and_predicates(predicates)
         super(TestResultFilter, self).__init__(
-            _PredicateFilter(result, predicate))
+            _PredicateFilter(result, predicate, max_buffered_bytes))
         if fixup_expected_failures is None:
             self._fixup_expected_failures = frozenset()
         else:
@@ -540,18 +973,109 @@ class TestResultFilter(TestResultDecorator):
         return test
 
 
+def test_id_prefix(test_id, group_by):
+    """Return the part of test_id naming the class or module of the test.
+
+    Any parameters (e.g. scenario names in parentheses) are stripped first.
+    Ids too short to have the requested prefix are returned unaltered.
+
+    :param group_by: Either 'class' or 'module'.
+    """
+    depth = {'class': 1, 'module': 2}[group_by]
+    base = test_id.split('(', 1)[0]
+    parts = base.rsplit('.', depth)
+    if len(parts) <= depth:
+        return base
+    return parts[0]
+
+
+class _SortedDurations(object):
+    """Report test durations slowest first, using an external sort."""
+
+    def __init__(self):
+        self._sorter = subunit.stats.ExternalSorter()
+
+    def add(self, test_id, seconds):
+        self._sorter.add(-seconds, test_id)
+
+    def report(self):
+        for seconds, test_id in self._sorter.sorted():
+            yield test_id, -seconds
+        self._sorter.close()
+
+
+class _SlowestDurations(object):
+    """Report the slowest tests, slowest first, using a bounded heap."""
+
+    def __init__(self, limit):
+        self._top = subunit.stats.TopN(limit)
+
+    def add(self, test_id, seconds):
+        self._top.push(seconds, test_id)
+
+    def report(self):
+        for seconds, test_id in self._top.items():
+            yield test_id, seconds
+
+
+class _GroupedDurations(object):
+    """Report total durations per test id prefix, largest total first."""
+
+    def __init__(self, group_by, limit=None):
+        self._group_by = group_by
+        self._limit = limit
+        self._groups = {}
+
+    def add(self, test_id, seconds):
+        group = self._groups.setdefault(
+            test_id_prefix(test_id, self._group_by), [0.0, 0])
+        group[0] += seconds
+        group[1] += 1
+
+    def report(self):
+        groups = sorted(
+            self._groups.items(), key=lambda item: (-item[1][0], item[0]))
+        if self._limit is not None:
+            groups = groups[:self._limit]
+        for prefix, (seconds, count) in groups:
+            yield '%s (%d tests)' % (prefix, count), seconds
+
+
 class TestIdPrintingResult(testtools.TestResult):
     """Print test ids to a stream.
 
     Implements both TestResult and StreamResult, for compatibility.
     """
 
-    def __init__(self, stream, show_times=False, show_exists=False):
-        """Create a FilterResult object outputting to stream."""
+    def __init__(self, stream, show_times=False, show_exists=False,
+        slowest=None, sort_by_duration=False, group_by=None):
+        """Create a FilterResult object outputting to stream.
+
+        :param slowest: If not None, only report this many of the slowest
+            tests, slowest first, once the run has finished.
+        :param sort_by_duration: If True, report tests slowest first once the
+            run has finished. Durations are sorted on disk if need be, so
+            very large runs do not have to be held in memory.
+        :param group_by: If 'class' or 'module', report the total duration
+            and count of tests per test class or module instead of per test,
+            largest total first. slowest limits the number of groups shown.
+        """
         super(TestIdPrintingResult, self).__init__()
         self._stream = stream
         self.show_exists = show_exists
         self.show_times = show_times
+        self.slowest = slowest
+        self.sort_by_duration = sort_by_duration
+        self.group_by = group_by
+
+    def _make_collector(self):
+        if self.group_by is not None:
+            return _GroupedDurations(self.group_by, self.slowest)
+        if self.slowest is not None:
+            return _SlowestDurations(self.slowest)
+        if self.sort_by_duration:
+            return _SortedDurations()
+        return None
 
     def startTestRun(self):
         self.failed_tests = 0
@@ -559,6 +1083,7 @@ class TestIdPrintingResult(testtools.TestResult):
         self._test = None
         self._test_duration = 0
         self._active_tests = {}
+        self._collector = self._make_collector()
 
     def addError(self, test, err):
         self.failed_tests += 1
@@ -582,14 +1107,18 @@ class TestIdPrintingResult(testtools.TestResult):
         self._test = test
 
     def reportTest(self, test_id, duration):
-        if self.show_times:
-            seconds = duration.seconds
-            seconds += duration.days * 3600 * 24
-            seconds += duration.microseconds / 1000000.0
-            self._stream.write(test_id + ' %0.3f\n' % seconds)
+        # The duration is a timedelta, or 0 if unknown.
+        seconds = subunit.stats.total_seconds(duration) if duration else 0.0
+        if self._collector is not None:
+            self._collector.add(test_id, seconds)
+        elif self.show_times:
+            self._write_time(test_id, seconds)
         else:
             self._stream.write(test_id + '\n')
 
+    def _write_time(self, label, seconds):
+        self._stream.write(label + ' %0.3f\n' % seconds)
+
     def startTest(self, test):
         self._start_time = self._time()
 
@@ -633,6 +1162,10 @@ class TestIdPrintingResult(testtools.TestResult):
     def stopTestRun(self):
         for test_id in list(self._active_tests.keys()):
             self._end_test(test_id)
+        if self._collector is not None:
+            for label, seconds in self._collector.report():
+                self._write_time(label, seconds)
+            self._collector = None
 
 
 class TestByTestResult(testtools.TestResult):
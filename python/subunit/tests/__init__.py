@@ -28,13 +28,28 @@ _remote_exception_str_chunked = "57\r\n" + _remote_exception_str + ": boo qux\n0
 
 
 from subunit.tests import (
+    test_aggregate,
+    test_analytics,
     test_chunked,
+    test_collector,
+    test_columnar,
     test_details,
+    test_discovery,
     test_filters,
     test_filter_to_disk,
+    test_history,
+    test_memory,
+    test_merge,
     test_output_filter,
+    test_pool,
+    test_profiling,
     test_progress_model,
+    test_ring,
     test_run,
+    test_schedule,
+    test_sink,
+    test_split,
+    test_stats,
     test_subunit_filter,
     test_subunit_stats,
     test_subunit_tags,
@@ -42,6 +57,7 @@ from subunit.tests import (
     test_test_protocol,
     test_test_protocol2,
     test_test_results,
+    test_timeout,
     )
 
 
@@ -60,6 +76,22 @@ def test_suite():
     result.addTest(loader.loadTestsFromModule(test_subunit_tags))
     result.addTest(loader.loadTestsFromModule(test_subunit_stats))
     result.addTest(loader.loadTestsFromModule(test_run))
+    result.addTest(loader.loadTestsFromModule(test_stats))
+    result.addTest(loader.loadTestsFromModule(test_aggregate))
+    result.addTest(loader.loadTestsFromModule(test_history))
+    result.addTest(loader.loadTestsFromModule(test_columnar))
+    result.addTest(loader.loadTestsFromModule(test_analytics))
+    result.addTest(loader.loadTestsFromModule(test_merge))
+    result.addTest(loader.loadTestsFromModule(test_split))
+    result.addTest(loader.loadTestsFromModule(test_collector))
+    result.addTest(loader.loadTestsFromModule(test_sink))
+    result.addTest(loader.loadTestsFromModule(test_ring))
+    result.addTest(loader.loadTestsFromModule(test_pool))
+    result.addTest(loader.loadTestsFromModule(test_schedule))
+    result.addTest(loader.loadTestsFromModule(test_discovery))
+    result.addTest(loader.loadTestsFromModule(test_profiling))
+    result.addTest(loader.loadTestsFromModule(test_memory))
+    result.addTest(loader.loadTestsFromModule(test_timeout))
     result.addTests(
         generate_scenarios(loader.loadTestsFromModule(test_output_filter))
     )
@@ -0,0 +1,95 @@
+#
+#  subunit: extensions to Python unittest to get test results from subprocesses.
+#  Copyright (C) 2026 Subunit Contributors
+#
+#  Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+#  license at the users choice. A copy of both licenses are available in the
+#  project source as Apache-2.0 and BSD. You may not use this file except in
+#  compliance with one of these two licences.
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+#  license you chose for the specific language governing permissions and
+#  limitations under that license.
+#
+
+"""Build, parse and produce v2 streams for the tests."""
+
+import datetime
+import io
+
+from testtools.compat import BytesIO
+from testtools.testresult.doubles import StreamResult
+
+from subunit import iso8601, run
+from subunit.v2 import ByteStreamToStreamResult, StreamResultToBytes
+
+
+def at(seconds):
+    """Return the aware datetime seconds into the year 2000."""
+    return datetime.datetime(2000, 1, 1, tzinfo=iso8601.UTC) + (
+        datetime.timedelta(seconds=seconds))
+
+
+def make_stream(events):
+    """Return a v2 stream of (test_id, test_status, route_code) events.
+
+    An event may also be (test_id, test_status, route_code, seconds) to
+    timestamp it at(seconds), or not at all if seconds is None.
+    """
+    output = BytesIO()
+    writer = StreamResultToBytes(output)
+    for event in events:
+        test_id, test_status, route_code = event[:3]
+        if len(event) > 3 and event[3] is not None:
+            timestamp = at(event[3])
+        else:
+            timestamp = None
+        writer.status(test_id=test_id, test_status=test_status,
+            route_code=route_code, timestamp=timestamp)
+    return output.getvalue()
+
+
+def make_timed_stream(durations):
+    """Return a v2 stream of (test_id, seconds) successful tests.
+
+    A test may also be (test_id, seconds, test_status) for another final
+    status. If its seconds are None its final status has no timestamp.
+    """
+    output = BytesIO()
+    writer = StreamResultToBytes(output)
+    start = datetime.datetime(2026, 1, 1, tzinfo=iso8601.UTC)
+    for duration in durations:
+        test_id, seconds = duration[:2]
+        test_status = duration[2] if len(duration) > 2 else 'success'
+        writer.status(test_id=test_id, test_status='inprogress',
+            timestamp=start)
+        if seconds is None:
+            timestamp = None
+        else:
+            timestamp = start + datetime.timedelta(seconds=seconds)
+        writer.status(test_id=test_id, test_status=test_status,
+            timestamp=timestamp)
+    return output.getvalue()
+
+
+def parse_events(data):
+    """Return the StreamResult events of the v2 stream bytes data."""
+    result = StreamResult()
+    ByteStreamToStreamResult(
+        BytesIO(data), non_subunit_name='stdout').run(result)
+    return result._events
+
+
+def parse(data):
+    """Return the (test_id, test_status, route_code) of data's events."""
+    return [(event[1], event[2], event[9]) for event in parse_events(data)]
+
+
+def run_main(argv):
+    """Run subunit.run.main with argv, returning the events it output."""
+    bytestream = io.BytesIO()
+    stream = io.TextIOWrapper(bytestream, encoding="utf8")
+    run.main(argv=["progName"] + argv, stdout=stream)
+    return parse_events(bytestream.getvalue())
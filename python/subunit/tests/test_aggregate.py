@@ -0,0 +1,134 @@
+#
+#  subunit: extensions to python unittest to get test results from subprocesses.
+#  Copyright (C) 2026 Subunit Contributors
+#
+#  Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+#  license at the users choice. A copy of both licenses are available in the
+#  project source as Apache-2.0 and BSD. You may not use this file except in
+#  compliance with one of these two licences.
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+#  license you chose for the specific language governing permissions and
+#  limitations under that license.
+#
+
+"""Tests for subunit.aggregate."""
+
+import datetime
+import io
+import json
+import os.path
+import subprocess
+import sys
+
+from fixtures import TempDir
+from testtools import TestCase
+
+from subunit import iso8601
+from subunit.aggregate import (
+    aggregate_paths,
+    find_streams,
+    summarise_stream,
+    TestAggregate,
+    )
+from subunit.v2 import StreamResultToBytes
+
+
+START = datetime.datetime(2000, 1, 1, tzinfo=iso8601.UTC)
+
+
+def write_stream(path, outcomes):
+    """Write a stream with a timed test per (test_id, status, seconds)."""
+    with io.open(path, 'wb') as output:
+        writer = StreamResultToBytes(output)
+        for test_id, status, seconds in outcomes:
+            writer.status(test_id=test_id, test_status='inprogress',
+                timestamp=START)
+            writer.status(test_id=test_id, test_status=status,
+                timestamp=START + datetime.timedelta(seconds=seconds))
+
+
+class TestTestAggregate(TestCase):
+
+    def setUp(self):
+        super(TestTestAggregate, self).setUp()
+        self.root = self.useFixture(TempDir()).path
+        self.paths = []
+        runs = [
+            [('a', 'success', 1), ('b', 'success', 2)],
+            [('a', 'success', 3), ('b', 'fail', 4)],
+            [('a', 'success', 2), ('b', 'success', 1), ('c', 'skip', 0)],
+            ]
+        for index, outcomes in enumerate(runs):
+            path = os.path.join(self.root, 'run-%d' % index)
+            write_stream(path, outcomes)
+            self.paths.append(path)
+
+    def test_summarise_stream(self):
+        aggregate = summarise_stream(self.paths[1])
+        self.assertEqual(1, aggregate.runs)
+        self.assertEqual(
+            {'a': [1, 1, 0, 0, 1, 3.0, 3.0], 'b': [1, 0, 1, 0, 1, 4.0, 4.0]},
+            aggregate.tests)
+
+    def check_aggregate(self, aggregate):
+        self.assertEqual(3, aggregate.runs)
+        self.assertEqual(
+            {'id': 'a', 'runs': 3, 'passes': 3, 'failures': 0, 'skips': 0,
+             'mean_duration': 2.0, 'max_duration': 3.0, 'flakiness': 0.0},
+            aggregate.summary('a'))
+        self.assertEqual(
+            {'id': 'b', 'runs': 3, 'passes': 2, 'failures': 1, 'skips': 0,
+             'mean_duration': 7 / 3.0, 'max_duration': 4.0,
+             'flakiness': 1 / 3.0},
+            aggregate.summary('b'))
+        self.assertEqual(1, aggregate.summary('c')['skips'])
+
+    def test_aggregate_in_process(self):
+        self.check_aggregate(aggregate_paths(self.paths, processes=1))
+
+    def test_aggregate_in_pool(self):
+        self.check_aggregate(aggregate_paths(self.paths, processes=2))
+
+    def test_as_dict_is_sorted(self):
+        aggregate = aggregate_paths(self.paths, processes=1)
+        self.assertEqual(
+            ['a', 'b', 'c'],
+            [test['id'] for test in aggregate.as_dict()['tests']])
+
+    def test_merge_empty(self):
+        aggregate = TestAggregate()
+        aggregate.merge(TestAggregate())
+        self.assertEqual({'runs': 0, 'tests': []}, aggregate.as_dict())
+
+    def test_find_streams(self):
+        self.assertEqual(self.paths, find_streams([self.root]))
+        self.assertEqual(
+            self.paths[:2],
+            find_streams([os.path.join(self.root, 'run-[01]'),
+                os.path.join(self.root, 'missing')]))
+
+
+class TestAggregateCommand(TestCase):
+
+    def test_json(self):
+        root = self.useFixture(TempDir()).path
+        write_stream(os.path.join(root, 'one'), [('a', 'success', 1)])
+        write_stream(os.path.join(root, 'two'), [('a', 'fail', 3)])
+        script_path = os.path.join(
+            os.path.dirname(os.path.dirname(os.path.dirname(
+                os.path.dirname(os.path.abspath(__file__))))),
+            'filters', 'subunit-aggregate')
+        command = [sys.executable, script_path, '--json', '-j', '1', root]
+        ps = subprocess.Popen(
+            command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        out, err = ps.communicate()
+        self.assertEqual(0, ps.returncode, err)
+        summary = json.loads(out.decode('utf8'))
+        self.assertEqual(2, summary['runs'])
+        self.assertEqual(
+            [{'id': 'a', 'runs': 2, 'passes': 1, 'failures': 1, 'skips': 0,
+              'mean_duration': 2.0, 'max_duration': 3.0, 'flakiness': 0.5}],
+            summary['tests'])
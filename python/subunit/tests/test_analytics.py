@@ -0,0 +1,217 @@
+#
+#  subunit: extensions to python unittest to get test results from subprocesses.
+#  Copyright (C) 2026 Subunit Contributors
+#
+#  Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+#  license at the users choice. A copy of both licenses are available in the
+#  project source as Apache-2.0 and BSD. You may not use this file except in
+#  compliance with one of these two licences.
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+#  license you chose for the specific language governing permissions and
+#  limitations under that license.
+#
+
+"""Tests for subunit.analytics."""
+
+import json
+import os.path
+import random
+import subprocess
+import sys
+
+from fixtures import MonkeyPatch, TempDir
+from testtools import skipIf, TestCase
+from testtools.compat import BytesIO
+from testtools.testresult.doubles import StreamResult
+
+from subunit import RunTable
+from subunit.analytics import AlignedRuns, analyse, write_report_stream
+from subunit.columnar import MISSING, numpy, STATUS_CODES
+from subunit.tests.streams import make_timed_stream
+from subunit.v2 import ByteStreamToStreamResult
+
+
+def make_table(outcomes):
+    return RunTable.from_stream(BytesIO(make_timed_stream(outcomes)))
+
+
+# (test_id, seconds, status) outcomes of each run.
+RUNS = [
+    [('a', 1, 'success'), ('b', 2, 'success'), ('c', 1, 'success')],
+    [('a', 3, 'success'), ('b', 2, 'success'), ('c', 1, 'fail')],
+    [('a', 2, 'success'), ('b', 2, 'success')],
+    [('a', 5, 'success'), ('b', 2, 'fail'), ('c', None, 'success'),
+     ('d', 9, 'success')],
+    ]
+
+
+class TestAlignedRuns(TestCase):
+
+    def setUp(self):
+        super(TestAlignedRuns, self).setUp()
+        self.aligned = AlignedRuns([make_table(run) for run in RUNS])
+
+    def test_alignment(self):
+        aligned = self.aligned
+        self.assertEqual(['a', 'b', 'c', 'd'], aligned.ids)
+        self.assertEqual(4, len(aligned))
+        self.assertEqual(
+            [2000000000, 2000000000, MISSING, MISSING],
+            list(aligned.durations[2]))
+        self.assertEqual(
+            [STATUS_CODES['success'], STATUS_CODES['fail'],
+             STATUS_CODES['success'], STATUS_CODES['success']],
+            list(aligned.statuses[3]))
+
+    def test_duration_deltas(self):
+        self.assertEqual(
+            [2000000000, 0, 0, MISSING],
+            list(self.aligned.duration_deltas(1, 0)))
+
+    def test_baseline_medians(self):
+        medians = self.aligned.baseline_medians(3, 5)
+        self.assertEqual(
+            [2000000000, 2000000000, 1000000000, MISSING], list(medians))
+        # Even counts take the mean of the middle pair.
+        self.assertEqual(
+            [2500000000, 2000000000, 1000000000, MISSING],
+            list(self.aligned.baseline_medians(3, 2)))
+        self.assertEqual(
+            [MISSING] * 4, list(self.aligned.rolling_medians(2)[0]))
+
+    def test_regressions(self):
+        self.assertEqual(
+            [(0, 5000000000, 2000000000)], self.aligned.regressions(3))
+        self.assertEqual([], self.aligned.regressions(3, threshold=3.0))
+        self.assertEqual(
+            [], self.aligned.regressions(3, min_duration=3000000000))
+
+    def test_transitions(self):
+        self.assertEqual(
+            [(2, STATUS_CODES['success'], STATUS_CODES['fail'])],
+            self.aligned.transitions(0, 1))
+        # c did not run in run 2.
+        self.assertEqual([], self.aligned.transitions(1, 2))
+
+
+class TestAlignedRunsPurePython(TestAlignedRuns):
+
+    def setUp(self):
+        self.useFixture(MonkeyPatch('subunit.analytics.numpy', None))
+        super(TestAlignedRunsPurePython, self).setUp()
+
+
+@skipIf(numpy is None, 'NumPy not available')
+class TestAlignedRunsNumPy(TestCase):
+
+    def test_same_as_pure_python(self):
+        # Random runs, with tests repeated within a run, some not finished
+        # and some untimed, give the same columns either way.
+        rng = random.Random(42)
+        runs = []
+        for _ in range(6):
+            run = []
+            for _ in range(200):
+                seconds = rng.choice([None, 0, 1, 2, 3, 10])
+                status = rng.choice(['success', 'fail', 'skip', 'exists'])
+                run.append(('t%d' % rng.randrange(50), seconds, status))
+            runs.append(make_timed_stream(run))
+        tables = lambda: [RunTable.from_stream(BytesIO(run)) for run in runs]
+        vectorized = AlignedRuns(tables())
+        with MonkeyPatch('subunit.analytics.numpy', None):
+            pure = AlignedRuns(tables())
+            pure_deltas = pure.duration_deltas(5, pure.baseline_medians(5, 3))
+            pure_report = analyse(pure, 3, 1.5)
+        self.assertEqual(pure.ids, vectorized.ids)
+        self.assertEqual(pure.durations, vectorized.durations)
+        self.assertEqual(pure.statuses, vectorized.statuses)
+        self.assertEqual(pure_deltas, vectorized.duration_deltas(
+            5, vectorized.baseline_medians(5, 3)))
+        self.assertEqual(pure.duration_deltas(5, 0),
+            vectorized.duration_deltas(5, 0))
+        self.assertEqual(pure_report, analyse(vectorized, 3, 1.5))
+
+
+class TestAnalyse(TestCase):
+
+    def test_report(self):
+        report = analyse(AlignedRuns([make_table(run) for run in RUNS]))
+        self.assertEqual(4, report['runs'])
+        self.assertEqual(4, report['tests'])
+        self.assertEqual(
+            [{'id': 'a', 'duration': 5.0, 'median': 2.0, 'ratio': 2.5}],
+            report['regressions'])
+        self.assertEqual(
+            [{'id': 'b', 'from': 'success', 'to': 'fail'}],
+            report['transitions'])
+        self.assertEqual(
+            {'success->fail': 2}, report['transition_counts'])
+        self.assertEqual([4.0, 6.0, 4.0, 16.0], report['total_durations'])
+
+    def test_single_run(self):
+        report = analyse(AlignedRuns([make_table(RUNS[0])]))
+        self.assertEqual([], report['regressions'])
+        self.assertEqual({}, report['transition_counts'])
+
+    def test_write_report_stream(self):
+        report = analyse(AlignedRuns([make_table(run) for run in RUNS]))
+        result = StreamResult()
+        write_report_stream(report, result)
+        self.assertEqual(
+            [('a', 'inprogress'), ('a', None), ('a', 'fail'),
+             ('b', 'inprogress'), ('b', None), ('b', 'fail')],
+            [(event[1], event[2]) for event in result._events])
+        self.assertEqual(
+            {'regression': report['regressions'][0]},
+            json.loads(result._events[1][6].decode('utf8')))
+
+
+class TestAnalysePurePython(TestAnalyse):
+
+    def setUp(self):
+        super(TestAnalysePurePython, self).setUp()
+        self.useFixture(MonkeyPatch('subunit.analytics.numpy', None))
+
+
+class TestCompareCommand(TestCase):
+
+    def run_command(self, args, runs=RUNS):
+        root = self.useFixture(TempDir()).path
+        for index, run in enumerate(runs):
+            with open(os.path.join(root, 'run-%d' % index), 'wb') as target:
+                target.write(make_timed_stream(run))
+        script_path = os.path.join(
+            os.path.dirname(os.path.dirname(os.path.dirname(
+                os.path.dirname(os.path.abspath(__file__))))),
+            'filters', 'subunit-compare')
+        ps = subprocess.Popen(
+            [sys.executable, script_path] + args + [root],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        out, err = ps.communicate()
+        self.assertEqual(1, ps.returncode, err)
+        return out
+
+    def test_text(self):
+        out = self.run_command([]).decode('utf8')
+        self.assertIn('  2.5x  a\n', out)
+
+    def test_zero_median(self):
+        runs = [[('a', 0)], [('a', 0)], [('a', 5)]]
+        out = self.run_command(['--min-duration', '0'], runs).decode('utf8')
+        self.assertIn('   inf  a\n', out)
+
+    def test_json(self):
+        report = json.loads(self.run_command(['--json']).decode('utf8'))
+        self.assertEqual(['a'], [test['id'] for test in report['regressions']])
+
+    def test_subunit(self):
+        result = StreamResult()
+        ByteStreamToStreamResult(BytesIO(self.run_command(['--subunit']))).run(
+            result)
+        self.assertEqual(
+            [('a', 'fail'), ('b', 'fail')],
+            [(event[1], event[2]) for event in result._events
+                if event[2] == 'fail'])
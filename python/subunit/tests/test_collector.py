@@ -0,0 +1,181 @@
+#
+#  subunit: extensions to python unittest to get test results from subprocesses.
+#  Copyright (C) 2026 Subunit Contributors
+#
+#  Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+#  license at the users choice. A copy of both licenses are available in the
+#  project source as Apache-2.0 and BSD. You may not use this file except in
+#  compliance with one of these two licences.
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+#  license you chose for the specific language governing permissions and
+#  limitations under that license.
+#
+
+"""Tests for subunit.collector."""
+
+import os.path
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from fixtures import TempDir
+from testtools import skipUnless, TestCase
+from testtools.compat import BytesIO
+
+from subunit.collector import Collector, PacketDecoder
+from subunit.stats import StreamStats
+from subunit.tests.streams import make_stream, parse
+from subunit.v2 import ParseError
+
+
+def corrupt(packet):
+    """Return packet with its checksum broken."""
+    data = bytearray(packet)
+    data[-1] ^= 0xff
+    return bytes(data)
+
+
+class TestPacketDecoder(TestCase):
+
+    def test_byte_at_a_time(self):
+        data = make_stream([('a', 'success', None), ('b', 'fail', '0')])
+        decoder = PacketDecoder()
+        chunks = []
+        for index in range(len(data)):
+            chunks.extend(decoder.feed(data[index:index + 1]))
+        self.assertEqual(data, b''.join(chunks))
+        self.assertEqual(2, len(chunks))
+        self.assertEqual(0, decoder.pending)
+
+    def test_non_subunit_content(self):
+        packet = make_stream([('a', 'success', None)])
+        decoder = PacketDecoder()
+        self.assertEqual(
+            [b'hello ', packet, b'world'],
+            decoder.feed(b'hello ' + packet + b'world' + packet[:3]))
+        self.assertEqual(3, decoder.pending)
+        self.assertEqual([packet], decoder.feed(packet[3:]))
+
+    def test_bad_checksum(self):
+        packet = make_stream([('a', 'success', None)])
+        self.assertRaises(
+            ParseError, PacketDecoder().feed, packet[:-1] + b'\0')
+
+    def test_resync_after_bad_packet(self):
+        good = make_stream([('a', 'success', None)])
+        bad = corrupt(good)
+        chunks = PacketDecoder(errors='report').feed(good + bad + good)
+        self.assertEqual(3, len(chunks))
+        self.assertEqual([good, good], [chunks[0], chunks[2]])
+        self.assertEqual(
+            [('subunit.parser', 'fail', None)], parse(chunks[1]))
+        self.assertEqual([good, good],
+            PacketDecoder(errors='ignore').feed(good + bad + good))
+
+
+class TestCollector(TestCase):
+
+    def start(self, collector, max_connections):
+        thread = threading.Thread(
+            target=collector.run, args=(max_connections,))
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(collector.close)
+        return thread
+
+    def send(self, family, address, data):
+        client = socket.socket(family, socket.SOCK_STREAM)
+        client.connect(address)
+        client.sendall(data)
+        client.close()
+
+    @skipUnless(getattr(socket, 'AF_UNIX', None), 'Unix sockets required')
+    def test_unix_connections(self):
+        path = os.path.join(self.useFixture(TempDir()).path, 'socket')
+        output = BytesIO()
+        stats = StreamStats()
+        collector = Collector(output, stats)
+        collector.listen_unix(path)
+        thread = self.start(collector, 2)
+        self.send(socket.AF_UNIX, path, make_stream(
+            [('a', 'inprogress', None), ('a', 'success', None)]))
+        self.send(socket.AF_UNIX, path,
+            make_stream([('b', 'fail', '3')]) + b'junk')
+        thread.join(10)
+        self.assertFalse(thread.is_alive())
+        # Connections are read concurrently, so only the order of the
+        # events from each connection is fixed.
+        events = parse(output.getvalue())
+        self.assertEqual(
+            [('a', 'inprogress', '0'), ('a', 'success', '0')],
+            [event for event in events if event[2] == '0'])
+        self.assertEqual(
+            [('b', 'fail', '1/3'), (None, None, '1')],
+            [event for event in events if event[2].startswith('1')])
+        self.assertEqual({'success': 1, 'fail': 1}, stats.status_counts)
+        self.assertEqual(['0', '1/3'], sorted(stats.routes))
+
+    def test_tcp_truncated_stream(self):
+        output = BytesIO()
+        collector = Collector(output)
+        address = collector.listen_tcp('127.0.0.1', 0).getsockname()
+        thread = self.start(collector, 1)
+        self.send(socket.AF_INET, address,
+            make_stream([('a', 'success', None)])[:-2])
+        thread.join(10)
+        self.assertEqual(
+            [('subunit.parser', 'fail', '0')], parse(output.getvalue()))
+
+    def test_garbage_between_packets(self):
+        output = BytesIO()
+        collector = Collector(output)
+        address = collector.listen_tcp('127.0.0.1', 0).getsockname()
+        thread = self.start(collector, 1)
+        self.send(socket.AF_INET, address,
+            make_stream([('a', 'success', None)]) +
+            corrupt(make_stream([('b', 'success', None)])) +
+            make_stream([('c', 'success', None)]))
+        thread.join(10)
+        self.assertEqual(
+            [('a', 'success', '0'), ('subunit.parser', 'fail', '0'),
+                ('c', 'success', '0')], parse(output.getvalue()))
+
+    def test_stop(self):
+        collector = Collector(BytesIO())
+        collector.listen_tcp('127.0.0.1', 0)
+        thread = self.start(collector, None)
+        collector.stop()
+        thread.join(10)
+        self.assertFalse(thread.is_alive())
+
+
+class TestCollectorCommand(TestCase):
+
+    @skipUnless(getattr(socket, 'AF_UNIX', None), 'Unix sockets required')
+    def test_collect(self):
+        root = self.useFixture(TempDir()).path
+        path = os.path.join(root, 'socket')
+        script_path = os.path.join(
+            os.path.dirname(os.path.dirname(os.path.dirname(
+                os.path.dirname(os.path.abspath(__file__))))),
+            'filters', 'subunit-collector')
+        ps = subprocess.Popen(
+            [sys.executable, script_path, '--unix', path, '--connections',
+                '1'],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        for _ in range(1000):
+            if os.path.exists(path):
+                break
+            time.sleep(0.01)
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.connect(path)
+        client.sendall(make_stream([('a', 'success', None)]))
+        client.close()
+        out, err = ps.communicate()
+        self.assertEqual(0, ps.returncode, err)
+        self.assertEqual([('a', 'success', '0')], parse(out))
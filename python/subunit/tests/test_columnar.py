@@ -0,0 +1,124 @@
+#
+#  subunit: extensions to python unittest to get test results from subprocesses.
+#  Copyright (C) 2026 Subunit Contributors
+#
+#  Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+#  license at the users choice. A copy of both licenses are available in the
+#  project source as Apache-2.0 and BSD. You may not use this file except in
+#  compliance with one of these two licences.
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+#  license you chose for the specific language governing permissions and
+#  limitations under that license.
+#
+
+"""Tests for subunit.columnar."""
+
+from testtools import skipIf, TestCase
+from testtools.compat import BytesIO
+
+import subunit
+from subunit.columnar import MISSING, numpy, STATUS_CODES, timestamp_ns
+from subunit.tests.streams import at
+from subunit.v2 import StreamResultToBytes
+
+
+class TestRunTable(TestCase):
+
+    def make_stream(self):
+        output = BytesIO()
+        writer = StreamResultToBytes(output)
+        writer.status(test_id='a', test_status='exists')
+        writer.status(test_id='a', test_status='inprogress', timestamp=at(0),
+            route_code='0')
+        writer.status(test_id='b', test_status='inprogress', timestamp=at(1),
+            route_code='1')
+        writer.status(test_id='a', file_name='log', file_bytes=b'hello',
+            timestamp=at(1), route_code='0')
+        writer.status(test_id='a', test_status='success', timestamp=at(2),
+            route_code='0')
+        writer.status(test_id='b', file_name='traceback', file_bytes=b'boom',
+            mime_type='text/plain', timestamp=at(2))
+        writer.status(test_id='b', test_status='fail', timestamp=at(4),
+            route_code='1')
+        writer.status(test_id='c', test_status='skip')
+        return output.getvalue()
+
+    def test_columns(self):
+        table = subunit.RunTable.from_stream(BytesIO(self.make_stream()))
+        self.assertEqual(['a', 'b', 'c'], table.ids)
+        self.assertEqual(['0', '1'], table.routes)
+        # 'a' exists without a route code, so its execution on route 0 is a
+        # separate row, as is the attachment for 'b' without a route code.
+        self.assertEqual([0, 0, 1, 1, 2], list(table.test_index))
+        self.assertEqual(
+            [STATUS_CODES['exists'], STATUS_CODES['success'],
+             STATUS_CODES['fail'], 0, STATUS_CODES['skip']],
+            list(table.status_code))
+        self.assertEqual(
+            [MISSING, 0, 1, MISSING, MISSING], list(table.route_index))
+        self.assertEqual(
+            [MISSING, timestamp_ns(at(0)), timestamp_ns(at(1)),
+             timestamp_ns(at(2)), MISSING],
+            list(table.start_ns))
+        self.assertEqual(
+            [MISSING, 2000000000, 3000000000, MISSING, MISSING],
+            list(table.durations()))
+        self.assertEqual(5, len(table))
+        self.assertEqual(None, table.attachments)
+
+    def test_listing_then_run(self):
+        output = BytesIO()
+        writer = StreamResultToBytes(output)
+        for test_id in ['a', 'b']:
+            writer.status(test_id=test_id, test_status='exists')
+        writer.status(test_id='a', test_status='inprogress', timestamp=at(0))
+        writer.status(test_id='a', test_status='success', timestamp=at(1))
+        table = subunit.RunTable.from_stream(BytesIO(output.getvalue()))
+        self.assertEqual([0, 1, 0], list(table.test_index))
+        self.assertEqual(
+            [STATUS_CODES['exists'], STATUS_CODES['exists'],
+             STATUS_CODES['success']],
+            list(table.status_code))
+        self.assertEqual(
+            [MISSING, MISSING, 1000000000], list(table.durations()))
+
+    def test_status_counts(self):
+        table = subunit.RunTable.from_stream(BytesIO(self.make_stream()))
+        self.assertEqual(
+            {None: 1, 'exists': 1, 'success': 1, 'fail': 1, 'skip': 1},
+            table.status_counts())
+
+    def test_attachment_offsets(self):
+        stream = self.make_stream()
+        table = subunit.RunTable.from_stream(
+            BytesIO(stream), record_attachments=True)
+        attachments = table.attachments
+        self.assertEqual(['log', 'traceback'], table.attachment_names)
+        self.assertEqual([1, 3], list(attachments['row']))
+        contents = [
+            stream[offset:offset + length] for offset, length in
+            zip(attachments['offset'], attachments['length'])]
+        self.assertEqual([b'hello', b'boom'], contents)
+
+    def test_as_stream_result(self):
+        table = subunit.RunTable(record_attachments=True)
+        table.status(test_id='a', file_name='log', file_bytes=b'x')
+        table.status(test_id='a', test_status='success')
+        self.assertEqual([STATUS_CODES['success']], list(table.status_code))
+        self.assertEqual([MISSING], list(table.attachments['offset']))
+
+    @skipIf(numpy is None, 'NumPy not available')
+    def test_to_numpy(self):
+        table = subunit.RunTable.from_stream(BytesIO(self.make_stream()))
+        columns = table.to_numpy()
+        self.assertEqual(
+            list(table.status_code), columns['status_code'].tolist())
+        self.assertEqual(list(table.stop_ns), columns['stop_ns'].tolist())
+
+    @skipIf(numpy is not None, 'NumPy available')
+    def test_to_numpy_without_numpy(self):
+        table = subunit.RunTable()
+        self.assertRaises(ImportError, table.to_numpy)
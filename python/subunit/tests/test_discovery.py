@@ -0,0 +1,199 @@
+#
+#  subunit: extensions to python unittest to get test results from subprocesses.
+#  Copyright (C) 2026 Subunit Contributors
+#
+#  Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+#  license at the users choice. A copy of both licenses are available in the
+#  project source as Apache-2.0 and BSD. You may not use this file except in
+#  compliance with one of these two licences.
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+#  license you chose for the specific language governing permissions and
+#  limitations under that license.
+#
+
+"""Tests for subunit.discovery and its use by subunit.run."""
+
+import io
+import json
+import os
+import sys
+import unittest
+
+from fixtures import TempDir
+from testtools import TestCase
+from testtools.testresult.doubles import StreamResult
+
+import subunit
+from subunit import run
+from subunit.discovery import DiscoveryCache
+
+
+MODULE = 'test_discovery_cache_sample'
+SOURCE = '''
+import unittest
+
+with open(%(marker)r, 'a') as marker:
+    marker.write('imported\\n')
+
+class Sample(unittest.TestCase):
+%(methods)s
+'''
+
+
+PACKAGE = 'test_discovery_cache_generated'
+PACKAGE_SOURCE = '''
+import copy
+import unittest
+
+from testtools import iterate_tests
+
+from . import test_plain
+
+
+def load_tests(loader, tests, pattern):
+    # Generate a variant of each test, as testscenarios does.
+    tests = unittest.TestSuite()
+    for test in iterate_tests(loader.loadTestsFromModule(test_plain)):
+        variant = copy.copy(test)
+        variant.id = lambda test=test: test.id() + '(variant)'
+        tests.addTest(variant)
+    return tests
+'''
+PLAIN_SOURCE = '''
+import unittest
+
+class Sample(unittest.TestCase):
+    def test_c(self):
+        pass
+'''
+
+
+class TestDiscoveryCache(TestCase):
+
+    def setUp(self):
+        super(TestDiscoveryCache, self).setUp()
+        self.root = self.useFixture(TempDir()).path
+        self.marker = os.path.join(self.root, 'marker')
+        self.cache = os.path.join(self.root, 'cache.json')
+        self.tests = os.path.join(self.root, 'tests')
+        os.mkdir(self.tests)
+        for name in (MODULE, PACKAGE, PACKAGE + '.test_plain'):
+            self.addCleanup(sys.modules.pop, name, None)
+        self.addCleanup(self.restore_path, list(sys.path))
+        self.write_module(['test_a', 'test_b'])
+
+    def restore_path(self, path):
+        sys.path[:] = path
+
+    def write_module(self, names, mtime=None):
+        path = os.path.join(self.tests, MODULE + '.py')
+        methods = ''.join('    def %s(self):\n        pass\n' % name
+            for name in names)
+        with open(path, 'w') as output:
+            output.write(SOURCE % {'marker': self.marker, 'methods': methods})
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+
+    def imports(self):
+        if not os.path.exists(self.marker):
+            return 0
+        with open(self.marker) as source:
+            return len(source.readlines())
+
+    def write_package(self):
+        package = os.path.join(self.tests, PACKAGE)
+        os.mkdir(package)
+        with open(os.path.join(package, '__init__.py'), 'w') as output:
+            output.write(PACKAGE_SOURCE)
+        with open(os.path.join(package, 'test_plain.py'), 'w') as output:
+            output.write(PLAIN_SOURCE)
+
+    def run_main(self, *argv):
+        for name in (MODULE, PACKAGE, PACKAGE + '.test_plain'):
+            sys.modules.pop(name, None)
+        # testtools.run only clears the shared loader's errors when running.
+        del unittest.defaultTestLoader.errors[:]
+        bytestream = io.BytesIO()
+        stream = io.TextIOWrapper(bytestream, encoding="utf8")
+        run.main(argv=['progName', 'discover', '-s', self.tests, '-t',
+            self.tests, '--discovery-cache', self.cache] + list(argv),
+            stdout=stream)
+        eventstream = StreamResult()
+        subunit.ByteStreamToStreamResult(io.BytesIO(
+            bytestream.getvalue())).run(eventstream)
+        return [(event[1].rsplit('.', 1)[1], event[2])
+            for event in eventstream._events if event[2] != 'inprogress']
+
+    def test_list_from_cache(self):
+        listed = [('test_a', 'exists'), ('test_b', 'exists')]
+        self.assertEqual(listed, self.run_main('--list'))
+        self.assertEqual(1, self.imports())
+        self.assertEqual(listed, self.run_main('--list'))
+        self.assertEqual(1, self.imports())
+
+    def test_changed_module_invalidates(self):
+        self.run_main('--list')
+        self.write_module(['test_a', 'test_b', 'test_c'],
+            mtime=os.path.getmtime(self.cache) + 10)
+        self.assertEqual([('test_a', 'exists'), ('test_b', 'exists'),
+            ('test_c', 'exists')], self.run_main('--list'))
+        self.assertEqual(2, self.imports())
+
+    def test_fixed_import_error(self):
+        path = os.path.join(self.tests, MODULE + '.py')
+        with open(path) as source:
+            fixed = source.read()
+        with open(path, 'w') as output:
+            output.write(fixed + 'syntax error\n')
+        # Listing reports the import error and exits.
+        self.assertRaises(SystemExit, self.run_main, '--list')
+        # Rewrite the module in place, which leaves its directory unchanged.
+        with open(path, 'w') as output:
+            output.write(fixed)
+        self.assertEqual([('test_a', 'exists'), ('test_b', 'exists')],
+            self.run_main('--list'))
+
+    def test_load_list_from_cache(self):
+        self.run_main('--list')
+        load_list = os.path.join(self.root, 'load-list')
+        with open(load_list, 'w') as output:
+            output.write(MODULE + '.Sample.test_b\n')
+        self.assertEqual([('test_b', 'exists'), ('test_b', 'success')],
+            self.run_main('--load-list', load_list))
+
+    def test_load_list_generated_tests(self):
+        # Loading the module of a test generated by its package's load_tests
+        # does not reproduce it, so the whole suite is loaded instead.
+        self.write_package()
+        self.run_main('--list')
+        load_list = os.path.join(self.root, 'load-list')
+        with open(load_list, 'w') as output:
+            output.write(PACKAGE + '.test_plain.Sample.test_c(variant)\n')
+            output.write(MODULE + '.Sample.test_b\n')
+        expected = [('test_c(variant)', 'exists'), ('test_b', 'exists'),
+            ('test_c(variant)', 'success'), ('test_b', 'success')]
+        self.assertEqual(expected, self.run_main('--load-list', load_list))
+        self.assertEqual([None], [module for test_id, module in
+            DiscoveryCache(self.cache).load(self.cache_key())[0]
+            if test_id.endswith('(variant)')])
+        self.assertEqual(expected, self.run_main('--load-list', load_list))
+
+    def cache_key(self):
+        with open(self.cache) as source:
+            return json.load(source)['key']
+
+    def test_key_mismatch(self):
+        cache = DiscoveryCache(self.cache)
+        cache.save({'names': ['a']}, [], [])
+        self.assertEqual(([], []), cache.load({'names': ['a']}))
+        self.assertEqual(None, cache.load({'names': ['b']}))
+
+    def test_missing_or_corrupt(self):
+        cache = DiscoveryCache(self.cache)
+        self.assertEqual(None, cache.load({}))
+        with open(self.cache, 'w') as output:
+            output.write('{')
+        self.assertEqual(None, cache.load({}))
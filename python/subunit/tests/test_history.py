@@ -0,0 +1,129 @@
+#
+#  subunit: extensions to python unittest to get test results from subprocesses.
+#  Copyright (C) 2026 Subunit Contributors
+#
+#  Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+#  license at the users choice. A copy of both licenses are available in the
+#  project source as Apache-2.0 and BSD. You may not use this file except in
+#  compliance with one of these two licences.
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+#  license you chose for the specific language governing permissions and
+#  limitations under that license.
+#
+
+"""Tests for subunit.history."""
+
+import json
+import os.path
+import subprocess
+import sys
+
+from fixtures import TempDir
+from testtools import TestCase
+from testtools.compat import BytesIO
+
+from subunit.history import HistoryStore
+from subunit.tests.streams import make_stream
+
+
+class TestHistoryStore(TestCase):
+
+    def setUp(self):
+        super(TestHistoryStore, self).setUp()
+        self.path = os.path.join(self.useFixture(TempDir()).path, 'history')
+
+    def add_runs(self, store, runs, revision=None):
+        for key, outcomes in runs:
+            store.add_run(key, BytesIO(make_stream(
+                [(test_id, status, None) for test_id, status in outcomes])),
+                revision)
+
+    def test_add_run_interns_ids(self):
+        store = HistoryStore(self.path)
+        self.add_runs(store, [
+            ('1', [('a', 'success'), ('b', 'fail')]),
+            ('2', [('c', 'skip'), ('a', 'success')]),
+            ])
+        self.assertEqual(['a', 'b', 'c'], sorted(store.ids))
+        index = dict((test_id, 1 << n) for n, test_id in enumerate(store.ids))
+        outcomes = [(passed, failed)
+            for run, passed, failed in store.iter_outcomes()]
+        self.assertEqual(
+            [(index['a'], index['b']),
+             (index['a'] | index['c'], index['c'])],
+            outcomes)
+
+    def test_add_run_is_incremental(self):
+        store = HistoryStore(self.path)
+        self.add_runs(store, [('1', [('a', 'success')])])
+        self.assertFalse(
+            store.add_run('1', BytesIO(make_stream([('a', 'fail', None)]))))
+        reopened = HistoryStore(self.path)
+        self.assertTrue('1' in reopened)
+        self.assertTrue(
+            reopened.add_run('2', BytesIO(make_stream([('a', 'fail', None)]))))
+        self.assertEqual(['1', '2'], [run['key'] for run in reopened.runs])
+        self.assertEqual(
+            [{'id': 'a', 'flips': 1, 'passes': 1, 'failures': 1}],
+            HistoryStore(self.path).flaky())
+
+    def test_flaky(self):
+        store = HistoryStore(self.path)
+        self.add_runs(store, [
+            ('1', [('a', 'success'), ('b', 'success'), ('c', 'fail')]),
+            ('2', [('a', 'fail'), ('b', 'success'), ('c', 'fail')]),
+            # b not run, a skipped: neither counts as a flip or resets.
+            ('3', [('a', 'skip'), ('c', 'fail')]),
+            ('4', [('a', 'success'), ('b', 'success'), ('c', 'fail')]),
+            ])
+        self.assertEqual(
+            [{'id': 'a', 'flips': 2, 'passes': 2, 'failures': 1}],
+            store.flaky())
+        self.assertEqual([], store.flaky(min_flips=3))
+
+    def test_revision_changes_are_not_flips(self):
+        store = HistoryStore(self.path)
+        self.add_runs(store, [('1', [('a', 'success')])], 'r1')
+        self.add_runs(store, [('2', [('a', 'fail')])], 'r2')
+        self.add_runs(store, [('3', [('a', 'success')])], 'r2')
+        self.assertEqual(
+            [{'id': 'a', 'flips': 1, 'passes': 2, 'failures': 1}],
+            store.flaky())
+
+    def test_many_tests(self):
+        store = HistoryStore(self.path)
+        ids = ['test%d' % n for n in range(1000)]
+        self.add_runs(store, [
+            ('1', [(test_id, 'success') for test_id in ids]),
+            ('2', [(test_id, 'fail' if test_id == 'test999' else 'success')
+                for test_id in ids]),
+            ])
+        self.assertEqual(['test999'],
+            [test['id'] for test in HistoryStore(self.path).flaky()])
+
+
+class TestFlakyCommand(TestCase):
+
+    def test_json(self):
+        root = self.useFixture(TempDir()).path
+        for name, status in [('run-1', 'success'), ('run-2', 'fail')]:
+            with open(os.path.join(root, name), 'wb') as target:
+                target.write(make_stream([('a', status, None)]))
+        script_path = os.path.join(
+            os.path.dirname(os.path.dirname(os.path.dirname(
+                os.path.dirname(os.path.abspath(__file__))))),
+            'filters', 'subunit-flaky')
+        command = [sys.executable, script_path, '--json',
+            '--store', os.path.join(root, 'history'),
+            os.path.join(root, 'run-*')]
+        ps = subprocess.Popen(
+            command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        out, err = ps.communicate()
+        self.assertEqual(0, ps.returncode, err)
+        self.assertEqual(
+            {'runs': 2,
+             'tests': [{'id': 'a', 'flips': 1, 'passes': 1, 'failures': 1}]},
+            json.loads(out.decode('utf8')))
@@ -0,0 +1,125 @@
+#
+#  subunit: extensions to python unittest to get test results from subprocesses.
+#  Copyright (C) 2026 Subunit Contributors
+#
+#  Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+#  license at the users choice. A copy of both licenses are available in the
+#  project source as Apache-2.0 and BSD. You may not use this file except in
+#  compliance with one of these two licences.
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+#  license you chose for the specific language governing permissions and
+#  limitations under that license.
+#
+
+"""Tests for subunit.memory."""
+
+import io
+import json
+import unittest
+
+from testtools import skipIf, TestCase
+from testtools.testresult.doubles import ExtendedTestResult
+
+import subunit
+from subunit import memory, run
+from subunit.memory import AllocationDecorator, AllocationRanking
+from subunit.v2 import StreamResultToBytes
+
+
+# Kept alive by the test that allocates it.
+_kept = []
+
+
+def allocate():
+    _kept.append(b'x' * 100000)
+
+
+@skipIf(memory.tracemalloc is None, 'tracemalloc not available')
+class TestAllocationDecorator(TestCase):
+
+    def setUp(self):
+        super(TestAllocationDecorator, self).setUp()
+        self.addCleanup(_kept.__delitem__, slice(None))
+        self.tracing = memory.tracemalloc.is_tracing()
+
+    def run_test(self, body):
+        log = ExtendedTestResult()
+        result = AllocationDecorator(log, limit=3)
+        test = subunit.RemotedTestCase('foo')
+        result.startTestRun()
+        result.startTest(test)
+        body()
+        result.addSuccess(test)
+        result.stopTest(test)
+        result.stopTestRun()
+        content = log._events[2][2]['allocations']
+        return json.loads(b''.join(content.iter_bytes()).decode('utf8'))
+
+    def test_kept_allocation_reported(self):
+        report = self.run_test(allocate)
+        self.assertTrue(report['net_bytes'] >= 100000)
+        self.assertTrue(report['peak_bytes'] >= 100000)
+        self.assertTrue(len(report['top']) <= 3)
+        site = report['top'][0]
+        self.assertTrue(site['bytes'] >= 100000)
+        self.assertIn('test_memory.py', site['site'])
+
+    def test_freed_allocation_not_kept(self):
+        report = self.run_test(lambda: b'x' * 100000)
+        self.assertTrue(report['net_bytes'] < 100000)
+        self.assertTrue(report['peak_bytes'] >= 100000)
+
+    def test_tracing_restored(self):
+        self.run_test(lambda: None)
+        self.assertEqual(self.tracing, memory.tracemalloc.is_tracing())
+
+
+class TestAllocationRanking(TestCase):
+
+    def report(self, ranking, test_id, net_bytes, peak_bytes, sites):
+        data = json.dumps({'net_bytes': net_bytes, 'peak_bytes': peak_bytes,
+            'blocks': 1, 'top': [{'site': site, 'bytes': size, 'blocks': 1}
+                for site, size in sites]}).encode('utf8')
+        ranking.status(test_id=test_id, file_name='allocations',
+            file_bytes=data[:10], mime_type='application/json')
+        ranking.status(test_id=test_id, file_name='allocations',
+            file_bytes=data[10:], eof=True, mime_type='application/json')
+
+    def test_ranking(self):
+        ranking = AllocationRanking()
+        self.report(ranking, 'a', 100, 200, [('a.py:1', 100)])
+        self.report(ranking, 'b', 300, 300, [('b.py:1', 300)])
+        self.report(ranking, 'a', 250, 100, [('a.py:1', 50), ('a.py:2', 200)])
+        ranking.status(test_id='a', file_name='log', file_bytes=b'x',
+            eof=True, mime_type='text/plain')
+        self.assertEqual([
+            ('a', {'runs': 2, 'net_bytes': 350, 'peak_bytes': 200,
+                'sites': {'a.py:1': 150, 'a.py:2': 200}}),
+            ('b', {'runs': 1, 'net_bytes': 300, 'peak_bytes': 300,
+                'sites': {'b.py:1': 300}}),
+            ], ranking.ranking())
+
+    @skipIf(memory.tracemalloc is None, 'tracemalloc not available')
+    def test_from_run(self):
+
+        class Sample(TestCase):
+            def test_keeps(self):
+                allocate()
+            def test_frees(self):
+                pass
+
+        self.addCleanup(_kept.__delitem__, slice(None))
+        stream = io.BytesIO()
+        runner = run.SubunitTestRunner(stream=stream,
+            trace_allocations=True)
+        runner._run(unittest.TestSuite(
+            [Sample('test_frees'), Sample('test_keeps')]),
+            StreamResultToBytes(stream))
+        ranking = AllocationRanking()
+        subunit.ByteStreamToStreamResult(
+            io.BytesIO(stream.getvalue())).run(ranking)
+        self.assertEqual(['test_keeps', 'test_frees'],
+            [test_id.rsplit('.', 1)[1] for test_id, _ in ranking.ranking()])
@@ -0,0 +1,122 @@
+#
+#  subunit: extensions to python unittest to get test results from subprocesses.
+#  Copyright (C) 2026 Subunit Contributors
+#
+#  Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+#  license at the users choice. A copy of both licenses are available in the
+#  project source as Apache-2.0 and BSD. You may not use this file except in
+#  compliance with one of these two licences.
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+#  license you chose for the specific language governing permissions and
+#  limitations under that license.
+#
+
+"""Tests for subunit.merge."""
+
+import os.path
+import subprocess
+import sys
+
+from fixtures import TempDir
+from testtools import TestCase
+from testtools.compat import BytesIO
+from testtools.testresult.doubles import StreamResult
+
+from subunit import merge
+from subunit.merge import merge_streams
+from subunit.tests.streams import make_stream
+from subunit.v2 import ByteStreamToStreamResult
+
+
+def successes(events):
+    """Return a v2 stream of (test_id, seconds, route_code) successes."""
+    return make_stream([(test_id, 'success', route_code, seconds)
+        for test_id, seconds, route_code in events])
+
+
+class TestMergeStreams(TestCase):
+
+    def merge(self, streams, **kwargs):
+        result = StreamResult()
+        merge_streams(
+            [BytesIO(successes(events)) for events in streams], result,
+            **kwargs)
+        return [(event[1], event[9]) for event in result._events]
+
+    def test_orders_by_timestamp(self):
+        self.assertEqual(
+            [('a1', None), ('b1', None), ('a2', None), ('b2', None),
+             ('b3', None)],
+            self.merge([
+                [('a1', 1, None), ('a2', 3, None)],
+                [('b1', 2, None), ('b2', 4, None), ('b3', 5, None)],
+                ]))
+
+    def test_untimestamped_events_keep_their_place(self):
+        # a2 has no timestamp so sorts as if at a1's time, and stays ahead
+        # of a3 even though b1 is earlier than a3.
+        self.assertEqual(
+            ['x', 'a1', 'a2', 'b1', 'a3'],
+            [test_id for test_id, _ in self.merge([
+                [('a1', 1, None), ('a2', None, None), ('a3', 5, None)],
+                [('x', None, None), ('b1', 2, None)],
+                ])])
+
+    def test_equal_timestamps_in_input_order(self):
+        self.assertEqual(
+            ['a', 'b', 'c'],
+            [test_id for test_id, _ in self.merge([
+                [('a', 1, None)], [('b', 1, None)], [('c', 1, None)]])])
+
+    def test_prefix_routes(self):
+        self.assertEqual(
+            [('a', '0/3'), ('b', '1')],
+            self.merge(
+                [[('a', 1, '3')], [('b', 2, None)]], route_mode='prefix'))
+
+    def test_assign_routes(self):
+        self.assertEqual(
+            [('a', 'x'), ('b', 'y')],
+            self.merge([[('a', 1, '3')], [('b', 2, None)]],
+                route_mode='assign', labels=['x', 'y']))
+
+    def test_many_batches(self):
+        self.patch(merge, 'BATCH_SIZE', 2)
+        left = [('a%d' % n, n * 2, None) for n in range(20)]
+        right = [('b%d' % n, n * 2 + 1, None) for n in range(20)]
+        merged = [test_id for test_id, _ in self.merge(
+            [left, right], queue_size=1)]
+        expected = []
+        for n in range(20):
+            expected.extend(['a%d' % n, 'b%d' % n])
+        self.assertEqual(expected, merged)
+
+
+class TestMergeCommand(TestCase):
+
+    def test_merge_files(self):
+        root = self.useFixture(TempDir()).path
+        paths = []
+        for name, events in [
+            ('one', [('a1', 1, '0'), ('a2', 3, '0')]),
+            ('two', [('b1', 2, '0')])]:
+            paths.append(os.path.join(root, name))
+            with open(paths[-1], 'wb') as target:
+                target.write(successes(events))
+        script_path = os.path.join(
+            os.path.dirname(os.path.dirname(os.path.dirname(
+                os.path.dirname(os.path.abspath(__file__))))),
+            'filters', 'subunit-merge')
+        ps = subprocess.Popen(
+            [sys.executable, script_path, '--prefix-routes'] + paths,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        out, err = ps.communicate()
+        self.assertEqual(0, ps.returncode, err)
+        result = StreamResult()
+        ByteStreamToStreamResult(BytesIO(out)).run(result)
+        self.assertEqual(
+            [('a1', '0/0'), ('b1', '1/0'), ('a2', '0/0')],
+            [(event[1], event[9]) for event in result._events])
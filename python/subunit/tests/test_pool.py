@@ -0,0 +1,88 @@
+#
+#  subunit: extensions to python unittest to get test results from subprocesses.
+#  Copyright (C) 2026 Subunit Contributors
+#
+#  Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+#  license at the users choice. A copy of both licenses are available in the
+#  project source as Apache-2.0 and BSD. You may not use this file except in
+#  compliance with one of these two licences.
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+#  license you chose for the specific language governing permissions and
+#  limitations under that license.
+#
+
+"""Tests for subunit.pool."""
+
+import os
+import time
+import unittest
+
+from testtools import skipIf, TestCase
+from testtools.testresult.doubles import ExtendedTestResult
+
+import subunit
+from subunit.pool import IsolatedPool
+
+
+def started(result):
+    return [event[1].id().rsplit('.', 1)[1] for event in result._events
+        if event[0] == 'startTest']
+
+
+@skipIf(os.name != "posix", "Need a posix system for forking tests")
+class TestIsolatedPool(TestCase):
+
+    class Sample(subunit.IsolatedTestCase):
+
+        RAN = False
+
+        def test_pass(self):
+            TestIsolatedPool.Sample.RAN = True
+
+        def test_fail(self):
+            self.fail('failed')
+
+        def test_sleep(self):
+            time.sleep(0.3)
+
+        def test_crash(self):
+            os._exit(3)
+
+    def test_results_in_order(self):
+        names = ['test_sleep', 'test_pass', 'test_fail', 'test_pass']
+        result = ExtendedTestResult()
+        IsolatedPool(concurrency=3).run(
+            [self.Sample(name) for name in names], result)
+        self.assertEqual(names, started(result))
+        self.assertEqual(['addSuccess', 'addSuccess', 'addFailure',
+            'addSuccess'], [event[0] for event in result._events
+            if event[0].startswith('add')])
+        self.assertFalse(self.Sample.RAN)
+
+    def test_runs_concurrently(self):
+        result = unittest.TestResult()
+        start = time.time()
+        IsolatedPool(concurrency=4).run(
+            [self.Sample('test_sleep') for _ in range(4)], result)
+        self.assertEqual(4, result.testsRun)
+        self.assertTrue(time.time() - start < 1.0)
+
+    def test_crash_is_an_error(self):
+        result = unittest.TestResult()
+        IsolatedPool(concurrency=2).run(
+            [self.Sample('test_crash'), self.Sample('test_pass')], result)
+        self.assertEqual(2, result.testsRun)
+        self.assertEqual(1, len(result.errors))
+        self.assertEqual([], result.failures)
+
+    def test_failfast(self):
+        result = unittest.TestResult()
+        result.failfast = True
+        IsolatedPool(concurrency=1).run(
+            [self.Sample('test_fail'), self.Sample('test_pass'),
+                self.Sample('test_pass')], result)
+        self.assertEqual(1, result.testsRun)
+        self.assertEqual(1, len(result.failures))
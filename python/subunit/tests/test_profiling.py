@@ -0,0 +1,148 @@
+#
+#  subunit: extensions to python unittest to get test results from subprocesses.
+#  Copyright (C) 2026 Subunit Contributors
+#
+#  Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+#  license at the users choice. A copy of both licenses are available in the
+#  project source as Apache-2.0 and BSD. You may not use this file except in
+#  compliance with one of these two licences.
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+#  license you chose for the specific language governing permissions and
+#  limitations under that license.
+#
+
+"""Tests for subunit.profiling."""
+
+import io
+import marshal
+import sys
+import unittest
+
+from testtools import TestCase
+from testtools.testresult.doubles import ExtendedTestResult
+
+import subunit
+from subunit import run
+from subunit.profiling import (
+    merge_stats,
+    ProfileCollector,
+    ProfilingDecorator,
+    )
+from subunit.v2 import StreamResultToBytes
+
+
+def work():
+    return sum(range(1000))
+
+
+class TestProfilingDecorator(TestCase):
+
+    def run_test(self, patterns=None):
+        log = ExtendedTestResult()
+        result = ProfilingDecorator(log, patterns)
+        test = subunit.RemotedTestCase('mylib.test_foo')
+        result.startTest(test)
+        work()
+        result.addSuccess(test)
+        result.stopTest(test)
+        # No details are passed on for tests that were not profiled.
+        return (log._events[1][2:] or [None])[0]
+
+    def test_profile_attached(self):
+        details = self.run_test()
+        content = details['profile']
+        self.assertEqual('application/x-python-pstats',
+            repr(content.content_type))
+        stats = marshal.loads(b''.join(content.iter_bytes()))
+        self.assertIn('work', [func[2] for func in stats])
+
+    def test_patterns(self):
+        self.assertIn('profile', self.run_test(['mylib.*']))
+        self.assertIsNone(self.run_test(['other.*']))
+
+    def test_unreported_profile_stopped(self):
+        result = ProfilingDecorator(ExtendedTestResult())
+        test = subunit.RemotedTestCase('mylib.test_foo')
+        result.startTest(test)
+        self.assertIsNotNone(sys.getprofile())
+        result.stopTest(test)
+        self.assertIsNone(sys.getprofile())
+
+
+class TestMergeStats(TestCase):
+
+    def test_merge(self):
+        func = ('foo.py', 1, 'foo')
+        caller = ('bar.py', 2, 'bar')
+        target = {func: (1, 1, 0.5, 1.0, {caller: (1, 1, 0.5, 1.0)})}
+        merge_stats(target, {
+            func: (2, 2, 0.25, 0.5, {caller: (2, 2, 0.25, 0.5)}),
+            caller: (1, 1, 0.0, 1.5, {}),
+            })
+        self.assertEqual({
+            func: (3, 3, 0.75, 1.5, {caller: (3, 3, 0.75, 1.5)}),
+            caller: (1, 1, 0.0, 1.5, {}),
+            }, target)
+
+
+class TestProfileCollector(TestCase):
+
+    def test_merges_chunked_attachments(self):
+        func = ('foo.py', 1, 'foo')
+        data = marshal.dumps({func: (1, 1, 0.5, 1.0, {})})
+        collector = ProfileCollector()
+        for test_id in ('a', 'b'):
+            collector.status(test_id=test_id, file_name='profile',
+                file_bytes=data[:5], mime_type='application/x-python-pstats')
+            collector.status(test_id=test_id, file_name='profile',
+                file_bytes=data[5:], eof=True,
+                mime_type='application/x-python-pstats')
+            collector.status(test_id=test_id, file_name='log',
+                file_bytes=b'foo', eof=True, mime_type='text/plain')
+        self.assertEqual(2, collector.profiles)
+        self.assertEqual({func: (2, 2, 1.0, 2.0, {})}, collector.stats)
+
+    def test_from_run(self):
+
+        class Sample(TestCase):
+            def test_1(self):
+                work()
+            def test_2(self):
+                work()
+
+        suite = unittest.TestSuite(
+            [Sample('test_1'), Sample('test_2')])
+        stream = io.BytesIO()
+        runner = run.SubunitTestRunner(stream=stream,
+            profile_filter=['*test_2'])
+        runner._run(suite, StreamResultToBytes(stream))
+        collector = ProfileCollector()
+        subunit.ByteStreamToStreamResult(
+            io.BytesIO(stream.getvalue())).run(collector)
+        self.assertEqual(1, collector.profiles)
+        output = io.StringIO() if str is not bytes else io.BytesIO()
+        collector.pstats(output).print_stats()
+        self.assertIn('work', output.getvalue())
+
+    def test_other_measurements_not_profiled(self):
+
+        class Sample(TestCase):
+            def test_1(self):
+                work()
+
+        stream = io.BytesIO()
+        runner = run.SubunitTestRunner(stream=stream, profile_tests=True,
+            resource_usage=True, trace_allocations=True, test_timeout=60)
+        runner._run(Sample('test_1'), StreamResultToBytes(stream))
+        collector = ProfileCollector()
+        subunit.ByteStreamToStreamResult(
+            io.BytesIO(stream.getvalue())).run(collector)
+        self.assertEqual(1, collector.profiles)
+        functions = list(collector.stats)
+        self.assertIn('work', [func[2] for func in functions])
+        self.assertEqual([], [func for func in functions
+            if func[0].endswith('memory.py') or 'getrusage' in func[2] or
+                'take_snapshot' in func[2]])
@@ -0,0 +1,68 @@
+#
+#  subunit: extensions to python unittest to get test results from subprocesses.
+#  Copyright (C) 2026 Subunit Contributors
+#
+#  Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+#  license at the users choice. A copy of both licenses are available in the
+#  project source as Apache-2.0 and BSD. You may not use this file except in
+#  compliance with one of these two licences.
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+#  license you chose for the specific language governing permissions and
+#  limitations under that license.
+#
+
+"""Tests for subunit.ring."""
+
+import os
+
+from testtools import skipIf, TestCase
+
+from subunit.ring import SharedRing, STORES_ORDERED
+
+
+def lines(count):
+    return [('line %d\n' % index).encode('ascii') for index in range(count)]
+
+
+@skipIf(os.name != "posix", "Need a posix system for forking tests")
+@skipIf(not STORES_ORDERED, "The ring needs a CPU that orders stores")
+class TestSharedRing(TestCase):
+
+    def fork_writer(self, ring, chunks, exit_code=0):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                stream = ring.writer()
+                for chunk in chunks:
+                    stream.write(chunk)
+            finally:
+                os._exit(exit_code)
+        reader = ring.reader()
+        self.addCleanup(os.waitpid, pid, 0)
+        self.addCleanup(reader.close)
+        return reader
+
+    def test_lines_wrap_around_small_ring(self):
+        # Far more than fits in the ring, so the writer has to wait for the
+        # reader and the data wraps around many times.
+        ring = SharedRing(size=100)
+        reader = self.fork_writer(ring, lines(1000))
+        self.assertEqual(lines(1000), list(reader))
+
+    def test_write_larger_than_ring(self):
+        ring = SharedRing(size=64)
+        data = os.urandom(10000)
+        reader = self.fork_writer(ring, [data])
+        self.assertEqual(data[:10], reader.read(10))
+        self.assertEqual(data[10:], reader.read())
+        self.assertEqual(b'', reader.read())
+
+    def test_writer_exit_without_close_is_eof(self):
+        # The writer is not closed before exiting, as when a test crashes.
+        ring = SharedRing()
+        reader = self.fork_writer(ring, [b'partial'], exit_code=1)
+        self.assertEqual(b'partial', reader.readline())
+        self.assertEqual(b'', reader.readline())
@@ -14,17 +14,47 @@
 #  limitations under that license.
 #
 
+import argparse
 import io
+import os
+import subprocess
+import sys
 import unittest
 
-from testtools import PlaceHolder, TestCase
+import fixtures
+from fixtures import TempDir
+from testtools import PlaceHolder, skipIf, TestCase
 from testtools.compat import _b
 from testtools.matchers import StartsWith
 from testtools.testresult.doubles import StreamResult
 
 import subunit
 from subunit import run
-from subunit.run import SubunitTestRunner
+from subunit.run import parse_shard, SubunitTestRunner
+import subunit.test_results
+from subunit.tests.streams import make_timed_stream, parse_events, run_main
+from subunit.v2 import StreamResultToBytes
+
+
+class Samples(object):
+    # Not a TestCase, so that the loader leaves these to the tests below.
+
+    class Sample(TestCase):
+        def test_1(self):
+            pass
+        def test_2(self):
+            pass
+        def test_3(self):
+            pass
+
+
+SAMPLE = 'subunit.tests.test_run.Samples.Sample'
+
+
+def run_sample(argv):
+    """Run Samples.Sample with argv, returning (test, status, event)s."""
+    return [(event[1][len(SAMPLE) + 1:], event[2], event)
+        for event in run_main(argv + [SAMPLE])]
 
 
 class TestSubunitTestRunner(TestCase):
@@ -103,3 +133,152 @@ class TestSubunitTestRunner(TestCase):
                 argv=["progName", "subunit.tests.test_run.TestSubunitTestRunner.ExitingTest"],
                 stdout=stream)
         self.assertEqual(0, exc.args[0])
+
+
+class TestParallel(TestCase):
+
+    class Sample(TestCase):
+        def test_1(self):
+            pass
+        def test_2(self):
+            print('output from test_2')
+        def test_3(self):
+            1/0
+        def test_4(self):
+            pass
+
+    def sample_suite(self):
+        return unittest.TestLoader().loadTestsFromTestCase(self.Sample)
+
+    @skipIf(os.name != "posix", "Need a posix system for forking tests")
+    def test_runs_tests_in_workers(self):
+        events = run_main(["--parallel", "2",
+            "subunit.tests.test_run.TestParallel.Sample"])
+        prefix = 'subunit.tests.test_run.TestParallel.Sample.'
+        ids = [prefix + 'test_%d' % index for index in range(1, 5)]
+        self.assertEqual([(test_id, 'exists', None) for test_id in ids],
+            [(event[1], event[2], event[9]) for event in events[:4]])
+        outcomes = dict((event[1], (event[2], event[9])) for event in events
+            if event[2] in ('success', 'fail'))
+        self.assertEqual({
+            ids[0]: ('success', '0'),
+            ids[1]: ('success', '1'),
+            ids[2]: ('fail', '0'),
+            ids[3]: ('success', '1'),
+            }, outcomes)
+        output = b''.join(event[6] for event in events
+            if event[5] == 'stdout')
+        self.assertIn(b'output from test_2', output)
+
+    @skipIf(os.name != "posix", "Need a posix system for forking tests")
+    def test_worker_output_reaches_stream_from_command_line(self):
+        # main() wraps stdout in a buffered text stream, which the workers
+        # must flush before they exit.
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(
+            [os.path.dirname(os.path.dirname(subunit.__file__))] +
+            [path for path in [env.get('PYTHONPATH')] if path])
+        ps = subprocess.Popen([sys.executable, '-m', 'subunit.run',
+            '--parallel', '2', 'subunit.tests.test_run.TestParallel.Sample'],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env)
+        out, err = ps.communicate()
+        self.assertEqual(0, ps.returncode, err)
+        output = b''.join(event[6] for event in parse_events(out)
+            if event[5] == 'stdout')
+        self.assertIn(b'output from test_2', output)
+
+    @skipIf(os.name != "posix", "Need a posix system for forking tests")
+    def test_schedule_from(self):
+        prefix = 'subunit.tests.test_run.TestParallel.Sample.'
+        previous = os.path.join(self.useFixture(TempDir()).path, 'previous')
+        with open(previous, 'wb') as output:
+            output.write(make_timed_stream([(prefix + 'test_1', 9),
+                (prefix + 'test_2', 3), (prefix + 'test_3', 3),
+                (prefix + 'test_4', 2)]))
+        events = run_main(["--parallel", "2", "--schedule-from",
+            previous, "subunit.tests.test_run.TestParallel.Sample"])
+        routes = dict((event[1][len(prefix):], event[9]) for event in events
+            if event[2] in ('success', 'fail'))
+        self.assertEqual({'test_1': '0', 'test_2': '1', 'test_3': '1',
+            'test_4': '1'}, routes)
+
+    @skipIf(os.name != "posix", "Need a posix system for forking tests")
+    def test_more_workers_than_tests(self):
+        runner = SubunitTestRunner(stream=io.BytesIO(), parallel=8)
+        runner.run(self.sample_suite())
+        eventstream = StreamResult()
+        runner.stream.seek(0)
+        subunit.ByteStreamToStreamResult(runner.stream).run(eventstream)
+        routes = set(event[9] for event in eventstream._events
+            if event[2] == 'success')
+        self.assertEqual(set(['0', '1', '3']), routes)
+
+
+class TestShard(TestCase):
+
+    def run_shard(self, argv):
+        return [(test, status) for test, status, _ in run_sample(argv)
+            if status != 'inprogress']
+
+    def test_parse_shard(self):
+        self.assertEqual((1, 4), parse_shard('1/4'))
+        self.assertRaises(argparse.ArgumentTypeError, parse_shard, '4/4')
+        self.assertRaises(argparse.ArgumentTypeError, parse_shard, 'a/b')
+
+    def test_shard_lists_and_runs_only_its_tests(self):
+        self.assertEqual([('test_2', 'exists'), ('test_3', 'exists'),
+            ('test_2', 'success'), ('test_3', 'success')],
+            self.run_shard(['--shard', '1/2', '--shard-by', 'range']))
+
+    def test_shard_list(self):
+        self.assertEqual([('test_1', 'exists')],
+            self.run_shard(['--list', '--shard', '0/2', '--shard-by',
+                'range']))
+
+    def test_duration_needs_schedule_from(self):
+        stdout = self.useFixture(fixtures.StringStream('stdout'))
+        self.useFixture(fixtures.MonkeyPatch('sys.stdout', stdout.stream))
+        exc = self.assertRaises(SystemExit, self.run_shard,
+            ['--shard', '0/2', '--shard-by', 'duration'])
+        self.assertEqual((2,), exc.args)
+
+
+class TestFailingFrom(TestCase):
+
+    def setUp(self):
+        super(TestFailingFrom, self).setUp()
+        self.previous = os.path.join(
+            self.useFixture(TempDir()).path, 'previous')
+        with open(self.previous, 'wb') as output:
+            result = StreamResultToBytes(output)
+            result.status(test_id=SAMPLE + '.test_1', test_status='success')
+            result.status(test_id=SAMPLE + '.test_3', test_status='fail')
+
+    def run_tests(self, argv):
+        return [test for test, status, _ in run_sample(argv)
+            if status == 'success']
+
+    def test_failing_only(self):
+        self.assertEqual(['test_3'],
+            self.run_tests(['--failing-from', self.previous]))
+
+    def test_failed_first(self):
+        self.assertEqual(['test_3', 'test_1', 'test_2'], self.run_tests(
+            ['--failing-from', self.previous, '--failed-first']))
+
+    def test_failed_first_needs_failing_from(self):
+        stdout = self.useFixture(fixtures.StringStream('stdout'))
+        self.useFixture(fixtures.MonkeyPatch('sys.stdout', stdout.stream))
+        exc = self.assertRaises(SystemExit, self.run_tests,
+            ['--failed-first'])
+        self.assertEqual((2,), exc.args)
+
+
+class TestResourceUsage(TestCase):
+
+    def test_resource_usage_attached(self):
+        if subunit.test_results.resource is None:
+            self.skipTest('resource not available')
+        attachments = [event[5] for _, _, event in run_sample(
+            ['--resource-usage']) if event[5] is not None]
+        self.assertIn('resource-usage', attachments)
@@ -0,0 +1,145 @@
+#
+#  subunit: extensions to python unittest to get test results from subprocesses.
+#  Copyright (C) 2026 Subunit Contributors
+#
+#  Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+#  license at the users choice. A copy of both licenses are available in the
+#  project source as Apache-2.0 and BSD. You may not use this file except in
+#  compliance with one of these two licences.
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+#  license you chose for the specific language governing permissions and
+#  limitations under that license.
+#
+
+"""Tests for subunit.schedule."""
+
+from testtools import TestCase
+from testtools.compat import BytesIO
+
+from subunit.schedule import (
+    estimate_durations,
+    load_durations,
+    load_failing,
+    partition_ids,
+    SHARD_STRATEGIES,
+    shard_ids,
+    )
+from subunit.tests.streams import make_timed_stream
+from subunit.v2 import StreamResultToBytes
+
+
+class TestLoadDurations(TestCase):
+
+    def test_last_timed_execution(self):
+        source = BytesIO(make_timed_stream([('a', 1.5), ('b', 2), ('a', 3)]))
+        self.assertEqual({'a': 3.0, 'b': 2.0}, load_durations(source))
+
+    def test_untimed_tests_are_omitted(self):
+        output = BytesIO()
+        StreamResultToBytes(output).status(test_id='a', test_status='success')
+        output.seek(0)
+        self.assertEqual({}, load_durations(output))
+
+
+class TestLoadFailing(TestCase):
+
+    def test_last_final_status(self):
+        output = BytesIO()
+        result = StreamResultToBytes(output)
+        result.status(test_id='flaky', test_status='fail')
+        result.status(test_id='flaky', test_status='success')
+        result.status(test_id='fixed', test_status='success')
+        result.status(test_id='broken', test_status='inprogress')
+        result.status(test_id='broken', file_name='traceback',
+            file_bytes=b'x' * 100000, eof=True)
+        result.status(test_id='broken', test_status='fail')
+        result.status(test_id='surprise', test_status='uxsuccess')
+        result.status(test_id='listed', test_status='exists')
+        output.write(b'not subunit\n')
+        output.seek(0)
+        self.assertEqual(set(['broken', 'surprise']), load_failing(output))
+
+    def test_truncated(self):
+        output = BytesIO()
+        result = StreamResultToBytes(output)
+        result.status(test_id='broken', test_status='fail')
+        result.status(test_id='cut', test_status='fail')
+        self.assertEqual(set(['broken']),
+            load_failing(BytesIO(output.getvalue()[:-3])))
+
+
+class TestEstimateDurations(TestCase):
+
+    def test_known_durations(self):
+        durations = {'m.C.a': 1.0, 'm.C.b': 2.0}
+        self.assertEqual([2.0, 1.0],
+            estimate_durations(['m.C.b', 'm.C.a'], durations))
+
+    def test_class_then_module_then_all(self):
+        durations = {'m.C.a': 1.0, 'm.C.b': 3.0, 'm.D.a': 10.0, 'n.E.a': 6.0}
+        self.assertEqual([2.0, 14.0 / 3, 5.0], estimate_durations(
+            ['m.C.new', 'm.F.new', 'o.G.new'], durations))
+
+    def test_no_history(self):
+        self.assertEqual([1.0, 1.0], estimate_durations(['a', 'b'], {}))
+
+
+class TestPartitionIds(TestCase):
+
+    def test_round_robin(self):
+        self.assertEqual([['a', 'c', 'e'], ['b', 'd']],
+            partition_ids(['a', 'b', 'c', 'd', 'e'], 2))
+
+    def test_longest_first(self):
+        durations = {'a': 8.0, 'b': 7.0, 'c': 6.0, 'd': 5.0, 'e': 4.0}
+        partitions = partition_ids(['a', 'b', 'c', 'd', 'e'], 2, durations)
+        self.assertEqual([['a', 'd', 'e'], ['b', 'c']], partitions)
+        self.assertEqual([17.0, 13.0], [sum(durations[test_id]
+            for test_id in partition) for partition in partitions])
+
+    def test_balances_unknown_tests_by_siblings(self):
+        durations = {'slow.T.a': 10.0, 'fast.T.a': 1.0}
+        test_ids = ['slow.T.a', 'slow.T.b', 'fast.T.a', 'fast.T.b',
+            'fast.T.c']
+        self.assertEqual([['slow.T.a', 'fast.T.a', 'fast.T.c'],
+            ['slow.T.b', 'fast.T.b']],
+            partition_ids(test_ids, 2, durations))
+
+
+class TestShardIds(TestCase):
+
+    test_ids = ['pkg.mod%d.T.test_%d' % (index % 3, index)
+        for index in range(20)]
+
+    def test_every_test_in_one_shard(self):
+        durations = dict((test_id, float(index % 5))
+            for index, test_id in enumerate(self.test_ids))
+        for strategy in SHARD_STRATEGIES:
+            shards = [shard_ids(self.test_ids, index, 3, strategy, durations)
+                for index in range(3)]
+            self.assertEqual(sorted(self.test_ids),
+                sorted(sum(shards, [])), strategy)
+            for shard in shards:
+                self.assertEqual(
+                    sorted(shard, key=self.test_ids.index), shard, strategy)
+
+    def test_range(self):
+        self.assertEqual(['b', 'c'], shard_ids(['a', 'b', 'c'], 1, 2, 'range'))
+
+    def test_hash_is_stable(self):
+        # A test keeps its shard whatever the other tests are.
+        shard = shard_ids(self.test_ids, 1, 4, 'hash')
+        self.assertEqual(shard, [test_id for test_id in self.test_ids
+            if shard_ids([test_id], 1, 4, 'hash')])
+        self.assertEqual(['a', 'c'], shard_ids(['a', 'b', 'c'], 3, 4, 'hash'))
+
+    def test_duration(self):
+        self.assertEqual(['a'], shard_ids(['a', 'b', 'c'], 0, 2, 'duration',
+            {'a': 5.0, 'b': 2.0, 'c': 2.0}))
+
+    def test_bad_shard(self):
+        self.assertRaises(ValueError, shard_ids, ['a'], 2, 2)
+        self.assertRaises(ValueError, shard_ids, ['a'], 0, 2, 'colour')
@@ -0,0 +1,174 @@
+#
+#  subunit: extensions to python unittest to get test results from subprocesses.
+#  Copyright (C) 2026 Subunit Contributors
+#
+#  Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+#  license at the users choice. A copy of both licenses are available in the
+#  project source as Apache-2.0 and BSD. You may not use this file except in
+#  compliance with one of these two licences.
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+#  license you chose for the specific language governing permissions and
+#  limitations under that license.
+#
+
+"""Tests for subunit.sink."""
+
+import os.path
+import socket
+import threading
+
+from fixtures import TempDir
+from testtools import skipUnless, TestCase
+from testtools.compat import BytesIO
+from testtools.testresult.doubles import StreamResult
+
+from subunit.sink import SocketSink
+from subunit.v2 import ByteStreamToStreamResult, StreamResultToBytes
+
+
+class Server(object):
+    """A stand-in collector recording what each connection sends."""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.received = []
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def run(self):
+        while True:
+            try:
+                connection, _ = self.sock.accept()
+            except socket.error:
+                return
+            chunks = []
+            while True:
+                data = connection.recv(65536)
+                if not data:
+                    break
+                chunks.append(data)
+            connection.close()
+            self.received.append(b''.join(chunks))
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except socket.error:
+            pass
+        self.sock.close()
+        self.thread.join(10)
+
+
+def tcp_server():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(('127.0.0.1', 0))
+    sock.listen(5)
+    return Server(sock)
+
+
+def unix_server(path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    sock.listen(5)
+    return Server(sock)
+
+
+class FailingSocket(object):
+    """A connection which fails partway through its second send."""
+
+    def __init__(self, received, fail):
+        self.received = received
+        self.fail = fail
+        self.sends = 0
+
+    def sendall(self, data):
+        self.sends += 1
+        if self.fail and self.sends == 2:
+            raise socket.error('connection reset')
+        self.received.append(data)
+
+    def close(self):
+        pass
+
+
+class FlakySink(SocketSink):
+    """A SocketSink whose first connection drops."""
+
+    def __init__(self, *args, **kwargs):
+        self.received = []
+        super(FlakySink, self).__init__(*args, **kwargs)
+
+    def _connect(self):
+        self.received.append([])
+        self.connections += 1
+        return FailingSocket(self.received[-1], self.connections == 1)
+
+
+def test_ids(data):
+    result = StreamResult()
+    ByteStreamToStreamResult(BytesIO(data)).run(result)
+    return [event[1] for event in result._events]
+
+
+class TestSocketSink(TestCase):
+
+    def write_tests(self, sink, count):
+        result = StreamResultToBytes(sink)
+        for index in range(count):
+            result.status(test_id='test%d' % index, test_status='success')
+
+    def test_batches_to_tcp(self):
+        server = tcp_server()
+        self.addCleanup(server.close)
+        sink = SocketSink(server.sock.getsockname(), batch_size=100)
+        self.write_tests(sink, 50)
+        self.assertTrue(sink.close())
+        server.close()
+        self.assertEqual(1, sink.connections)
+        self.assertEqual(
+            ['test%d' % index for index in range(50)],
+            test_ids(b''.join(server.received)))
+
+    @skipUnless(getattr(socket, 'AF_UNIX', None), 'Unix sockets required')
+    def test_spools_until_collector_is_available(self):
+        path = os.path.join(self.useFixture(TempDir()).path, 'socket')
+        sink = SocketSink(path, max_memory=100, reconnect_delay=0.01,
+            max_reconnect_delay=0.05)
+        self.write_tests(sink, 20)
+        self.assertTrue(sink.spooled > 0)
+        self.assertEqual(0, sink.dropped)
+        server = unix_server(path)
+        self.addCleanup(server.close)
+        self.assertTrue(sink.close())
+        server.close()
+        self.assertEqual(
+            ['test%d' % index for index in range(20)],
+            test_ids(b''.join(server.received)))
+
+    def test_resends_whole_spooled_packets_after_reconnect(self):
+        # Spool everything, in batches cut inside the second packet.
+        sink = FlakySink(('127.0.0.1', 0), batch_size=30, max_memory=0,
+            reconnect_delay=0.01, flush_interval=10)
+        self.write_tests(sink, 20)
+        self.assertTrue(sink.close())
+        self.assertEqual(2, sink.connections)
+        ids = []
+        for received in sink.received:
+            # Each connection starts on a packet boundary.
+            ids.extend(test_ids(b''.join(received)))
+        self.assertEqual(['test%d' % index for index in range(20)], ids)
+
+    @skipUnless(getattr(socket, 'AF_UNIX', None), 'Unix sockets required')
+    def test_drops_beyond_spool(self):
+        path = os.path.join(self.useFixture(TempDir()).path, 'socket')
+        sink = SocketSink(path, max_memory=0, max_spool=100,
+            reconnect_delay=0.01)
+        self.write_tests(sink, 20)
+        self.assertTrue(sink.dropped > 0)
+        self.assertTrue(sink.spooled <= 100)
+        self.assertFalse(sink.close(timeout=0.05))
+        self.assertRaises(ValueError, sink.write, b'x')
@@ -0,0 +1,134 @@
+#
+#  subunit: extensions to python unittest to get test results from subprocesses.
+#  Copyright (C) 2026 Subunit Contributors
+#
+#  Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+#  license at the users choice. A copy of both licenses are available in the
+#  project source as Apache-2.0 and BSD. You may not use this file except in
+#  compliance with one of these two licences.
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+#  license you chose for the specific language governing permissions and
+#  limitations under that license.
+#
+
+"""Tests for subunit.split."""
+
+import os.path
+import subprocess
+import sys
+
+from fixtures import TempDir
+from testtools import TestCase
+from testtools.compat import BytesIO
+
+from subunit.split import (
+    route_code_key,
+    SizeShardKey,
+    split_stream,
+    TestIdPrefixKey,
+    )
+from subunit.tests.streams import make_stream, parse
+from subunit.v2 import ParseError
+
+
+class _Output(BytesIO):
+
+    def close(self):
+        self.closed_value = self.getvalue()
+        BytesIO.close(self)
+
+
+class TestSplitStream(TestCase):
+
+    def split_bytes(self, data, shard_key, **kwargs):
+        outputs = {}
+
+        def open_shard(key):
+            outputs[key] = _Output()
+            return outputs[key]
+        keys = split_stream(BytesIO(data), shard_key, open_shard, **kwargs)
+        self.assertEqual(sorted(keys, key=str), sorted(outputs, key=str))
+        return keys, dict((key, output.closed_value)
+            for key, output in outputs.items())
+
+    def split(self, data, shard_key, **kwargs):
+        keys, shards = self.split_bytes(data, shard_key, **kwargs)
+        return keys, dict((key, parse(shard))
+            for key, shard in shards.items())
+
+    def test_by_route_code(self):
+        events = [('a', 'inprogress', '0'), ('b', 'inprogress', '1'),
+            ('a', 'success', '0'), ('b', 'fail', '1'), ('c', 'skip', None)]
+        keys, shards = self.split(
+            make_stream(events), route_code_key, buffer_size=1)
+        self.assertEqual(['0', '1', None], keys)
+        self.assertEqual(events[0::2][:2], shards['0'])
+        self.assertEqual(events[1::2], shards['1'])
+        self.assertEqual([events[4]], shards[None])
+
+    def test_non_subunit_follows_previous_packet(self):
+        packet = make_stream([('a', 'success', '0')])
+        keys, shards = self.split_bytes(
+            b'start\n' + packet + b'out\n', route_code_key)
+        self.assertEqual([None, '0'], keys)
+        self.assertEqual({None: b'start\n', '0': packet + b'out\n'}, shards)
+
+    def test_truncated_input(self):
+        # The cut packet is reported as subunit-ls would show it.
+        data = make_stream([('a', 'success', '0'), ('b', 'success', '1')])
+        keys, shards = self.split(data[:-3], route_code_key)
+        self.assertEqual(['0', None], keys)
+        self.assertEqual([('a', 'success', '0')], shards['0'])
+        self.assertEqual([('subunit.parser', 'fail', None)], shards[None])
+        self.assertRaises(ParseError, self.split, data[:-3], route_code_key,
+            errors='strict')
+
+    def test_by_test_id_prefix(self):
+        events = [('p.m.C.test_a', 'success', None),
+            ('p.m.D.test_b', 'success', None),
+            ('p.m.C.test_c', 'success', None)]
+        keys, shards = self.split(make_stream(events), TestIdPrefixKey('class'))
+        self.assertEqual(['p.m.C', 'p.m.D'], keys)
+        self.assertEqual([events[0], events[2]], shards['p.m.C'])
+        keys, shards = self.split(
+            make_stream(events), TestIdPrefixKey('module'))
+        self.assertEqual(['p.m'], keys)
+
+    def test_by_size_keeps_tests_together(self):
+        events = [('a', 'inprogress', None), ('b', 'inprogress', None),
+            ('a', 'success', None), ('c', 'inprogress', None),
+            ('b', 'success', None), ('c', 'success', None)]
+        packet_size = len(make_stream(events[:1]))
+        keys, shards = self.split(
+            make_stream(events), SizeShardKey(packet_size * 2))
+        self.assertEqual([0, 1], keys)
+        self.assertEqual(
+            [events[0], events[1], events[2], events[4]], shards[0])
+        self.assertEqual([events[3], events[5]], shards[1])
+
+
+class TestSplitCommand(TestCase):
+
+    def test_split_by_route(self):
+        root = self.useFixture(TempDir()).path
+        script_path = os.path.join(
+            os.path.dirname(os.path.dirname(os.path.dirname(
+                os.path.dirname(os.path.abspath(__file__))))),
+            'filters', 'subunit-split')
+        ps = subprocess.Popen(
+            [sys.executable, script_path, '-d', root],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE)
+        out, err = ps.communicate(make_stream(
+            [('a', 'success', '0/1'), ('b', 'success', None)]))
+        self.assertEqual(0, ps.returncode, err)
+        paths = out.decode('utf8').splitlines()
+        self.assertEqual(
+            [os.path.join(root, 'shard-0%2F1.subunit'),
+             os.path.join(root, 'shard.subunit')],
+            paths)
+        with open(paths[0], 'rb') as shard:
+            self.assertEqual([('a', 'success', '0/1')], parse(shard.read()))
@@ -0,0 +1,192 @@
+#
+#  subunit: extensions to python unittest to get test results from subprocesses.
+#  Copyright (C) 2026 Subunit Contributors
+#
+#  Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+#  license at the users choice. A copy of both licenses are available in the
+#  project source as Apache-2.0 and BSD. You may not use this file except in
+#  compliance with one of these two licences.
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+#  license you chose for the specific language governing permissions and
+#  limitations under that license.
+#
+
+"""Tests for subunit.stats."""
+
+from testtools import TestCase
+from testtools.compat import StringIO
+
+from subunit.stats import DurationSketch, ExternalSorter, StreamStats, TopN
+from subunit.tests.streams import at
+
+
+class TestDurationSketch(TestCase):
+
+    def test_empty(self):
+        sketch = DurationSketch()
+        self.assertEqual(None, sketch.quantile(0.5))
+        self.assertEqual(None, sketch.mean)
+
+    def test_quantiles_within_accuracy(self):
+        sketch = DurationSketch(relative_accuracy=0.01)
+        for value in range(1, 1001):
+            sketch.add(value / 100.0)
+        for q, expected in [(0.5, 5.0), (0.9, 9.0), (0.99, 9.9)]:
+            self.assertTrue(
+                abs(sketch.quantile(q) - expected) <= expected * 0.02,
+                (q, sketch.quantile(q)))
+        self.assertEqual(0.01, sketch.min)
+        self.assertEqual(10.0, sketch.max)
+        self.assertEqual(1000, sketch.count)
+
+    def test_memory_is_bounded_by_range(self):
+        sketch = DurationSketch()
+        for _ in range(10000):
+            sketch.add(1.5)
+        self.assertEqual(1, len(sketch.buckets))
+
+    def test_zero_durations(self):
+        sketch = DurationSketch()
+        sketch.add(0.0)
+        sketch.add(0.0)
+        sketch.add(1.0)
+        self.assertEqual(0.0, sketch.quantile(0.5))
+
+    def test_merge(self):
+        left = DurationSketch()
+        right = DurationSketch()
+        both = DurationSketch()
+        for value in range(1, 50):
+            left.add(value)
+            both.add(value)
+        for value in range(50, 100):
+            right.add(value)
+            both.add(value)
+        left.merge(right)
+        self.assertEqual(both.buckets, left.buckets)
+        self.assertEqual(both.count, left.count)
+        self.assertEqual(both.quantile(0.9), left.quantile(0.9))
+        self.assertEqual((1, 99), (left.min, left.max))
+
+    def test_merge_different_accuracy(self):
+        self.assertRaises(
+            ValueError, DurationSketch(0.01).merge, DurationSketch(0.02))
+
+
+class TestTopN(TestCase):
+
+    def test_keeps_largest(self):
+        top = TopN(2)
+        for key, item in [(1, 'a'), (5, 'b'), (3, 'c'), (4, 'd')]:
+            top.push(key, item)
+        self.assertEqual([(5, 'b'), (4, 'd')], top.items())
+
+    def test_zero(self):
+        top = TopN(0)
+        top.push(1, 'a')
+        self.assertEqual([], top.items())
+
+    def test_merge(self):
+        left = TopN(2)
+        left.push(1, 'a')
+        left.push(3, 'b')
+        right = TopN(2)
+        right.push(2, 'c')
+        right.push(4, 'd')
+        left.merge(right)
+        self.assertEqual([(4, 'd'), (3, 'b')], left.items())
+
+
+class TestExternalSorter(TestCase):
+
+    def test_sorts_in_memory(self):
+        sorter = ExternalSorter()
+        for key, item in [(3, 'c'), (1, 'a'), (2, 'b')]:
+            sorter.add(key, item)
+        self.assertEqual([(1, 'a'), (2, 'b'), (3, 'c')], list(sorter.sorted()))
+
+    def test_sorts_across_runs(self):
+        sorter = ExternalSorter(buffer_size=2)
+        keys = [5, 3, 9, 1, 7, 2, 8]
+        for key in keys:
+            sorter.add(key, 'item%d' % key)
+        self.assertEqual(3, len(sorter._runs))
+        self.assertEqual(
+            [(key, 'item%d' % key) for key in sorted(keys)],
+            list(sorter.sorted()))
+        sorter.close()
+        self.assertEqual([], sorter._runs)
+
+
+class TestStreamStats(TestCase):
+
+    def run_events(self, stats):
+        stats.startTestRun()
+        stats.status(test_id='a', test_status='exists')
+        stats.status(test_id='a', test_status='inprogress', timestamp=at(0),
+            route_code='0')
+        stats.status(test_id='b', test_status='inprogress', timestamp=at(0),
+            route_code='1')
+        stats.status(test_id='a', file_name='log', file_bytes=b'x',
+            timestamp=at(1), route_code='0')
+        stats.status(test_id='a', test_status='success', timestamp=at(2),
+            route_code='0')
+        stats.status(test_id='b', test_status='fail', timestamp=at(4),
+            route_code='1')
+        stats.status(test_id='c', test_status='skip')
+        stats.stopTestRun()
+
+    def test_counts_and_durations(self):
+        stats = StreamStats()
+        self.run_events(stats)
+        self.assertEqual(
+            {'exists': 1, 'success': 1, 'fail': 1, 'skip': 1},
+            stats.status_counts)
+        self.assertEqual(3, stats.total_tests)
+        self.assertEqual(2, stats.durations.count)
+        self.assertEqual(4.0, stats.wall_clock)
+        self.assertEqual([(4.0, 'b'), (2.0, 'a')], stats.slowest.items())
+        self.assertEqual({}, stats._active)
+
+    def test_as_dict(self):
+        stats = StreamStats(slowest=1)
+        self.run_events(stats)
+        summary = stats.as_dict()
+        self.assertEqual(6.0, summary['run_time'])
+        self.assertEqual([{'id': 'b', 'duration': 4.0}], summary['slowest'])
+        self.assertEqual(
+            {'0': {'tests': 1, 'busy': 2.0, 'utilisation': 0.5},
+             '1': {'tests': 1, 'busy': 4.0, 'utilisation': 1.0},
+             '': {'tests': 1, 'busy': 0.0, 'utilisation': 0.0}},
+            summary['routes'])
+
+    def test_merge(self):
+        stats = StreamStats()
+        self.run_events(stats)
+        other = StreamStats()
+        self.run_events(other)
+        stats.merge(other)
+        self.assertEqual(6, stats.total_tests)
+        self.assertEqual(4, stats.durations.count)
+        self.assertEqual([2, 4.0], stats.routes['0'])
+
+    def test_format_text(self):
+        stats = StreamStats()
+        self.run_events(stats)
+        output = StringIO()
+        stats.format_text(output)
+        self.assertEqual(
+            "Wall clock:        4.000s\n"
+            "Run time:          6.000s\n"
+            "Durations:     p50 2.000s  p90 4.000s  p99 4.000s  max 4.000s\n"
+            "Slowest tests:\n"
+            "      4.000s b\n"
+            "      2.000s a\n"
+            "Workers:\n"
+            "  -            1 tests     0.000s   0.0% busy\n"
+            "  0            1 tests     2.000s  50.0% busy\n"
+            "  1            1 tests     4.000s 100.0% busy\n",
+            output.getvalue())
@@ -25,6 +25,8 @@ import unittest
 
 from testtools import TestCase
 from testtools.compat import _b, BytesIO
+from testtools.content import Content
+from testtools.content_type import UTF8_TEXT
 from testtools.testresult.doubles import ExtendedTestResult, StreamResult
 
 import subunit
@@ -296,6 +298,71 @@ xfail todo
              ('stopTest', 'foo - renamed')],
             [(ev[0], ev[1].id()) for ev in result._events])
 
+    def test_large_details_are_spooled(self):
+        result = ExtendedTestResult()
+        result_filter = TestResultFilter(
+            result, filter_success=False, max_buffered_bytes=10)
+        test = subunit.RemotedTestCase('foo')
+        small = Content(UTF8_TEXT, lambda: [b'small'])
+        large = Content(UTF8_TEXT, lambda: [b'large ' * 10, b'content'])
+        result_filter.startTest(test)
+        result_filter.addFailure(
+            test, details={'small': small, 'large': large})
+        buffered = result_filter.decorated._buffered_calls
+        self.assertIsNotNone(buffered._spool)
+        self.assertEqual(5, buffered._held_bytes)
+        result_filter.stopTest(test)
+        self.assertEqual(
+            [('startTest', test),
+             ('addFailure', test, {'small': small, 'large': large}),
+             ('stopTest', test)],
+            result._events)
+
+    def test_spool_is_reused(self):
+        texts = []
+        class Result(ExtendedTestResult):
+            def addFailure(self, test, err=None, details=None):
+                texts.append(details['log'].as_text())
+        result_filter = TestResultFilter(
+            Result(), filter_success=False, max_buffered_bytes=10)
+        buffered = result_filter.decorated._buffered_calls
+        spools = []
+        for name in ['first', 'second']:
+            test = subunit.RemotedTestCase(name)
+            result_filter.startTest(test)
+            result_filter.addFailure(test, details={'log': Content(
+                UTF8_TEXT, lambda name=name: [name.encode('utf8') * 10])})
+            spools.append(buffered._spool)
+            result_filter.stopTest(test)
+        self.assertEqual(['first' * 10, 'second' * 10], texts)
+        self.assertIs(spools[0], spools[1])
+        spools[1].seek(0, 2)
+        self.assertEqual(len('second' * 10), spools[1].tell())
+
+    def test_forwarded_spooled_details_survive_later_spills(self):
+        result = ExtendedTestResult()
+        result_filter = TestResultFilter(
+            result, filter_success=False, max_buffered_bytes=10)
+        for name in ['first', 'second']:
+            test = subunit.RemotedTestCase(name)
+            result_filter.startTest(test)
+            result_filter.addFailure(test, details={'log': Content(
+                UTF8_TEXT, lambda name=name: [name.encode('utf8') * 10])})
+            result_filter.stopTest(test)
+        self.assertEqual('first' * 10, result._events[1][2]['log'].as_text())
+        self.assertEqual('second' * 10, result._events[4][2]['log'].as_text())
+
+    def test_filtered_tests_discard_buffer(self):
+        result = ExtendedTestResult()
+        result_filter = TestResultFilter(result, max_buffered_bytes=0)
+        test = subunit.RemotedTestCase('foo')
+        result_filter.startTest(test)
+        result_filter.addSuccess(
+            test, details={'log': Content(UTF8_TEXT, lambda: [b'log'])})
+        result_filter.stopTest(test)
+        self.assertEqual([], result._events)
+        self.assertEqual(0, len(result_filter.decorated._buffered_calls))
+
     if sys.version_info < (2, 7):
         # These tests require Python >=2.7.
         del test_fixup_expected_failures, test_fixup_expected_errors, test_fixup_unexpected_success
@@ -350,6 +417,20 @@ class TestFilterCommand(TestCase):
         ids = set(event[1] for event in events._events)
         self.assertEqual(set(['foo', 'baz']), ids)
 
+    def test_rename(self):
+        byte_stream = BytesIO()
+        stream = StreamResultToBytes(byte_stream)
+        stream.status(test_id="foo.bar", test_status="inprogress")
+        stream.status(test_id="foo.bar", test_status="fail")
+        output = self.run_command(
+            ['--rename', 'foo', 'qux'], byte_stream.getvalue())
+        events = StreamResult()
+        ByteStreamToStreamResult(BytesIO(output)).run(events)
+        self.assertEqual([
+            ('status', 'qux.bar', 'inprogress'),
+            ('status', 'qux.bar', 'fail'),
+            ], [event[:3] for event in events._events])
+
     def test_no_passthrough(self):
         output = self.run_command(['--no-passthrough'], b'hi thar')
         self.assertEqual(b'', output)
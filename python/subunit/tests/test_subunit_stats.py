@@ -16,11 +16,17 @@
 
 """Tests for subunit.TestResultStats."""
 
+import datetime
+import json
+import os
+import subprocess
+import sys
 import unittest
 
 from testtools.compat import _b, BytesIO, StringIO
 
 import subunit
+from subunit import iso8601
 
 
 class TestTestResultStats(unittest.TestCase):
@@ -76,3 +82,42 @@ Seen tags: global, local
         self.setUpUsedStream()
         self.result.formatStats()
         self.assertEqual(expected, self.output.getvalue())
+
+
+class TestStatsCommand(unittest.TestCase):
+
+    def run_command(self, args, stream):
+        root = os.path.dirname(
+            os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+        script_path = os.path.join(root, 'filters', 'subunit-stats')
+        command = [sys.executable, script_path] + list(args)
+        ps = subprocess.Popen(
+            command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE)
+        out, err = ps.communicate(stream)
+        if ps.returncode != 0:
+            raise RuntimeError("%s failed: %s" % (command, err))
+        return out.decode('utf8')
+
+    def make_stream(self):
+        start = datetime.datetime(2000, 1, 1, tzinfo=iso8601.UTC)
+        stop = start + datetime.timedelta(seconds=2)
+        byte_stream = BytesIO()
+        stream = subunit.StreamResultToBytes(byte_stream)
+        stream.status(test_id="foo", test_status="inprogress",
+            timestamp=start, route_code="0")
+        stream.status(test_id="foo", test_status="success",
+            timestamp=stop, route_code="0")
+        return byte_stream.getvalue()
+
+    def test_json(self):
+        summary = json.loads(self.run_command(['--json'], self.make_stream()))
+        self.assertEqual({'success': 1}, summary['status_counts'])
+        self.assertEqual(2.0, summary['wall_clock'])
+        self.assertEqual([{'id': 'foo', 'duration': 2.0}], summary['slowest'])
+        self.assertEqual(1.0, summary['routes']['0']['utilisation'])
+
+    def test_text(self):
+        output = self.run_command([], self.make_stream())
+        self.assertTrue(output.startswith("Total tests:       1\n"), output)
+        self.assertIn("      2.000s foo\n", output)
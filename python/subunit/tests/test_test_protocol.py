@@ -1147,6 +1147,29 @@ class TestIsolatedTestCase(TestCase):
         self.assertEqual(self.SampleIsolatedTestCase.TEARDOWN, False)
         self.assertEqual(self.SampleIsolatedTestCase.TEST, False)
 
+    @skipIf(os.name != "posix", "Need a posix system for forking tests")
+    def test_run_shm_transport(self):
+        result = unittest.TestResult()
+        test = self.SampleIsolatedTestCase("test_sets_global_state")
+        test.transport = 'shm'
+        test.run(result)
+        self.assertEqual(result.testsRun, 1)
+        self.assertEqual(result.errors, [])
+        self.assertEqual(self.SampleIsolatedTestCase.TEST, False)
+
+    @skipIf(os.name != "posix", "Need a posix system for forking tests")
+    def test_shm_transport_needs_ordered_stores(self):
+        def no_ring():
+            raise AssertionError('SharedRing used')
+        self.patch(subunit, 'STORES_ORDERED', False)
+        self.patch(subunit, 'SharedRing', no_ring)
+        result = unittest.TestResult()
+        test = self.SampleIsolatedTestCase("test_sets_global_state")
+        test.transport = 'shm'
+        test.run(result)
+        self.assertEqual(result.testsRun, 1)
+        self.assertEqual(result.errors, [])
+
     def test_debug(self):
         pass
         #test = self.SampleExecTestCase("test_sample_method")
@@ -1189,6 +1212,35 @@ class TestIsolatedTestSuite(TestCase):
         self.assertEqual(self.SampleTestToIsolate.TEARDOWN, False)
         self.assertEqual(self.SampleTestToIsolate.TEST, False)
 
+    @skipIf(os.name != "posix", "Need a posix system for forking tests")
+    def test_run_shm_transport(self):
+        result = unittest.TestResult()
+        suite = subunit.IsolatedTestSuite()
+        suite.transport = 'shm'
+        for _ in range(200):
+            suite.addTest(self.SampleTestToIsolate("test_sets_global_state"))
+        suite.run(result)
+        self.assertEqual(result.testsRun, 200)
+        self.assertEqual(result.errors, [])
+        self.assertEqual(self.SampleTestToIsolate.TEST, False)
+
+    @skipIf(os.name != "posix", "Need a posix system for forking tests")
+    def test_run_concurrently(self):
+        result = unittest.TestResult()
+        suite = subunit.IsolatedTestSuite()
+        suite.concurrency = 4
+        for _ in range(10):
+            suite.addTest(self.SampleTestToIsolate("test_sets_global_state"))
+        suite.run(result)
+        self.assertEqual(result.testsRun, 10)
+        self.assertEqual(result.errors, [])
+        self.assertEqual(self.SampleTestToIsolate.TEST, False)
+
+    def test_unknown_transport(self):
+        self.assertRaises(ValueError, subunit.run_isolated,
+            unittest.TestSuite, subunit.IsolatedTestSuite(),
+            unittest.TestResult(), 'carrier-pigeon')
+
 
 class TestTestProtocolClient(TestCase):
 
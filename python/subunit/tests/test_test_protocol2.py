@@ -16,6 +16,9 @@
 
 from io import BytesIO
 import datetime
+import os.path
+import subprocess
+import sys
 
 try:
     from hypothesis import given
@@ -27,12 +30,21 @@ except ImportError:
     given = None
     st = None
 from testtools import TestCase
+from testtools.compat import _u
 from testtools.matchers import Contains, HasLength
 from testtools.tests.test_testresult import TestStreamResultContract
 from testtools.testresult.doubles import StreamResult
 
 import subunit
 import subunit.iso8601 as iso8601
+from subunit.v2 import (
+    iter_packets,
+    packet_route_code,
+    packet_status,
+    packet_test_id,
+    ParseError,
+    set_packet_route_code,
+    )
 
 CONSTANT_ENUM = b'\xb3)\x01\x0c\x03foo\x08U_\x1b'
 CONSTANT_INPROGRESS = b'\xb3)\x02\x0c\x03foo\x8e\xc1-\xb5'
@@ -223,6 +235,28 @@ class TestStreamResultToBytes(TestCase):
         result.status(test_id="bar", test_status='success', timestamp=timestamp)
         self.assertEqual(CONSTANT_TIMESTAMP, output.getvalue())
 
+    def test_write_exists(self):
+        test_ids = ['foo', 'b' * 100, _u('\u2603'), 'c' * 20000]
+        expected, expected_output = self._make_result()
+        for test_id in test_ids:
+            expected.status(test_id=test_id, test_status='exists')
+        result, output = self._make_result()
+        result.write_exists(test_ids)
+        self.assertEqual(expected_output.getvalue(), output.getvalue())
+
+    def test_write_exists_batches_writes(self):
+        writes = []
+        class Output(BytesIO):
+            def write(self, data):
+                writes.append(len(data))
+                return BytesIO.write(self, data)
+        output = Output()
+        result = subunit.StreamResultToBytes(output)
+        result.write_exists(['test%d' % index for index in range(1000)],
+            buffer_size=4096)
+        self.assertEqual(len(output.getvalue()), sum(writes))
+        self.assertTrue(len(writes) < 10, writes)
+
 
 class TestByteStreamToStreamResult(TestCase):
 
@@ -453,3 +487,111 @@ class TestByteStreamToStreamResult(TestCase):
                 source, non_subunit_name="stdout")
             stream.run(result)
             self.assertEqual(b'', source.read())
+
+
+class TestRawPackets(TestCase):
+
+    def parse(self, data):
+        result = StreamResult()
+        subunit.ByteStreamToStreamResult(BytesIO(data)).run(result)
+        return result._events
+
+    def test_iter_packets(self):
+        data = b'noise' + CONSTANT_TIMESTAMP + CONSTANT_ROUTE_CODE + b'x'
+        self.assertEqual(
+            [b'noise', CONSTANT_TIMESTAMP, CONSTANT_ROUTE_CODE, b'x'],
+            list(iter_packets(BytesIO(data))))
+
+    def test_iter_packets_bad_checksum(self):
+        data = CONSTANT_ROUTE_CODE[:-1] + b'\0'
+        self.assertRaises(ParseError, list, iter_packets(BytesIO(data)))
+
+    def test_iter_packets_errors(self):
+        # A stream whose last packet was cut short, as by a crash.
+        data = CONSTANT_ROUTE_CODE + CONSTANT_TIMESTAMP[:-3]
+        self.assertRaises(ParseError, list, iter_packets(BytesIO(data)))
+        self.assertEqual([CONSTANT_ROUTE_CODE],
+            list(iter_packets(BytesIO(data), errors='ignore')))
+        packets = list(iter_packets(BytesIO(data), errors='report'))
+        self.assertEqual(CONSTANT_ROUTE_CODE, packets[0])
+        events = self.parse(b''.join(packets[1:]))
+        self.assertEqual(
+            [('subunit.parser', 'fail', 'Parser Error')],
+            [(event[1], event[2], event[5]) for event in events])
+        self.assertEqual(
+            [event[6] for event in self.parse(data)][-1:],
+            [event[6] for event in events])
+
+    def test_iter_packets_unknown_errors(self):
+        self.assertRaises(ValueError, list,
+            iter_packets(BytesIO(b''), errors='bogus'))
+
+    def test_packet_route_code(self):
+        self.assertEqual('source', packet_route_code(CONSTANT_ROUTE_CODE))
+        self.assertEqual(None, packet_route_code(CONSTANT_TIMESTAMP))
+
+    def test_packet_test_id_and_status(self):
+        self.assertEqual('bar', packet_test_id(CONSTANT_TIMESTAMP))
+        self.assertEqual('success', packet_status(CONSTANT_TIMESTAMP))
+        self.assertEqual(None, packet_test_id(CONSTANT_EOF))
+        self.assertEqual('fail', packet_status(CONSTANT_FAIL))
+
+    def test_set_route_code(self):
+        packet = set_packet_route_code(CONSTANT_TIMESTAMP, 'worker-0')
+        event = self.parse(CONSTANT_TIMESTAMP)[0]
+        self.assertEqual(
+            [event[:9] + ('worker-0',) + event[10:]], self.parse(packet))
+
+    def test_replace_and_remove_route_code(self):
+        packet = set_packet_route_code(
+            CONSTANT_ROUTE_CODE, lambda route_code: '1/' + route_code)
+        self.assertEqual('1/source', self.parse(packet)[0][9])
+        self.assertEqual(
+            None,
+            self.parse(set_packet_route_code(CONSTANT_ROUTE_CODE, None))[0][9])
+
+    def test_matches_encoder(self):
+        # Every field, and a file large enough for a two byte length.
+        fields = dict(test_id='foo', test_status='fail',
+            test_tags=set(['tag']), file_name='log', file_bytes=b'x' * 100,
+            mime_type='text/plain', eof=True,
+            timestamp=datetime.datetime(2001, 12, 12, 12, 59, 59, 45,
+                iso8601.Utc()))
+        original = BytesIO()
+        subunit.StreamResultToBytes(original).status(route_code='0', **fields)
+        expected = BytesIO()
+        subunit.StreamResultToBytes(expected).status(
+            route_code='parent/0', **fields)
+        self.assertEqual(
+            expected.getvalue(),
+            set_packet_route_code(original.getvalue(), 'parent/0'))
+
+
+class TestCatCommand(TestCase):
+
+    def run_cat(self, data):
+        script_path = os.path.join(
+            os.path.dirname(os.path.dirname(os.path.dirname(
+                os.path.dirname(os.path.abspath(__file__))))),
+            'filters', 'subunit-cat')
+        ps = subprocess.Popen(
+            [sys.executable, script_path, '--prefix-routes', '--label', 'a',
+                '-'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE)
+        out, err = ps.communicate(data)
+        self.assertEqual(0, ps.returncode, err)
+        result = StreamResult()
+        subunit.ByteStreamToStreamResult(BytesIO(out)).run(result)
+        return result._events
+
+    def test_prefix_routes(self):
+        events = self.run_cat(CONSTANT_ROUTE_CODE + CONSTANT_TIMESTAMP)
+        self.assertEqual(['a/source', 'a'], [event[9] for event in events])
+
+    def test_truncated_input(self):
+        events = self.run_cat(CONSTANT_ROUTE_CODE + CONSTANT_TIMESTAMP[:-3])
+        # The cut packet is reported as subunit-ls would show it.
+        self.assertEqual(
+            [('bar', 'success', 'a/source'), ('subunit.parser', 'fail', 'a')],
+            [(event[1], event[2], event[9]) for event in events])
@@ -16,16 +16,18 @@
 
 import csv
 import datetime
+import json
 import sys
+import threading
 import unittest
 
-from testtools import TestCase
+from testtools import skipIf, TestCase
 from testtools.compat import StringIO
 from testtools.content import (
     text_content,
     TracebackContent,
     )
-from testtools.testresult.doubles import ExtendedTestResult
+from testtools.testresult.doubles import ExtendedTestResult, StreamResult
 
 import subunit
 import subunit.iso8601 as iso8601
@@ -371,6 +373,153 @@ class TestTimeCollapsingDecorator(TestCase):
              ('stopTest', foo)], result._events)
 
 
+@skipIf(subunit.test_results.resource is None, 'resource not available')
+class TestDetailsAddingDecorator(TestCase):
+
+    class Recorder(subunit.test_results.Measurement):
+
+        def __init__(self, name, log):
+            self.name = name
+            self.log = log
+
+        def start(self, result, test):
+            self.log.append(('start', self.name))
+
+        def stop(self, test):
+            self.log.append(('stop', self.name))
+
+        def details(self, test):
+            self.log.append(('details', self.name))
+            return {self.name: text_content(self.name)}
+
+    def test_stopped_before_details(self):
+        calls = []
+        log = ExtendedTestResult()
+        result = subunit.test_results.DetailsAddingDecorator(log,
+            [self.Recorder('a', calls), self.Recorder('b', calls)])
+        test = subunit.RemotedTestCase('foo')
+        result.startTest(test)
+        result.addSuccess(test)
+        result.stopTest(test)
+        self.assertEqual([('start', 'a'), ('start', 'b'), ('stop', 'b'),
+            ('stop', 'a'), ('details', 'a'), ('details', 'b')], calls)
+        self.assertEqual(['a', 'b'], sorted(log._events[1][2]))
+
+    def test_stopped_without_outcome(self):
+        calls = []
+        result = subunit.test_results.DetailsAddingDecorator(
+            ExtendedTestResult(), [self.Recorder('a', calls)])
+        test = subunit.RemotedTestCase('foo')
+        result.startTest(test)
+        result.stopTest(test)
+        self.assertEqual([('start', 'a'), ('stop', 'a')], calls)
+
+
+    def test_abort_waits_for_reporting(self):
+        entered = threading.Event()
+        release = threading.Event()
+        class Log(ExtendedTestResult):
+            def time(self, a_datetime):
+                entered.set()
+                release.wait(10)
+                ExtendedTestResult.time(self, a_datetime)
+        log = Log()
+        result = subunit.test_results.DetailsAddingDecorator(log)
+        test = subunit.RemotedTestCase('foo')
+        result.startTest(test)
+        reporter = threading.Thread(target=result.time, args=(None,))
+        reporter.start()
+        entered.wait(10)
+        ended = []
+        aborter = threading.Thread(target=result.abort, args=(test,
+            {'timeout': text_content('stuck')}, lambda: ended.append(True)))
+        aborter.start()
+        aborter.join(0.1)
+        self.assertTrue(aborter.is_alive())
+        self.assertEqual(['startTest'], [event[0] for event in log._events])
+        release.set()
+        reporter.join()
+        aborter.join()
+        self.assertEqual([True], ended)
+        # Nothing is reported after an abort.
+        result.addSuccess(test)
+        result.stopTest(test)
+        result.stopTestRun()
+        self.assertEqual(['startTest', 'time', 'addError', 'stopTest',
+            'stopTestRun'], [event[0] for event in log._events])
+        self.assertEqual('stuck', log._events[2][2]['timeout'].as_text())
+
+    def test_abort_after_outcome(self):
+        log = ExtendedTestResult()
+        result = subunit.test_results.DetailsAddingDecorator(log)
+        test = subunit.RemotedTestCase('foo')
+        result.startTest(test)
+        result.addSuccess(test)
+        ended = []
+        result.abort(test, {}, lambda: ended.append(True))
+        result.stopTest(test)
+        self.assertEqual([], ended)
+        self.assertEqual(['startTest', 'addSuccess', 'stopTest'],
+            [event[0] for event in log._events])
+
+
+class TestResourceUsageDecorator(TestCase):
+
+    def setUp(self):
+        super(TestResourceUsageDecorator, self).setUp()
+        self.log = ExtendedTestResult()
+        self.result = subunit.test_results.ResourceUsageDecorator(self.log)
+        self.test = subunit.RemotedTestCase('foo')
+
+    def usage(self, event):
+        content = event[-1]['resource-usage']
+        self.assertEqual('application/json', content.content_type.type +
+            '/' + content.content_type.subtype)
+        return json.loads(b''.join(content.iter_bytes()).decode('utf8'))
+
+    def test_success(self):
+        self.result.startTest(self.test)
+        sum(range(100000))
+        self.result.addSuccess(self.test)
+        self.result.stopTest(self.test)
+        self.assertEqual(['startTest', 'addSuccess', 'stopTest'],
+            [event[0] for event in self.log._events])
+        usage = self.usage(self.log._events[1])
+        self.assertEqual(['involuntary_switches', 'max_rss_kb', 'system',
+            'user', 'voluntary_switches'], sorted(usage))
+        for value in usage.values():
+            self.assertTrue(value >= 0)
+
+    def test_keeps_details(self):
+        details = {'log': text_content('foo')}
+        self.result.startTest(self.test)
+        self.result.addFailure(self.test, details=details)
+        self.assertEqual(['log', 'resource-usage'],
+            sorted(self.log._events[1][2]))
+        # The caller's details are not changed.
+        self.assertEqual(['log'], list(details))
+
+    def test_err_becomes_traceback(self):
+        self.result.startTest(self.test)
+        try:
+            1/0
+        except ZeroDivisionError:
+            self.result.addError(self.test, sys.exc_info())
+        self.assertEqual(['resource-usage', 'traceback'],
+            sorted(self.log._events[1][2]))
+
+    def test_skip_reason_kept(self):
+        self.result.startTest(self.test)
+        self.result.addSkip(self.test, 'no reason')
+        details = self.log._events[1][2]
+        self.assertEqual('no reason', details['reason'].as_text())
+        self.usage(self.log._events[1])
+
+    def test_outside_test_unchanged(self):
+        self.result.addSuccess(self.test)
+        self.assertEqual([('addSuccess', self.test)], self.log._events)
+
+
 class TestByTestResultTests(testtools.TestCase):
 
     def setUp(self):
@@ -564,3 +713,129 @@ class TestCsvResult(testtools.TestCase):
         stream = StringIO()
         subunit.test_results.CsvResult(stream)
         self.assertEqual([], self.parse_stream(stream))
+
+
+class TestMakeRename(TestCase):
+
+    def test_applies_patterns_in_order(self):
+        rename = subunit.test_results.make_rename(
+            [('foo', 'bar'), ('bar', 'baz')])
+        self.assertEqual('baz.baz', rename('foo.bar'))
+
+    def test_renames_are_cached(self):
+        rename = subunit.test_results.make_rename([('foo', 'bar')])
+        self.assertEqual('bar', rename('foo'))
+        self.assertIs(rename('foo'), rename('foo'))
+
+    def test_cache_is_bounded(self):
+        rename = subunit.test_results.make_rename(
+            [('^', 'x.')], cache_size=2)
+        self.assertEqual(
+            ['x.a', 'x.b', 'x.c', 'x.a'],
+            [rename(name) for name in ['a', 'b', 'c', 'a']])
+
+
+class TestStreamRenamer(TestCase):
+
+    def test_renames_test_events(self):
+        log = StreamResult()
+        result = subunit.test_results.StreamRenamer(
+            [log], lambda name: name + '-renamed')
+        result.startTestRun()
+        result.status(test_id='foo', test_status='inprogress')
+        result.status(test_id='foo', file_name='log', file_bytes=b'bar')
+        result.status(test_id='foo', test_status='success')
+        result.stopTestRun()
+        self.assertEqual(
+            [('startTestRun',),
+             ('status', 'foo-renamed', 'inprogress'),
+             ('status', 'foo-renamed', None),
+             ('status', 'foo-renamed', 'success'),
+             ('stopTestRun',)],
+            [event[:3] for event in log._events])
+
+    def test_renames_positional_test_id(self):
+        log = StreamResult()
+        result = subunit.test_results.StreamRenamer(
+            [log], lambda name: name + '-renamed')
+        result.status('foo', 'success')
+        self.assertEqual(
+            [('status', 'foo-renamed', 'success')],
+            [event[:3] for event in log._events])
+
+    def test_leaves_non_test_events_alone(self):
+        log = StreamResult()
+        result = subunit.test_results.StreamRenamer(
+            [log], lambda name: name + '-renamed')
+        result.status(file_name='stdout', file_bytes=b'bar')
+        self.assertEqual(None, log._events[0][1])
+
+
+class TestTestIdPrintingResult(TestCase):
+
+    def run_stream(self, **kwargs):
+        stream = StringIO()
+        result = subunit.test_results.TestIdPrintingResult(stream, **kwargs)
+        start = datetime.datetime(2000, 1, 1, tzinfo=iso8601.UTC)
+        result.startTestRun()
+        for test_id, seconds in [
+            ('pkg.mod.A.test_a', 1), ('pkg.mod.A.test_b(x)', 3),
+            ('pkg.mod.B.test_c', 2), ('pkg.other.C.test_d', 4)]:
+            result.status(test_id=test_id, test_status='inprogress',
+                timestamp=start)
+            result.status(test_id=test_id, test_status='success',
+                timestamp=start + datetime.timedelta(seconds=seconds))
+        result.stopTestRun()
+        return stream.getvalue()
+
+    def test_ids(self):
+        self.assertEqual(
+            'pkg.mod.A.test_a\npkg.mod.A.test_b(x)\n'
+            'pkg.mod.B.test_c\npkg.other.C.test_d\n',
+            self.run_stream())
+
+    def test_times(self):
+        self.assertEqual(
+            'pkg.mod.A.test_a 1.000\npkg.mod.A.test_b(x) 3.000\n'
+            'pkg.mod.B.test_c 2.000\npkg.other.C.test_d 4.000\n',
+            self.run_stream(show_times=True))
+
+    def test_slowest(self):
+        self.assertEqual(
+            'pkg.other.C.test_d 4.000\npkg.mod.A.test_b(x) 3.000\n',
+            self.run_stream(slowest=2))
+
+    def test_sort_by_duration(self):
+        self.assertEqual(
+            'pkg.other.C.test_d 4.000\npkg.mod.A.test_b(x) 3.000\n'
+            'pkg.mod.B.test_c 2.000\npkg.mod.A.test_a 1.000\n',
+            self.run_stream(sort_by_duration=True))
+
+    def test_group_by_class(self):
+        self.assertEqual(
+            'pkg.mod.A (2 tests) 4.000\npkg.other.C (1 tests) 4.000\n'
+            'pkg.mod.B (1 tests) 2.000\n',
+            self.run_stream(group_by='class'))
+
+    def test_group_by_module(self):
+        self.assertEqual(
+            'pkg.mod (3 tests) 6.000\n',
+            self.run_stream(group_by='module', slowest=1))
+
+    def test_exists_with_times(self):
+        stream = StringIO()
+        result = subunit.test_results.TestIdPrintingResult(
+            stream, show_times=True, show_exists=True)
+        result.startTestRun()
+        result.status(test_id='foo', test_status='exists')
+        result.stopTestRun()
+        self.assertEqual('foo 0.000\n', stream.getvalue())
+
+
+class TestTestIdPrefix(TestCase):
+
+    def test_prefixes(self):
+        prefix = subunit.test_results.test_id_prefix
+        self.assertEqual('a.b.C', prefix('a.b.C.test_x(scenario.1)', 'class'))
+        self.assertEqual('a.b', prefix('a.b.C.test_x', 'module'))
+        self.assertEqual('test_x', prefix('test_x', 'module'))
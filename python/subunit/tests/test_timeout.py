@@ -0,0 +1,208 @@
+#
+#  subunit: extensions to python unittest to get test results from subprocesses.
+#  Copyright (C) 2026 Subunit Contributors
+#
+#  Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+#  license at the users choice. A copy of both licenses are available in the
+#  project source as Apache-2.0 and BSD. You may not use this file except in
+#  compliance with one of these two licences.
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+#  license you chose for the specific language governing permissions and
+#  limitations under that license.
+#
+
+"""Tests for subunit.timeout."""
+
+import signal
+import threading
+import time
+
+from testtools import skipIf, TestCase
+from testtools.testresult.doubles import ExtendedTestResult
+
+from subunit import timeout
+from subunit.test_results import DetailsAddingDecorator, Measurement
+from subunit.tests.streams import run_main
+from subunit.timeout import (
+    format_stacks,
+    TestTimeout,
+    TimeoutDecorator,
+    TimeoutMeasurement,
+    )
+
+
+has_alarm = getattr(signal, 'setitimer', None) is not None
+
+
+class TestFormatStacks(TestCase):
+
+    def test_all_threads(self):
+        stacks = format_stacks()
+        self.assertIn('Thread MainThread', stacks)
+        self.assertIn('test_all_threads', stacks)
+
+    def test_exclude(self):
+        self.assertNotIn('test_exclude',
+            format_stacks(threading.current_thread().ident))
+
+
+class TestTimeoutDecorator(TestCase):
+
+    class Sample(TestCase):
+        release = None
+        def test_fast(self):
+            pass
+        def test_slow(self):
+            time.sleep(10)
+        def test_stuck(self):
+            try:
+                time.sleep(10)
+            except TestTimeout:
+                pass
+            self.release.wait(10)
+        def test_late(self):
+            try:
+                self.release.wait(10)
+            except TestTimeout:
+                self.release.wait(10)
+
+    def make_result(self, grace=5.0):
+        log = ExtendedTestResult()
+        result = TimeoutDecorator(log, 0.1, grace=grace)
+        exits = []
+        result.measurements[0]._exit = exits.append
+        return log, result, exits
+
+    def test_fast_test_untouched(self):
+        log, result, exits = self.make_result()
+        handler = signal.getsignal(signal.SIGALRM) if has_alarm else None
+        result.startTestRun()
+        self.Sample('test_fast').run(result)
+        result.stopTestRun()
+        self.assertEqual(['startTestRun', 'startTest', 'addSuccess',
+            'stopTest', 'stopTestRun'], [event[0] for event in log._events])
+        self.assertEqual([], exits)
+        if has_alarm:
+            self.assertEqual(handler, signal.getsignal(signal.SIGALRM))
+
+    @skipIf(not has_alarm, 'SIGALRM not available')
+    def test_disarmed_before_reporting(self):
+        timers = []
+        class Log(ExtendedTestResult):
+            def addSuccess(self, test, details=None):
+                timers.append(signal.getitimer(signal.ITIMER_REAL))
+                ExtendedTestResult.addSuccess(self, test, details)
+        handler = signal.getsignal(signal.SIGALRM)
+        result = TimeoutDecorator(Log(), 10)
+        result.startTestRun()
+        self.Sample('test_fast').run(result)
+        result.stopTestRun()
+        self.assertEqual([(0.0, 0.0)], timers)
+        self.assertEqual(handler, signal.getsignal(signal.SIGALRM))
+
+    @skipIf(not has_alarm, 'SIGALRM not available')
+    def test_slow_test_interrupted(self):
+        log, result, exits = self.make_result()
+        start = time.time()
+        result.startTestRun()
+        self.Sample('test_slow').run(result)
+        result.stopTestRun()
+        self.assertTrue(time.time() - start < 5)
+        self.assertEqual('addError', log._events[2][0])
+        details = log._events[2][2]
+        self.assertIn('TestTimeout', details['traceback'].as_text())
+        self.assertIn('test_slow', details['timeout'].as_text())
+        self.assertEqual([], exits)
+
+    @skipIf(not has_alarm, 'SIGALRM not available')
+    def test_stacks_formatted_outside_measurements(self):
+        # Reading the source of the stacks must not count towards, say, the
+        # allocations of the test that timed out.
+        measuring = []
+        formatted = []
+        class Window(Measurement):
+            def start(self, result, test):
+                measuring.append(True)
+            def stop(self, test):
+                measuring.append(False)
+        original = timeout._format_stacks
+        def format_stacks(stacks):
+            formatted.append(measuring[-1])
+            return original(stacks)
+        self.patch(timeout, '_format_stacks', format_stacks)
+        log = ExtendedTestResult()
+        result = DetailsAddingDecorator(
+            log, [Window(), TimeoutMeasurement(0.1)])
+        result.startTestRun()
+        self.Sample('test_slow').run(result)
+        result.stopTestRun()
+        self.assertEqual([False], formatted)
+        self.assertIn('test_slow', log._events[2][2]['timeout'].as_text())
+
+    def test_stuck_test_ends_run(self):
+        log, result, exits = self.make_result(grace=0.1)
+        release = threading.Event()
+        self.Sample.release = release
+        self.addCleanup(setattr, self.Sample, 'release', None)
+        measurement = result.measurements[0]
+        original_exit = measurement._exit
+        def exit(code):
+            original_exit(code)
+            release.set()
+        measurement._exit = exit
+        result.startTestRun()
+        self.Sample('test_stuck').run(result)
+        self.assertEqual([1], exits)
+        self.assertEqual(['startTestRun', 'startTest', 'addError',
+            'stopTest', 'stopTestRun'],
+            [event[0] for event in log._events[:5]])
+        stacks = log._events[2][2]['timeout'].as_text()
+        self.assertIn('did not finish within 0.1 seconds', stacks)
+        self.assertIn('test_stuck', stacks)
+        self.assertNotIn('subunit-timeout-watchdog', stacks)
+
+    def test_watchdog_outlives_finished_test(self):
+        log, result, exits = self.make_result(grace=0.1)
+        finished, stuck = threading.Event(), threading.Event()
+        self.addCleanup(setattr, self.Sample, 'release', None)
+        original_abort = result.abort
+        def abort(test, details, then):
+            if not finished.is_set():
+                # As if the test finished just as its deadline passed.
+                finished.set()
+                return
+            original_abort(test, details, then)
+        result.abort = abort
+        measurement = result.measurements[0]
+        original_exit = measurement._exit
+        def exit(code):
+            original_exit(code)
+            stuck.set()
+        measurement._exit = exit
+        result.startTestRun()
+        self.Sample.release = finished
+        self.Sample('test_late').run(result)
+        self.Sample.release = stuck
+        self.Sample('test_stuck').run(result)
+        self.assertEqual([1], exits)
+        self.assertEqual(['startTestRun', 'startTest', 'addSuccess',
+            'stopTest', 'startTest', 'addError', 'stopTest', 'stopTestRun'],
+            [event[0] for event in log._events])
+
+
+class TestRunTimeout(TestCase):
+
+    class Sample(TestCase):
+        def test_slow(self):
+            time.sleep(10)
+
+    @skipIf(not has_alarm, 'SIGALRM not available')
+    def test_test_timeout(self):
+        events = run_main(["--test-timeout", "0.1",
+            "subunit.tests.test_timeout.TestRunTimeout.Sample"])
+        self.assertIn('timeout', [event[5] for event in events])
+        self.assertEqual(['fail'], [event[2] for event in events
+            if event[2] not in (None, 'exists', 'inprogress')])
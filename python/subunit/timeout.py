@@ -0,0 +1,255 @@
+#
+#  subunit: extensions to Python unittest to get test results from subprocesses.
+#  Copyright (C) 2026 Subunit Contributors
+#
+#  Licensed under either the Apache License, Version 2.0 or the BSD 3-clause
+#  license at the users choice. A copy of both licenses are available in the
+#  project source as Apache-2.0 and BSD. You may not use this file except in
+#  compliance with one of these two licences.
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under these licenses is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+#  license you chose for the specific language governing permissions and
+#  limitations under that license.
+#
+
+"""Fail tests that take too long, recording where they were stuck.
+
+``TimeoutMeasurement`` gives each test a time limit. When a test exceeds it,
+the stacks of all threads are attached to the test as a 'timeout'
+attachment and the test fails:
+
+* Where SIGALRM is available and the tests run in the main thread, a
+  ``TestTimeout`` exception is raised in the test, which then fails as any
+  other error would and the run continues with the next test.
+* If the test is still running a grace period later (because it caught the
+  exception or is blocked where signals cannot interrupt it), or SIGALRM
+  cannot be used, a watchdog thread reports the test as failed, ends the
+  test run so the stream is complete, and exits the process. It reports
+  through ``DetailsAddingDecorator.abort``, so its output never interleaves
+  with the main thread's.
+
+The alarm is disarmed as soon as a test's outcome arrives, before it is
+passed on, so it cannot go off while the outcome is being reported.
+"""
+
+import linecache
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+
+from testtools.content import text_content
+
+from subunit.test_results import DetailsAddingDecorator, Measurement
+
+__all__ = [
+    'format_stacks',
+    'TestTimeout',
+    'TimeoutDecorator',
+    'TimeoutMeasurement',
+    ]
+
+
+class TestTimeout(Exception):
+    """Raised in a test that has run for longer than its time limit."""
+
+
+def format_stacks(exclude=None):
+    """Return the current stacks of all threads as text.
+
+    :param exclude: The ident of a thread to leave out, if any.
+    """
+    return _format_stacks(_capture_stacks(exclude))
+
+
+def _capture_stacks(exclude=None):
+    """Return the current stacks of all threads, without their source.
+
+    This does as little as it can, so that it can be called while a test's
+    allocations or calls are being measured: the stacks are returned as
+    (thread name, ident, [(filename, lineno, function name)]) tuples, for
+    ``_format_stacks`` to look the source lines up later.
+
+    :param exclude: The ident of a thread to leave out, if any.
+    """
+    names = dict((thread.ident, thread.name)
+        for thread in threading.enumerate())
+    stacks = []
+    for ident, frame in sorted(sys._current_frames().items()):
+        if ident == exclude:
+            continue
+        entries = []
+        while frame is not None:
+            code = frame.f_code
+            entries.append((code.co_filename, frame.f_lineno, code.co_name))
+            frame = frame.f_back
+        entries.reverse()
+        stacks.append((names.get(ident, '?'), ident, entries))
+    return stacks
+
+
+def _format_stacks(stacks):
+    """Format stacks from ``_capture_stacks`` as text."""
+    lines = []
+    for name, ident, entries in stacks:
+        lines.append('Thread %s (%d):\n' % (name, ident))
+        lines.extend(traceback.format_list([
+            (filename, lineno, function,
+                linecache.getline(filename, lineno).strip() or None)
+            for filename, lineno, function in entries]))
+        lines.append('\n')
+    return ''.join(lines)
+
+
+class TimeoutMeasurement(Measurement):
+    """Fail tests that run for longer than timeout seconds."""
+
+    # Replaced in tests.
+    _exit = staticmethod(os._exit)
+
+    def __init__(self, timeout, grace=5.0, exit_code=1):
+        """Create a TimeoutMeasurement.
+
+        :param timeout: The seconds a test may run for.
+        :param grace: The seconds a test that was interrupted is given to
+            finish before the process is ended.
+        :param exit_code: The exit code of the process when it is ended.
+        """
+        self.timeout = timeout
+        self.grace = grace
+        self.exit_code = exit_code
+        self._condition = threading.Condition()
+        self._result = None
+        self._test = None
+        self._deadline = None
+        self._stacks = None
+        self._armed = False
+        self._old_handler = None
+        self._watchdog = None
+
+    def start_run(self):
+        self._start_watchdog()
+
+    def stop_run(self):
+        with self._condition:
+            watchdog = self._watchdog
+            self._watchdog = None
+            self._condition.notify()
+        if watchdog is not None:
+            watchdog.join()
+
+    def _start_watchdog(self):
+        if self._watchdog is not None:
+            return
+        self._watchdog = threading.Thread(
+            target=self._watch, name='subunit-timeout-watchdog')
+        self._watchdog.daemon = True
+        self._watchdog.start()
+
+    def start(self, result, test):
+        # Results are not always bracketed by startTestRun.
+        self._start_watchdog()
+        self._result = result
+        self._stacks = None
+        timeout = self.timeout
+        if getattr(signal, 'setitimer', None) is not None:
+            try:
+                self._old_handler = signal.signal(
+                    signal.SIGALRM, self._alarm)
+            except ValueError:
+                # Not the main thread; leave it to the watchdog.
+                pass
+            else:
+                self._armed = True
+                signal.setitimer(signal.ITIMER_REAL, self.timeout)
+                timeout += self.grace
+        with self._condition:
+            self._test = test
+            self._deadline = time.time() + timeout
+            self._condition.notify()
+
+    def stop(self, test):
+        if self._armed:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            # None if the handler was not installed from Python.
+            signal.signal(signal.SIGALRM,
+                self._old_handler or signal.SIG_DFL)
+            self._armed = False
+            self._old_handler = None
+        with self._condition:
+            self._test = None
+            self._deadline = None
+
+    def _alarm(self, signum, frame):
+        # Only capture the stacks here, inside the test's measurements;
+        # their source is read once those have stopped, in details().
+        self._stacks = _capture_stacks()
+        raise TestTimeout(
+            'Test timed out after %s seconds.' % (self.timeout,))
+
+    def details(self, test):
+        stacks = self._stacks
+        self._stacks = None
+        if stacks is None:
+            return None
+        return {'timeout': text_content(_format_stacks(stacks))}
+
+    def _watch(self):
+        while True:
+            test = self._wait_for_deadline()
+            if test is None:
+                return
+            self._expire(test)
+
+    def _wait_for_deadline(self):
+        """Wait until a test's deadline passes; return it, or None to stop.
+
+        Each deadline is only returned once: if the test finished just as
+        it passed, expiring it does nothing and the watchdog goes on to
+        wait for the next test's deadline.
+        """
+        with self._condition:
+            while self._watchdog is threading.current_thread():
+                if self._deadline is None:
+                    self._condition.wait()
+                    continue
+                remaining = self._deadline - time.time()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+                self._deadline = None
+                return self._test
+            return None
+
+    def _expire(self, test):
+        """Fail test, which is stuck, end the run and exit.
+
+        Does nothing if test has already finished.
+        """
+        stacks = ('Test did not finish within %s seconds.\n\n%s' % (
+            self.timeout, format_stacks(threading.current_thread().ident)))
+        self._result.abort(test, {'timeout': text_content(stacks)},
+            self._end_process)
+
+    def _end_process(self):
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except Exception:
+                pass
+        self._exit(self.exit_code)
+
+
+class TimeoutDecorator(DetailsAddingDecorator):
+    """Fail tests that run for longer than timeout seconds.
+
+    See ``TimeoutMeasurement``.
+    """
+
+    def __init__(self, decorated, timeout, grace=5.0, exit_code=1):
+        super(TimeoutDecorator, self).__init__(
+            decorated, [TimeoutMeasurement(timeout, grace, exit_code)])
@@ -17,7 +17,7 @@
 import codecs
 utf_8_decode = codecs.utf_8_decode
 import datetime
-from io import UnsupportedOperation
+from io import BytesIO, UnsupportedOperation
 import os
 import select
 import struct
@@ -32,6 +32,11 @@ import subunit.iso8601 as iso8601
 
 __all__ = [
     'ByteStreamToStreamResult',
+    'iter_packets',
+    'packet_route_code',
+    'packet_status',
+    'packet_test_id',
+    'set_packet_route_code',
     'StreamResultToBytes',
     ]
 
@@ -95,6 +100,230 @@ class ParseError(Exception):
     """Used to pass error messages within the parser."""
 
 
+def _decode_number(data, pos):
+    """Decode the number at pos in the bytearray data.
+
+    :return: (value, bytes consumed).
+    """
+    first = data[pos]
+    value = first & 0x3f
+    typeenum = first & 0xc0
+    if typeenum == 0x00:
+        return value, 1
+    elif typeenum == 0x40:
+        return (value << 8) | data[pos+1], 2
+    elif typeenum == 0x80:
+        return (value << 16) | (data[pos+1] << 8) | data[pos+2], 3
+    return ((value << 24) | (data[pos+1] << 16) | (data[pos+2] << 8) |
+        data[pos+3]), 4
+
+
+def _skip_utf8(data, pos):
+    length, consumed = _decode_number(data, pos)
+    return pos + consumed + length
+
+
+def _parse_error_packet(message):
+    """Return a packet reporting message as ByteStreamToStreamResult does."""
+    output = BytesIO()
+    StreamResultToBytes(output).status(test_id="subunit.parser",
+        test_status='fail', eof=True, file_name="Parser Error",
+        file_bytes=message.encode('utf8'),
+        mime_type="text/plain;charset=utf8")
+    return output.getvalue()
+
+
+def _read_packet(source):
+    """Read the rest of a packet whose signature has been read."""
+    header = read_exactly(source, 5)
+    length, consumed = _decode_number(bytearray(header), 2)
+    if consumed == 4:
+        raise ParseError('3 byte maximum given but 4 byte value found.')
+    packet = SIGNATURE + header + read_exactly(source, length - 6)
+    crc = zlib.crc32(packet[:-4]) & 0xffffffff
+    packet_crc = struct.unpack(FMT_32, packet[-4:])[0]
+    if crc != packet_crc:
+        raise ParseError(
+            'Bad checksum - calculated (0x%x), stored (0x%x)' % (
+                crc, packet_crc))
+    return packet
+
+
+def iter_packets(source, errors='strict'):
+    """Yield the raw packets in the v2 stream read from source.
+
+    Packets are yielded as bytes without being decoded, but their checksums
+    are verified. Any non-subunit content between packets is yielded as is,
+    in chunks that do not start with the packet signature.
+
+    :param errors: What to do with a truncated or corrupt packet, such as
+        the last packet of a stream from a crashed run: 'strict' to raise
+        ParseError, 'ignore' to skip it, or 'report' to yield in its place
+        a packet failing the test 'subunit.parser' with the error attached,
+        as ``ByteStreamToStreamResult`` reports it.
+    :raises ParseError: On a truncated or corrupt packet, if errors is
+        'strict'.
+    """
+    if errors not in ('strict', 'ignore', 'report'):
+        raise ValueError('Unknown errors mode %r.' % (errors,))
+    source = subunit.make_stream_binary(source)
+    pending = []
+    while True:
+        byte = source.read(1)
+        if not byte:
+            if pending:
+                yield b''.join(pending)
+            return
+        if byte != SIGNATURE:
+            pending.append(byte)
+            continue
+        if pending:
+            yield b''.join(pending)
+            pending = []
+        try:
+            packet = _read_packet(source)
+        except ParseError as error:
+            if errors == 'strict':
+                raise
+            if errors == 'report':
+                yield _parse_error_packet(error.args[0])
+            continue
+        yield packet
+
+
+def _route_code_position(packet):
+    """Return (flags, start of the fields, start of the route code)."""
+    data = bytearray(packet)
+    flags = (data[1] << 8) | data[2]
+    _, consumed = _decode_number(data, 3)
+    start = pos = 3 + consumed
+    if flags & FLAG_TIMESTAMP:
+        _, consumed = _decode_number(data, pos + 4)
+        pos += 4 + consumed
+    if flags & FLAG_TEST_ID:
+        pos = _skip_utf8(data, pos)
+    if flags & FLAG_TAGS:
+        tag_count, consumed = _decode_number(data, pos)
+        pos += consumed
+        for _ in range(tag_count):
+            pos = _skip_utf8(data, pos)
+    if flags & FLAG_MIME_TYPE:
+        pos = _skip_utf8(data, pos)
+    if flags & FLAG_FILE_CONTENT:
+        pos = _skip_utf8(data, pos)
+        content_length, consumed = _decode_number(data, pos)
+        pos += consumed + content_length
+    if pos > len(data) - 4:
+        raise ParseError('Packet fields extend past end of packet.')
+    return flags, start, pos
+
+
+def _read_route_code(data, flags, pos):
+    if not flags & FLAG_ROUTE_CODE:
+        return None
+    length, consumed = _decode_number(data, pos)
+    start = pos + consumed
+    return bytes(data[start:start + length]).decode('utf8')
+
+
+def packet_route_code(packet):
+    """Return the route code of a raw packet, or None if it has none."""
+    flags, _, pos = _route_code_position(packet)
+    return _read_route_code(bytearray(packet), flags, pos)
+
+
+def packet_test_id(packet):
+    """Return the test id of a raw packet, or None if it has none."""
+    data = bytearray(packet)
+    flags = (data[1] << 8) | data[2]
+    if not flags & FLAG_TEST_ID:
+        return None
+    _, consumed = _decode_number(data, 3)
+    pos = 3 + consumed
+    if flags & FLAG_TIMESTAMP:
+        _, consumed = _decode_number(data, pos + 4)
+        pos += 4 + consumed
+    length, consumed = _decode_number(data, pos)
+    pos += consumed
+    return bytes(data[pos:pos + length]).decode('utf8')
+
+
+def packet_status(packet):
+    """Return the test status of a raw packet."""
+    status = bytearray(packet[2:3])[0] & 0x7
+    return ByteStreamToStreamResult.status_lookup[status]
+
+
+def set_packet_route_code(packet, route_code):
+    """Return a copy of the raw packet with its route code replaced.
+
+    Only the header and the route code are decoded; the other fields are
+    copied as bytes, and the length and checksum are recomputed.
+
+    :param route_code: The new route code, None to remove it, or a callable
+        which is given the current route code (or None) and returns the new
+        one.
+    """
+    flags, start, pos = _route_code_position(packet)
+    if callable(route_code):
+        route_code = route_code(
+            _read_route_code(bytearray(packet), flags, pos))
+    fields = [packet[start:pos]]
+    if route_code is None:
+        flags &= ~FLAG_ROUTE_CODE
+    else:
+        flags |= FLAG_ROUTE_CODE
+        utf8 = route_code.encode('utf-8')
+        fields.extend(_encode_number(len(utf8)))
+        fields.append(utf8)
+    content = b''.join(
+        [SIGNATURE, struct.pack(FMT_16, flags),
+            _encode_length(3 + sum(map(len, fields)) + 4)] + fields)
+    return content + struct.pack(FMT_32, zlib.crc32(content) & 0xffffffff)
+
+
+def _encode_length(base_length):
+    """Return the bytes encoding the length of a packet.
+
+    :param base_length: The length of the packet without its length field.
+    """
+    if base_length <= 62:
+        # one byte to encode length, 62+1 = 63
+        length_length = 1
+    elif base_length <= 16381:
+        # two bytes to encode length, 16381+2 = 16383
+        length_length = 2
+    elif base_length <= 4194300:
+        # three bytes to encode length, 419430+3=4194303
+        length_length = 3
+    else:
+        # Longer than policy:
+        # TODO: chunk the packet automatically?
+        # - strip all but file data
+        # - do 4M chunks of that till done
+        # - include original data in final chunk.
+        raise ValueError("Length too long: %r" % base_length)
+    return b''.join(_encode_number(base_length + length_length))
+
+
+def _encode_number(value):
+    assert value >= 0
+    if value < 64:
+        return [struct.pack(FMT_8, value)]
+    elif value < 16384:
+        value = value | 0x4000
+        return [struct.pack(FMT_16, value)]
+    elif value < 4194304:
+        value = value | 0x800000
+        return [struct.pack(FMT_16, value >> 8),
+                struct.pack(FMT_8, value & 0xff)]
+    elif value < 1073741824:
+        value = value | 0xc0000000
+        return [struct.pack(FMT_32, value)]
+    else:
+        raise ValueError('value too large to encode: %r' % (value,))
+
+
 class StreamResultToBytes(object):
     """Convert StreamResult API calls to bytes.
 
@@ -151,21 +380,7 @@ class StreamResultToBytes(object):
         packet.extend(self._encode_number(value))
 
     def _encode_number(self, value):
-        assert value >= 0
-        if value < 64:
-            return [struct.pack(FMT_8, value)]
-        elif value < 16384:
-            value = value | 0x4000
-            return [struct.pack(FMT_16, value)]
-        elif value < 4194304:
-            value = value | 0x800000
-            return [struct.pack(FMT_16, value >> 8),
-                    struct.pack(FMT_8, value & 0xff)]
-        elif value < 1073741824:
-            value = value | 0xc0000000
-            return [struct.pack(FMT_32, value)]
-        else:
-            raise ValueError('value too large to encode: %r' % (value,))
+        return _encode_number(value)
 
     def _write_packet(self, test_id=None, test_status=None, test_tags=None,
         runnable=True, file_name=None, file_bytes=None, eof=False,
@@ -208,30 +423,44 @@ class StreamResultToBytes(object):
         # 0x0008 - not used in v2.
         flags = flags | self.status_mask[test_status]
         packet[1] = struct.pack(FMT_16, flags)
-        base_length = sum(map(len, packet)) + 4
-        if base_length <= 62:
-            # one byte to encode length, 62+1 = 63
-            length_length = 1
-        elif base_length <= 16381:
-            # two bytes to encode length, 16381+2 = 16383
-            length_length = 2
-        elif base_length <= 4194300:
-            # three bytes to encode length, 419430+3=4194303
-            length_length = 3
-        else:
-            # Longer than policy:
-            # TODO: chunk the packet automatically?
-            # - strip all but file data
-            # - do 4M chunks of that till done
-            # - include original data in final chunk.
-            raise ValueError("Length too long: %r" % base_length)
-        packet[2:3] = self._encode_number(base_length + length_length)
+        packet[2] = _encode_length(sum(map(len, packet)) + 4)
         # We could either do a partial application of crc32 over each chunk
         # or a single join to a temp variable then a final join
         # or two writes (that python might then split).
         # For now, simplest code: join, crc32, join, output
         content = b''.join(packet)
         data = content + struct.pack(FMT_32, zlib.crc32(content) & 0xffffffff)
+        self._write_bytes(data)
+
+    def write_exists(self, test_ids, buffer_size=65536):
+        """Emit an 'exists' status for each of test_ids.
+
+        This is equivalent to calling status(test_id=test_id,
+        test_status='exists') for each test, but only the test id varies
+        between the packets, so they are encoded without the general
+        machinery of status(), and written buffer_size bytes at a time
+        instead of with a write and a flush per packet.
+        """
+        head = SIGNATURE + struct.pack(FMT_16, 0x2000 | FLAG_TEST_ID |
+            FLAG_RUNNABLE | self.status_mask['exists'])
+        crc_format = struct.Struct(FMT_32)
+        chunk = []
+        size = 0
+        for test_id in test_ids:
+            utf8 = test_id.encode('utf-8')
+            body = b''.join(_encode_number(len(utf8))) + utf8
+            content = head + _encode_length(len(head) + len(body) + 4) + body
+            chunk.append(content)
+            chunk.append(crc_format.pack(zlib.crc32(content) & 0xffffffff))
+            size += len(content) + 4
+            if size >= buffer_size:
+                self._write_bytes(b''.join(chunk))
+                chunk = []
+                size = 0
+        if chunk:
+            self._write_bytes(b''.join(chunk))
+
+    def _write_bytes(self, data):
         if _PY3:
             # On eventlet 0.17.3, GreenIO.write() can make partial write.
             # Use a loop to ensure that all bytes are written.
@@ -79,10 +79,19 @@ setup(
     scripts = [
         'filters/subunit-1to2',
         'filters/subunit-2to1',
+        'filters/subunit-aggregate',
+        'filters/subunit-allocations',
+        'filters/subunit-cat',
+        'filters/subunit-collector',
+        'filters/subunit-compare',
         'filters/subunit-filter',
+        'filters/subunit-flaky',
         'filters/subunit-ls',
+        'filters/subunit-merge',
         'filters/subunit-notify',
         'filters/subunit-output',
+        'filters/subunit-profile',
+        'filters/subunit-split',
         'filters/subunit-stats',
         'filters/subunit-tags',
         'filters/subunit2csv',